@@ -4,9 +4,23 @@ bluesky_widgets.qt.figures and bluesky_widgets.jupyter.figures.
 """
 
 import logging
+import time
+
+import numpy
+from matplotlib.backend_bases import TimerBase
+from matplotlib.lines import Line2D
 
 from .models.plot_specs import Axes, Image, Line
 
+# In blitting mode, autoscaled limits which differ from the current limits by
+# less than this fraction of the axis span are not applied, and limits which
+# are applied are extended by it, so that small changes in the data limits do
+# not lead to a redraw of the whole figure.
+BLIT_HYSTERESIS = 0.1
+# Lines with more points than this are reduced to the minimum and maximum in
+# each pixel column before they are drawn (see LineDecimator).
+LINE_DECIMATION_MIN_POINTS = 5000
+
 
 class MatplotlibAxes:
     """
@@ -55,8 +69,18 @@ class MatplotlibAxes:
         # Axes from the axes if we need to.
         axes.set_gid(model.uuid)
 
+        # All the Axes in a Figure share one scheduler, which coalesces
+        # redraws.
+        self._redraw_scheduler = RedrawScheduler.for_figure(axes.figure)
+        self._redraw_scheduler.register(self)
+        # Saved image of the axes without animated artists, used for blitting.
+        self._background = None
+
         # Keep a reference to all types of artist here.
         self._artists = {}
+        # Lines are decimated for the current view limits and size of the axes.
+        axes.callbacks.connect("xlim_changed", self._on_view_changed)
+        axes.figure.canvas.mpl_connect("resize_event", self._on_view_changed)
 
         for artist in model.artists:
             self._add_artist(artist)
@@ -90,28 +114,28 @@ class MatplotlibAxes:
 
     def _on_title_changed(self, event):
         self.axes.set_title(event.value)
-        self._update_and_draw()
+        self._request_redraw()
 
     def _on_x_label_changed(self, event):
         self.axes.set_xlabel(event.value)
-        self._update_and_draw()
+        self._request_redraw()
 
     def _on_y_label_changed(self, event):
         self.axes.set_ylabel(event.value)
-        self._update_and_draw()
+        self._request_redraw()
 
     def _on_aspect_changed(self, event):
         aspect = event.value or "auto"
         self.axes.set_aspect(aspect)
-        self._update_and_draw()
+        self._request_redraw(relim=True)
 
     def _on_x_limits_changed(self, event):
         self.axes.set_xlim(event.value)
-        self._update_and_draw()
+        self._request_redraw(relim=True)
 
     def _on_y_limits_changed(self, event):
         self.axes.set_ylim(event.value)
-        self._update_and_draw()
+        self._request_redraw(relim=True)
 
     def _on_artist_spec_added(self, event):
         artist_spec = event.item
@@ -130,7 +154,12 @@ class MatplotlibAxes:
         )
 
         def handle_new_data(event):
-            update(**artist_spec.update())
+            # Artists updated incrementally tell us which data is new.
+            appended = getattr(event, "appended", None)
+            if appended is None:
+                update(**artist_spec.update())
+            else:
+                update(**artist_spec.update(), appended=appended)
 
         if artist_spec.live:
             self.connect(artist_spec.events.new_data, handle_new_data)
@@ -147,19 +176,20 @@ class MatplotlibAxes:
         # Listen for changes to label and style.
         self.connect(artist_spec.events.label, self._on_label_changed)
         self.connect(artist_spec.events.style_updated, self._on_style_updated)
-        self._update_and_draw()
+        self._request_redraw(legend=True, relim=True)
 
     def _on_label_changed(self, event):
         artist_spec = event.artist_spec
         artist = self._artists[artist_spec.uuid]
         artist.set(label=event.value)
-        self._update_and_draw()
+        self._request_redraw(legend=True)
 
     def _on_style_updated(self, event):
         artist_spec = event.artist_spec
         artist = self._artists[artist_spec.uuid]
         artist.set(**event.update)
-        self._update_and_draw()
+        # The legend shows the style (e.g. color), so it must be rebuilt.
+        self._request_redraw(legend=True)
 
     def _on_artist_spec_removed(self, event):
         artist_spec = event.item
@@ -171,14 +201,117 @@ class MatplotlibAxes:
             cb.remove()
         # Remove it from the canvas.
         artist.remove()
-        self._update_and_draw()
+        self._request_redraw(legend=True, relim=True)
+
+    def _on_view_changed(self, event):
+        "Decimate the lines again for the new view limits or size."
+        for artist in self._artists.values():
+            if isinstance(artist, DecimatedLine2D):
+                artist.set_decimated_data()
+
+    def _request_redraw(self, *, legend=False, relim=False, autoscale=False, blit=False):
+        """
+        Mark this Axes as needing a redraw, to be done by the RedrawScheduler.
+
+        Parameters
+        ----------
+        legend : Boolean
+            Rebuild the legend.
+        relim : Boolean
+            Recompute the data limits from all the data (implies autoscale).
+        autoscale : Boolean
+            Rescale the view to the data limits.
+        blit : Boolean
+            Only the data of animated artists changed, so in blitting mode
+            the figure does not need to be redrawn unless the limits change.
+        """
+        self._redraw_scheduler.request(self, legend=legend, relim=relim, autoscale=autoscale, blit=blit)
 
-    def _update_and_draw(self):
-        "Update the legend and redraw the canvas."
-        self.axes.legend(loc=1)  # Update the legend.
-        self.axes.relim()
-        self.axes.autoscale_view()
-        self.draw_idle()  # Ask matplotlib to redraw the figure.
+    def _refresh(self, *, legend, relim, autoscale):
+        """
+        Apply pending updates. This is called by the RedrawScheduler.
+
+        Returns True if the view limits changed.
+        """
+        blit = self._redraw_scheduler.blit
+        if legend:
+            legend_artist = self.axes.legend(loc=1)  # Update the legend.
+            # Draw the legend over the animated artists.
+            legend_artist.set_animated(blit)
+        if relim:
+            self.axes.relim()  # Recompute data limits.
+        if relim or autoscale:
+            # Rescale the view using those new limits.
+            return self._autoscale_view(hysteresis=BLIT_HYSTERESIS if blit else 0)
+        return False
+
+    def _autoscale_view(self, *, hysteresis=0):
+        """
+        Rescale the view to the data limits. Returns True if the limits changed.
+
+        With hysteresis, small changes of the limits are not applied if all the
+        data remain in view, and the limits that are applied are extended by
+        the same fraction of the axis span in the direction of the change.
+        """
+        axes = self.axes
+        old_limits = (axes.get_xlim(), axes.get_ylim())
+        axes.autoscale_view()
+        new_limits = (axes.get_xlim(), axes.get_ylim())
+        if not hysteresis:
+            return new_limits != old_limits
+
+        changed = False
+        for axis, old, new, data_interval in (
+            ("x", old_limits[0], new_limits[0], axes.dataLim.intervalx),
+            ("y", old_limits[1], new_limits[1], axes.dataLim.intervaly),
+        ):
+            if new == old:
+                continue
+            set_lim = axes.set_xlim if axis == "x" else axes.set_ylim
+            scale = axes.get_xscale() if axis == "x" else axes.get_yscale()
+            if scale != "linear":
+                changed = True
+                continue
+            (old_min, old_max), (new_min, new_max) = sorted(old), sorted(new)
+            tolerance = hysteresis * (old_max - old_min)
+            data_min, data_max = sorted(data_interval)
+            in_view = old_min <= data_min and data_max <= old_max
+            if in_view and abs(new_min - old_min) <= tolerance and abs(new_max - old_max) <= tolerance:
+                set_lim(old, auto=None)
+                continue
+            # Leave room for the data to grow before the limits change again.
+            margin = hysteresis * (new_max - new_min)
+            if new_min < old_min:
+                new_min -= margin
+            if new_max > old_max:
+                new_max += margin
+            inverted = new[0] > new[1]
+            set_lim((new_max, new_min) if inverted else (new_min, new_max), auto=None)
+            changed = True
+        return changed
+
+    def _animated_artists(self):
+        "Artists which are drawn over the saved background when blitting."
+        artists = [artist for artist in self._artists.values() if artist.get_animated()]
+        legend = self.axes.get_legend()
+        if legend is not None and legend.get_animated():
+            artists.append(legend)
+        return artists
+
+    def _save_background(self):
+        "Save the image of the freshly drawn axes and draw the animated artists over it."
+        canvas = self.axes.figure.canvas
+        self._background = canvas.copy_from_bbox(self.axes.bbox)
+        for artist in self._animated_artists():
+            self.axes.draw_artist(artist)
+
+    def _blit(self):
+        "Restore the background and redraw only the animated artists."
+        canvas = self.axes.figure.canvas
+        canvas.restore_region(self._background)
+        for artist in self._animated_artists():
+            self.axes.draw_artist(artist)
+        canvas.blit(self.axes.bbox)
 
     # These wrapper factory functions build various matplotlib Artist types (e.g.
     # Line2D, AxesImage) and translate between their creation and update APIs
@@ -187,15 +320,29 @@ class MatplotlibAxes:
 
     def _construct_line(self, *, x, y, label, style):
         (artist,) = self.axes.plot(x, y, label=label, **style)
-        self.axes.relim()  # Recompute data limits.
-        self.axes.autoscale_view()  # Rescale the view using those new limits.
-        self.draw_idle()
-
-        def update(*, x, y):
-            artist.set_data(x, y)
-            self.axes.relim()  # Recompute data limits.
-            self.axes.autoscale_view()  # Rescale the view using those new limits.
-            self.draw_idle()
+        # In blitting mode, lines are not part of the saved background.
+        artist.set_animated(self._redraw_scheduler.blit)
+        # Points can not be dropped from lines with markers or steps.
+        if artist.get_marker() in ("None", "", " ", None) and artist.get_drawstyle() == "default":
+            # The line is created by plot() to get the default style (e.g. from the color cycle).
+            artist.__class__ = DecimatedLine2D
+            artist.decimator = LineDecimator()
+            artist.decimator.set_data(x, y)
+            artist.set_decimated_data()
+
+        def update(*, x, y, appended=None):
+            if isinstance(artist, DecimatedLine2D):
+                artist.decimator.set_data(x, y, appended=appended)
+                artist.set_decimated_data()
+            else:
+                artist.set_data(x, y)
+            if appended is None:
+                self._request_redraw(relim=True, blit=True)
+            else:
+                # Only data was added, so expand the limits to include it
+                # rather than recomputing them from all the data.
+                self.axes.update_datalim(numpy.column_stack([appended["x"], appended["y"]]))
+                self._request_redraw(autoscale=True, blit=True)
 
         return artist, update
 
@@ -207,19 +354,347 @@ class MatplotlibAxes:
             # Keep the reference to the colorbar so that it could be removed with the artist
             setattr(artist, "_bsw_colorbar", cb)  # bsw - bluesky-widgets
 
-        self.axes.relim()  # Recompute data limits.
-        self.axes.autoscale_view()  # Rescale the view using those new limits.
-        self.draw_idle()
-
         def update(*, array):
             artist.set_data(array)
-            self.axes.relim()  # Recompute data limits.
-            self.axes.autoscale_view()  # Rescale the view using those new limits.
-            self.draw_idle()
+            self._request_redraw(relim=True)
 
         return artist, update
 
 
+class DecimatedLine2D(Line2D):
+    """
+    Line2D showing only the points selected by its ``decimator`` (a
+    LineDecimator, which holds all the data) for the view limits and the size
+    in pixels of its Axes.
+
+    The points are selected again before the line is drawn if the view or the
+    size changed since, e.g. when the figure is saved or rendered with a higher
+    dpi than on the screen, or a pickled copy of the figure is drawn.
+    """
+
+    decimator = None
+    # (x_min, x_max, n_columns) for which the points were selected.
+    _decimated_view = None
+
+    def _decimation_view(self):
+        "The visible range of x and the number of pixel columns, or None if the line can not be decimated."
+        if self.axes.get_xscale() != "linear":
+            return None
+        x_min, x_max = sorted(self.axes.get_xlim())
+        return x_min, x_max, max(1, int(self.axes.bbox.width))
+
+    def set_decimated_data(self):
+        "Show only the points of the line which are visible at the current view limits and size."
+        view = self._decimation_view()
+        indices = None if view is None else self.decimator.indices(*view)
+        if indices is None:
+            self.set_data(self.decimator.x, self.decimator.y)
+        else:
+            self.set_data(self.decimator.x[indices], self.decimator.y[indices])
+        self._decimated_view = view
+
+    def draw(self, renderer):
+        if self._decimation_view() != self._decimated_view:
+            self.set_decimated_data()
+        super().draw(renderer)
+
+
+class LineDecimator:
+    """
+    Select the points of a long line which are needed to draw it.
+
+    The visible part of the line is split into pixel columns and only the
+    first, last, minimum and maximum point in each column are kept (M4
+    decimation), so the drawn line looks the same as the full line, but the
+    time it takes to draw it does not depend on the number of points. The
+    first and last point, the global minimum and maximum and the neighbors of
+    the visible part are kept as well, so the data limits are not changed.
+
+    Lines with at most ``min_points`` points, or with x not sorted, or with
+    non-numeric or NaN values are not decimated.
+
+    When data are appended, only the pixel columns which contain new points
+    are processed again.
+
+    Parameters
+    ----------
+    min_points : int, optional
+    """
+
+    def __init__(self, min_points=LINE_DECIMATION_MIN_POINTS):
+        self.min_points = min_points
+        self.x = numpy.empty(0)
+        self.y = numpy.empty(0)
+        self._decimable = False
+        # Indices of the global minimum and maximum of y.
+        self._argmin = self._argmax = None
+        # Results of the last decimation, kept for the last view (and the one
+        # before it, since autoscaling may briefly change the limits).
+        self._cache = {}
+
+    def set_data(self, x, y, *, appended=None):
+        """
+        Set the data of the line.
+
+        Parameters
+        ----------
+        x, y : Array
+        appended : dict, optional
+            If the new data is the old data with points appended, the appended
+            points as ``{"x": Array, "y": Array}``.
+        """
+        x, y = numpy.asarray(x), numpy.asarray(y)
+        n_old = len(self.x)
+        if appended is not None and self._decimable and 0 < n_old < len(x) == len(y):
+            # Check only the new points (and their connection to the old ones).
+            self.x, self.y = x, y
+            self._decimable = self._check(x[n_old - 1 :], y[n_old:])
+            if self._decimable:
+                new_argmin = n_old + numpy.argmin(y[n_old:])
+                new_argmax = n_old + numpy.argmax(y[n_old:])
+                if y[new_argmin] < y[self._argmin]:
+                    self._argmin = new_argmin
+                if y[new_argmax] > y[self._argmax]:
+                    self._argmax = new_argmax
+                for key, (indices, n_points) in list(self._cache.items()):
+                    self._cache[key] = self._update_decimation(key, indices, n_points)
+                return
+        else:
+            self.x, self.y = x, y
+            self._decimable = len(x) == len(y) and len(x) > 0 and self._check(x, y)
+            if self._decimable:
+                self._argmin, self._argmax = numpy.argmin(y), numpy.argmax(y)
+        self._cache.clear()
+
+    @staticmethod
+    def _check(x, y):
+        "Check that the points can be decimated: numbers, not NaN, sorted by x."
+        if not (numpy.issubdtype(x.dtype, numpy.number) and numpy.issubdtype(y.dtype, numpy.number)):
+            return False
+        if numpy.iscomplexobj(x) or numpy.iscomplexobj(y):
+            return False
+        return not (numpy.isnan(x).any() or numpy.isnan(y).any()) and bool(numpy.all(numpy.diff(x) >= 0))
+
+    def indices(self, x_min, x_max, n_columns):
+        """
+        Indices of the points to draw between ``x_min`` and ``x_max`` in
+        ``n_columns`` pixel columns, or None if the line should not be decimated.
+        """
+        if not self._decimable or len(self.x) <= max(self.min_points, 4 * n_columns) or not x_min < x_max:
+            return None
+        key = (x_min, x_max, n_columns)
+        if key in self._cache:
+            indices, _ = self._cache[key]
+        else:
+            indices, _ = self._update_decimation(key, None, 0)
+            # Keep the decimation for the previous view too.
+            while len(self._cache) > 1:
+                del self._cache[next(iter(self._cache))]
+        self._cache[key] = (indices, len(self.x))
+
+        x, n = self.x, len(self.x)
+        first_visible = numpy.searchsorted(x, x_min, side="left")
+        last_visible = numpy.searchsorted(x, x_max, side="right") - 1
+        extra = numpy.clip([0, n - 1, self._argmin, self._argmax, first_visible - 1, last_visible + 1], 0, n - 1)
+        return numpy.union1d(indices, extra)
+
+    def _update_decimation(self, key, indices, n_points):
+        """
+        Decimate the visible points. If ``indices`` were computed for the first
+        ``n_points`` points, only the columns after the last of them are redone.
+        """
+        x_min, x_max, n_columns = key
+        edges = numpy.linspace(x_min, x_max, n_columns + 1)
+        start_column = 0
+        if indices is not None and n_points:
+            # The first column which may contain new points
+            start_column = max(
+                0, min(n_columns - 1, int(numpy.searchsorted(edges, self.x[n_points - 1], "right") - 1))
+            )
+        # Points in column i are in x[bounds[i]:bounds[i + 1]]; x_max is in the last column.
+        bounds = numpy.searchsorted(self.x, edges[start_column:], side="left")
+        bounds[-1] = numpy.searchsorted(self.x, x_max, side="right")
+        new_indices = _min_max_indices(self.y, bounds)
+        if start_column:
+            indices = indices[indices < bounds[0]]
+            return numpy.concatenate([indices, new_indices]), len(self.x)
+        return new_indices, len(self.x)
+
+
+def _min_max_indices(y, bounds):
+    """
+    Indices of the first, last, minimum and maximum of ``y`` in each of the
+    column ``y[bounds[i]:bounds[i + 1]]`` (M4 decimation). Returns sorted indices.
+    """
+    starts, counts = bounds[:-1], numpy.diff(bounds)
+    non_empty = counts > 0
+    starts, counts = starts[non_empty], counts[non_empty]
+    if not len(starts):
+        return numpy.empty(0, dtype=numpy.intp)
+    offset = starts[0]
+    values = y[offset : starts[-1] + counts[-1]]
+    relative_starts = starts - offset
+    column = numpy.repeat(numpy.arange(len(starts)), counts)
+
+    def first_matches(mask):
+        "Index of the first True in each column."
+        positions = numpy.flatnonzero(mask)
+        first = numpy.ones(len(positions), dtype=bool)
+        first[1:] = column[positions[1:]] != column[positions[:-1]]
+        return positions[first]
+
+    argmins = first_matches(values == numpy.minimum.reduceat(values, relative_starts)[column])
+    argmaxs = first_matches(values == numpy.maximum.reduceat(values, relative_starts)[column])
+    lasts = relative_starts + counts - 1
+    return offset + numpy.unique(numpy.concatenate([relative_starts, lasts, argmins, argmaxs]))
+
+
+class RedrawScheduler:
+    """
+    Coalesce requests to redraw the Axes of one matplotlib Figure.
+
+    Each MatplotlibAxes marks itself dirty, noting whether its legend and data
+    limits need updating. The pending work is done and the canvas is redrawn
+    at most ``max_fps`` times per second, using a timer from the canvas's
+    event loop. If ``max_fps`` is None or the canvas has no event loop (e.g.
+    Agg), the work is done immediately.
+
+    Use :meth:`for_figure` to get the (one) RedrawScheduler for a Figure.
+
+    In blitting mode, lines are animated artists: the image of each Axes
+    without them is saved after every full redraw, and when only their data
+    change, the saved image is restored and just the lines and legend of the
+    changed Axes are drawn over it. The whole figure is redrawn only if
+    anything else changes or autoscaled limits change by more than
+    ``BLIT_HYSTERESIS``. Blitting is used only if the canvas supports it.
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure
+    max_fps : Number, optional
+    blit : Boolean, optional
+    """
+
+    def __init__(self, figure, max_fps=None, blit=False):
+        self.figure = figure
+        self.max_fps = max_fps
+        # Blitting mode as requested; see the 'blit' property.
+        self._blit = bool(blit)
+        self._draw_cid = None
+        # Map MatplotlibAxes to dict of pending work.
+        self._dirty = {}
+        # MatplotlibAxes with changes which can not be blitted.
+        self._needs_draw = set()
+        self._views = []
+        self._timer = None
+        self._last_flush = 0
+        self._connect_blit()
+
+    @classmethod
+    def for_figure(cls, figure, max_fps=None, blit=False):
+        """
+        Get the RedrawScheduler for this Figure, creating it if necessary.
+
+        The max_fps and blit parameters are only used when the RedrawScheduler
+        is created.
+        """
+        try:
+            return figure._bsw_redraw_scheduler  # bsw - bluesky-widgets
+        except AttributeError:
+            scheduler = cls(figure, max_fps=max_fps, blit=blit)
+            setattr(figure, "_bsw_redraw_scheduler", scheduler)
+            return scheduler
+
+    def __reduce__(self):
+        # The views can not be pickled with the Figure; a copy of the Figure gets a new scheduler.
+        return (self.__class__, (self.figure, self.max_fps, self._blit))
+
+    @property
+    def blit(self):
+        "Whether blitting is used: if it was requested and the canvas of the Figure supports it."
+        return self._connect_blit()
+
+    def _connect_blit(self):
+        "Connect to the draw events of the canvas if blitting is used, and return whether it is."
+        canvas = getattr(self.figure, "canvas", None)
+        if not (self._blit and getattr(canvas, "supports_blit", False)):
+            return False
+        if self._draw_cid is None:
+            # A Figure being unpickled has no canvas yet when its scheduler is created, so connect on first use.
+            self._draw_cid = canvas.mpl_connect("draw_event", self._on_draw)
+        return True
+
+    def register(self, view):
+        "Add a MatplotlibAxes of this Figure."
+        self._views.append(view)
+
+    def _on_draw(self, event):
+        "Save the backgrounds for blitting after the figure is drawn."
+        if self.figure.canvas.is_saving():
+            # The image may be drawn with different size or dpi.
+            for view in self._views:
+                view._background = None
+            return
+        for view in self._views:
+            view._save_background()
+
+    def request(self, view, *, legend=False, relim=False, autoscale=False, blit=False):
+        "Mark a MatplotlibAxes as needing a redraw, and schedule a flush."
+        pending = self._dirty.setdefault(view, {"legend": False, "relim": False, "autoscale": False})
+        pending["legend"] |= legend
+        pending["relim"] |= relim
+        pending["autoscale"] |= autoscale
+        if not blit:
+            self._needs_draw.add(view)
+        if self._timer is not None:
+            # A flush is already scheduled.
+            return
+        if self.max_fps is None:
+            self.flush()
+            return
+        delay = self._last_flush + 1 / self.max_fps - time.monotonic()
+        timer = self.figure.canvas.new_timer(interval=max(0, int(1000 * delay)))
+        if type(timer) is TimerBase:
+            # This canvas has no event loop to run the timer.
+            self.flush()
+            return
+        timer.single_shot = True
+        timer.add_callback(self.flush)
+        self._timer = timer
+        timer.start()
+
+    def flush(self):
+        "Do any pending work and redraw now."
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        dirty, self._dirty = self._dirty, {}
+        needs_draw, self._needs_draw = self._needs_draw, set()
+        draw = not self.blit or bool(needs_draw)
+        for view, pending in dirty.items():
+            limits_changed = view._refresh(**pending)
+            draw = draw or limits_changed or view._background is None
+        if dirty:
+            if draw:
+                # Views may override draw_idle, so let one of them do the drawing.
+                next(iter(dirty)).draw_idle()
+            else:
+                for view in dirty:
+                    view._blit()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        "Cancel any scheduled flush."
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        self._dirty.clear()
+        self._needs_draw.clear()
+        if self._draw_cid is not None:
+            self.figure.canvas.mpl_disconnect(self._draw_cid)
+            self._draw_cid = None
+
+
 def _quiet_mpl_noisy_logger():
     "Do not filter or silence it, but avoid defaulting to the logger of last resort."
     logger = logging.getLogger("matplotlib.legend")
@@ -4,6 +4,7 @@ from qtpy.QtWidgets import QAction, QFileDialog
 
 from bluesky_widgets.models.run_engine_client import RunEngineClient
 from bluesky_widgets.qt import Window
+from bluesky_widgets.qt.threading import create_worker
 
 from .settings import SETTINGS
 from .widgets import QtViewer
@@ -54,10 +55,15 @@ class Viewer(ViewerModel):
         self.action_save_history_as_json = QAction("Save Plan History (as .json)", self._window._qt_window)
         self.action_save_history_as_json.triggered.connect(self._save_history_as_json_triggered)
         menu_item_save.addAction(self.action_save_history_as_json)
+        self.action_save_history_as_jsonl = QAction("Save Plan History (as .jsonl)", self._window._qt_window)
+        self.action_save_history_as_jsonl.triggered.connect(self._save_history_as_jsonl_triggered)
+        menu_item_save.addAction(self.action_save_history_as_jsonl)
         self.action_save_history_as_yaml = QAction("Save Plan History (as .yaml)", self._window._qt_window)
         self.action_save_history_as_yaml.triggered.connect(self._save_history_as_yaml_triggered)
         menu_item_save.addAction(self.action_save_history_as_yaml)
 
+        self._save_history_worker = None
+
         self._widget.model.run_engine.events.status_changed.connect(self.on_update_widgets)
 
     def _update_action_env_destroy_state(self):
@@ -74,6 +80,9 @@ class Viewer(ViewerModel):
     def _save_history_as_json_triggered(self):
         self._save_history_to_file("json")
 
+    def _save_history_as_jsonl_triggered(self):
+        self._save_history_to_file("jsonl")
+
     def _save_history_as_yaml_triggered(self):
         self._save_history_to_file("yaml")
 
@@ -88,13 +97,47 @@ class Viewer(ViewerModel):
             if file_path:
                 file_path = file_path_tuple[0]
                 self._work_dir = os.path.dirname(file_path)
-                self._widget.model.run_engine.save_plan_history_to_file(
-                    file_path=file_path, file_format=file_format
-                )
-                print(f"Plan history was successfully saved to file {file_path!r}")
+                self._start_saving_history(file_path=file_path, file_format=file_format)
         except Exception as ex:
             print(f"Failed to save data to file: {ex}")
 
+    def _start_saving_history(self, *, file_path, file_format):
+        """
+        Save plan history to file in the background thread. The progress is displayed in the status bar.
+        """
+        if self._save_history_worker is not None:
+            print("Plan history is currently being saved. Wait until the operation is completed.")
+            return
+
+        status_bar = self._window._status_bar
+
+        def on_yielded(progress):
+            n_saved, n_total = progress
+            status_bar.showMessage(f"Saving plan history: {n_saved} of {n_total} items")
+
+        def on_returned(_):
+            status_bar.showMessage("Plan history is saved", 5000)
+            print(f"Plan history was successfully saved to file {file_path!r}")
+
+        def on_errored(ex):
+            status_bar.showMessage("Failed to save plan history", 5000)
+            print(f"Failed to save data to file: {ex}")
+
+        def on_finished():
+            self._save_history_worker = None
+
+        self._save_history_worker = create_worker(
+            self._widget.model.run_engine.iter_save_plan_history_to_file,
+            file_path=file_path,
+            file_format=file_format,
+            _connect={
+                "yielded": on_yielded,
+                "returned": on_returned,
+                "errored": on_errored,
+                "finished": on_finished,
+            },
+        )
+
     def on_update_widgets(self, event):
         self._update_action_env_destroy_state()
 
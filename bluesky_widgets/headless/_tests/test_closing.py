@@ -1,4 +1,4 @@
-import matplotlib.pyplot as plt
+from matplotlib._pylab_helpers import Gcf
 
 from ...models.plot_specs import Axes, Figure
 from ..figures import HeadlessFigure
@@ -8,6 +8,14 @@ def test_closing():
     axes = Axes()
     model = Figure(axes=(axes,), title="test")
     view = HeadlessFigure(model)
-    assert plt.fignum_exists(view.figure.number)
+    # The figure is not managed by pyplot.
+    assert all(manager.canvas.figure is not view.figure for manager in Gcf.get_all_fig_managers())
+    canvas = view.figure.canvas
     view.close_figure()
-    assert not plt.fignum_exists(view.figure.number)
+    assert view.figure.canvas is not canvas
+
+    # The canvas of the closed figure is reused.
+    another_view = HeadlessFigure(Figure(axes=(Axes(),), title="another test"))
+    assert another_view.figure.canvas is canvas
+    assert canvas.figure is another_view.figure
+    another_view.close_figure()
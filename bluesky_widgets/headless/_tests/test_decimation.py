@@ -0,0 +1,110 @@
+import io
+import pickle
+
+import numpy
+import pytest
+
+from ..._matplotlib_axes import DecimatedLine2D, LineDecimator
+from ...models.plot_specs import Axes, Figure, Line
+from ..figures import HeadlessFigure
+
+
+def _min_max_reference(x, y, x_min, x_max, n_columns):
+    "Straightforward M4: first, last, minimum and maximum point in each pixel column."
+    column = numpy.floor((x - x_min) / (x_max - x_min) * n_columns).astype(int)
+    column[x == x_max] = n_columns - 1
+    indices = set()
+    for i in range(n_columns):
+        (in_column,) = numpy.nonzero(column == i)
+        if len(in_column):
+            values = y[in_column]
+            indices.update(in_column[[0, -1, numpy.argmin(values), numpy.argmax(values)]])
+    return indices
+
+
+@pytest.mark.parametrize("x_min, x_max", [(0, 1000), (100.5, 200.5), (-50, 20)])
+def test_line_decimator(x_min, x_max):
+    rng = numpy.random.default_rng(0)
+    x = numpy.sort(rng.uniform(0, 1000, 20000))
+    y = rng.normal(size=20000)
+    decimator = LineDecimator(min_points=1000)
+    decimator.set_data(x, y)
+    indices = decimator.indices(x_min, x_max, 300)
+    assert numpy.all(numpy.diff(indices) > 0)
+    assert _min_max_reference(x, y, x_min, x_max, 300) <= set(indices)
+    # The data limits are kept.
+    assert {0, len(x) - 1, numpy.argmin(y), numpy.argmax(y)} <= set(indices)
+
+    # Appended data are decimated incrementally.
+    new_x, new_y = numpy.linspace(1000, 1500, 5000), rng.normal(size=5000)
+    x, y = numpy.concatenate([x, new_x]), numpy.concatenate([y, new_y])
+    decimator.set_data(x, y, appended={"x": new_x, "y": new_y})
+    expected = LineDecimator(min_points=1000)
+    expected.set_data(x, y)
+    numpy.testing.assert_array_equal(decimator.indices(x_min, x_max, 300), expected.indices(x_min, x_max, 300))
+
+
+def test_line_decimator_not_applicable():
+    decimator = LineDecimator(min_points=10)
+    decimator.set_data(numpy.arange(100), numpy.arange(100))
+    assert decimator.indices(0, 99, 100) is None  # not more points than 4 per column
+    assert decimator.indices(0, 99, 5) is not None
+    decimator.set_data(numpy.arange(100)[::-1], numpy.arange(100))
+    assert decimator.indices(0, 99, 5) is None  # x is not sorted
+    y = numpy.arange(100.0)
+    y[50] = numpy.nan
+    decimator.set_data(numpy.arange(100), y)
+    assert decimator.indices(0, 99, 5) is None
+
+
+def test_decimated_line():
+    x = numpy.linspace(0, 100, 100000)
+    y = numpy.sin(x)
+    line = Line(lambda: {"x": x, "y": y}, label="line")
+    view = HeadlessFigure(Figure((Axes(artists=[line]),), title="test"))
+    (axes,) = view.figure.axes
+    (artist,) = axes.get_lines()
+    assert len(artist.get_xdata()) < 5000
+    numpy.testing.assert_array_equal(axes.dataLim.intervalx, [0, 100])
+    numpy.testing.assert_allclose(axes.dataLim.intervaly, [-1, 1], atol=1e-6)
+
+    # Zooming in shows more details.
+    n_points = len(artist.get_xdata())
+    axes.set_xlim(10, 11)
+    visible = (artist.get_xdata() >= 10) & (artist.get_xdata() <= 11)
+    assert visible.sum() > n_points / 2
+    view.close()
+
+
+def test_decimated_line_high_dpi(monkeypatch):
+    "Test that the line is decimated for the size in pixels of the rendered image."
+    x = numpy.linspace(0, 100, 100000)
+    line = Line(lambda: {"x": x, "y": numpy.sin(x)}, label="line")
+    view = HeadlessFigure(Figure((Axes(artists=[line]),), title="test"))
+    (axes,) = view.figure.axes
+    (artist,) = axes.get_lines()
+    assert isinstance(artist, DecimatedLine2D)
+    n_columns = int(axes.bbox.width)
+
+    columns = []
+    indices = LineDecimator.indices
+
+    def record_indices(self, x_min, x_max, n_columns):
+        columns.append(n_columns)
+        return indices(self, x_min, x_max, n_columns)
+
+    monkeypatch.setattr(LineDecimator, "indices", record_indices)
+    view.render(format="rgba", dpi=4 * view.figure.dpi)
+    assert columns and columns[-1] >= 4 * n_columns - 4
+
+    # A pickled copy is drawn from all the data.
+    columns.clear()
+    copy = pickle.loads(pickle.dumps(view.figure))
+    copy.savefig(io.BytesIO(), format="png", dpi=2 * copy.dpi)
+    assert columns and columns[-1] >= 2 * n_columns - 2
+
+    # The screen resolution is used again.
+    columns.clear()
+    view.render(format="rgba")
+    assert columns == [n_columns]
+    view.close()
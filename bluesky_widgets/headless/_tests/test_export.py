@@ -0,0 +1,103 @@
+import pickle
+
+import matplotlib.figure
+import numpy
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from ..._matplotlib_axes import RedrawScheduler
+from ...models.plot_specs import Axes, Figure, FigureList, Line
+from ..figures import HeadlessFigure, HeadlessFigures
+
+
+def _make_figure(title):
+    line = Line(lambda: {"x": numpy.arange(10), "y": numpy.arange(10) ** 2}, label="line", live=False)
+    return Figure((Axes(artists=[line]),), title=title)
+
+
+def test_export_all(tmp_path):
+    model = FigureList([_make_figure("a"), _make_figure("a"), _make_figure("b/c")])
+    view = HeadlessFigures(model)
+    filenames = view.export_all(tmp_path)
+    assert filenames == [str(tmp_path / name) for name in ("a.png", "a-1.png", "b_c.png")]
+    for filename in filenames:
+        with open(filename, "rb") as file:
+            assert file.read(8) == b"\x89PNG\r\n\x1a\n"
+
+    # Render in worker processes and keep the images in memory
+    exported = view.export_all(format="png", n_workers=2, to_buffer=True)
+    assert [item.filename for item in exported] == ["a.png", "a-1.png", "b_c.png"]
+    for item, filename in zip(exported, filenames):
+        assert item.duration > 0
+        with open(filename, "rb") as file:
+            assert item.buffer.getvalue() == file.read()
+
+    stats = view.export_all(tmp_path, return_stats=True)
+    assert [item.filename for item in stats] == filenames
+    assert all(item.buffer is None for item in stats)
+    view.close()
+
+
+def test_render():
+    data = {"x": numpy.arange(10), "y": numpy.arange(10)}
+    line = Line(lambda: dict(data), label="line")
+    model = Figure((Axes(artists=[line]),), title="test")
+    view = HeadlessFigure(model)
+
+    png = view.render(format="png")
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    # The image is cached until the figure changes.
+    assert view.render(format="png") is png
+    pixels = view.render(format="rgba", dpi=50)
+    assert pixels.shape == (240, 320, 4)
+    assert not pixels.flags.writeable
+
+    version = view.version
+    data["y"] = numpy.arange(10) ** 2
+    line.events.new_data()
+    assert view.version > version
+    new_png = view.render(format="png")
+    assert new_png != png
+
+    model.title = "new title"
+    assert view.render(format="png") != new_png
+    view.close()
+
+
+class _FakeView:
+    "Counts the saved backgrounds."
+
+    def __init__(self):
+        self.n_saved = 0
+
+    def _save_background(self):
+        self.n_saved += 1
+
+
+@pytest.mark.parametrize("blit", [False, True])
+def test_redraw_scheduler_pickle(blit):
+    "Copies of a Figure get a new RedrawScheduler with the same parameters."
+    figure = matplotlib.figure.Figure()
+    FigureCanvasAgg(figure)
+    scheduler = RedrawScheduler.for_figure(figure, max_fps=5, blit=blit)
+    assert scheduler.blit is blit
+    cls, args = scheduler.__reduce__()
+    assert args == (figure, 5, blit)
+    assert cls(*args).blit is blit
+
+    copy = pickle.loads(pickle.dumps(figure))
+    copy_scheduler = copy._bsw_redraw_scheduler
+    assert copy_scheduler.figure is copy
+    assert copy_scheduler.max_fps == 5
+    # The canvas of the copy (FigureCanvasBase) does not support blitting.
+    assert not copy_scheduler.blit
+    # Blitting is used once the copy gets a canvas which supports it.
+    FigureCanvasAgg(copy)
+    assert copy_scheduler.blit is blit
+    view = _FakeView()
+    copy_scheduler.register(view)
+    copy.canvas.draw()
+    assert view.n_saved == (1 if blit else 0)
+    copy_scheduler.close()
+    copy.canvas.draw()
+    assert view.n_saved == (1 if blit else 0)
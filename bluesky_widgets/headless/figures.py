@@ -1,12 +1,39 @@
+import collections
 import collections.abc
+import concurrent.futures
+import io
+import itertools
+import pickle
+import threading
+import time
 from pathlib import Path
 
-import matplotlib
+import matplotlib.figure
+import numpy
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-from .._matplotlib_axes import MatplotlibAxes
-from ..models.plot_specs import Figure, FigureList
+from .._matplotlib_axes import MatplotlibAxes, RedrawScheduler
+from ..models.plot_specs import Axes, Figure, FigureList
 from ..utils.dict_view import DictView
 
+# Maximum number of idle canvases of each size kept for reuse by new figures.
+CANVAS_POOL_SIZE = 8
+
+ExportedFigure = collections.namedtuple("ExportedFigure", ["filename", "buffer", "duration"])
+ExportedFigure.__doc__ = """
+Result of exporting one figure with :meth:`HeadlessFigures.export_all`
+
+Attributes
+----------
+filename : str
+    Path of the file, or the name under which the figure would be saved if it was exported to a buffer
+buffer : io.BytesIO or None
+    Buffer with the exported image or None if the image was written to file
+duration : float
+    Time (in seconds) spent rendering and encoding the figure
+"""
+
 
 class HeadlessFigures:
     """
@@ -29,6 +56,11 @@ class HeadlessFigures:
 
     >>> headless.export_all("path/to/directory/", format="png")
     >>> headless.export_all("path/to/directory/", format="jpg")
+
+    Render the figures in 4 processes and keep the images in memory.
+
+    >>> exported = headless.export_all(format="png", n_workers=4, to_buffer=True)
+    >>> exported[0].buffer.getvalue()  # PNG bytes
     """
 
     def __init__(self, model: FigureList):
@@ -68,38 +100,59 @@ class HeadlessFigures:
 
     close = close_figures
 
-    def export_all(self, directory, format="png", **kwargs):
+    def export_all(
+        self, directory=None, format="png", *, n_workers=None, to_buffer=False, return_stats=False, **kwargs
+    ):
         """
         Export all figures.
 
         Parameters
         ----------
-        directory : str | Path
+        directory : str | Path, optional
+            Required unless ``to_buffer`` is True.
         format : str, optional
             Default is "png".
+        n_workers : int, optional
+            If greater than 1, the figures are rendered in parallel in a pool of
+            ``n_workers`` processes. Each figure is pickled (including its data)
+            and the rendered image is sent back to this process.
+        to_buffer : bool, optional
+            Write the images to in-memory buffers instead of files.
+        return_stats : bool, optional
+            Return a list of ``ExportedFigure`` instead of the list of file names.
+            It is always returned if ``to_buffer`` is True.
         **kwargs :
             Passed through to matplotlib.figure.Figure.savefig
 
         Returns
         -------
-        filenames : List[String]
+        filenames : List[String] or List[ExportedFigure]
         """
-        # Avoid name collisions in the case of duplicate titles by appending
-        # "-1", "-2", "-3", ... to duplicates.
-        titles_tallied = {}
-        filenames = []
-        for figure_spec in self.model:
-            title = figure_spec.title
-            if title in titles_tallied:
-                filename = f"{title}-{titles_tallied[title]}"
-                titles_tallied[title] += 1
+        if directory is None and not to_buffer:
+            raise ValueError("The 'directory' must be specified unless the figures are exported to buffers.")
+        figure_specs = list(self.model)
+        filenames = _export_filenames([figure_spec.title for figure_spec in figure_specs], format)
+        if directory is not None:
+            filenames = [str(Path(directory, filename)) for filename in filenames]
+        figures = [self._figures[figure_spec.uuid] for figure_spec in figure_specs]
+
+        if n_workers is not None and n_workers > 1 and len(figures) > 1:
+            rendered = _render_figures_parallel(figures, n_workers, format=format, **kwargs)
+        else:
+            rendered = (figure._render(format=format, **kwargs) for figure in figures)
+
+        exported = []
+        for filename, (data, duration) in zip(filenames, rendered):
+            if to_buffer:
+                buffer = io.BytesIO(data)
             else:
-                filename = title
-                titles_tallied[title] = 1
-            filename = str(Path(directory, f"{filename}.{format}"))
-            figure = self._figures[figure_spec.uuid]
-            figure.export(filename, format=format, **kwargs)
-            filenames.append(filename)
+                buffer = None
+                with open(filename, "wb") as file:
+                    file.write(data)
+            exported.append(ExportedFigure(filename, buffer, duration))
+
+        if to_buffer or return_stats:
+            return exported
         return filenames
 
 
@@ -114,15 +167,26 @@ class HeadlessFigure:
 
     >>> headless = HeadlessFigure(model)
     >>> headless.export("my-figure.png")
+
+    Render the figure in memory. The result is cached until the figure changes.
+
+    >>> png_bytes = headless.render(format="png", dpi=72)
+    >>> pixels = headless.render(format="rgba")  # numpy array (height, width, 4)
     """
 
     def __init__(self, model: Figure):
         self.model = model
+        # The version is incremented each time the figure changes.
+        self._version_counter = itertools.count()
+        self._version = next(self._version_counter)
+        # Map render parameters to (version, image).
+        self._render_cache = {}
+        self._render_lock = threading.Lock()
         self.figure, self.axes_list = _make_figure(model)
         self.figure.suptitle(model.title)
         self._axes = {}
         for axes_spec, axes in zip(model.axes, self.axes_list):
-            self._axes[axes_spec.uuid] = MatplotlibAxes(model=axes_spec, axes=axes)
+            self._axes[axes_spec.uuid] = HeadlessAxes(model=axes_spec, axes=axes, on_changed=self.invalidate)
 
         model.events.title.connect(self._on_title_changed)
         # The Figure model does not currently allow axes to be added or
@@ -133,11 +197,28 @@ class HeadlessFigure:
         "Read-only access to the mapping Axes UUID -> MatplotlibAxes"
         return DictView(self._axes)
 
+    @property
+    def version(self):
+        "Counter which is incremented each time the figure changes."
+        return self._version
+
+    def invalidate(self):
+        """
+        Mark the figure as changed, so that it is rendered again.
+
+        Changes made through the model are tracked automatically. This needs
+        to be called only after the matplotlib figure is modified directly.
+        """
+        self._version = next(self._version_counter)
+
     def _on_title_changed(self, event):
         self.figure.suptitle(event.value)
+        self.invalidate()
 
     def close_figure(self):
-        _close_figure(self.figure)
+        RedrawScheduler.for_figure(self.figure).close()
+        _canvas_pool.release(self.figure)
+        self._render_cache.clear()
 
     close = close_figure
 
@@ -155,40 +236,212 @@ class HeadlessFigure:
         """
         self.figure.savefig(str(filename), format=format, **kwargs)
 
+    def render(self, format="png", *, dpi=None, **kwargs):
+        """
+        Render figure in memory.
+
+        The image is cached and returned again until the figure changes (see
+        :attr:`version`).
+
+        Parameters
+        ----------
+        format : str, optional
+            Default is "png". Use "rgba" to get the pixels from the Agg renderer.
+        dpi : float, optional
+            Default is the dpi of the figure.
+        **kwargs :
+            Passed through to matplotlib.figure.Figure.savefig
+
+        Returns
+        -------
+        image : bytes | numpy.ndarray
+            Read-only array of shape ``(height, width, 4)`` if format is "rgba"
+        """
+        key = (format, dpi, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            key = None  # Parameters that can not be hashed are not cached.
+
+        with self._render_lock:
+            version = self._version
+            cached = self._render_cache.get(key) if key is not None else None
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            if format == "rgba":
+                if not isinstance(self.figure.canvas, FigureCanvasAgg):
+                    raise RuntimeError("The figure is closed.")
+                self.figure.savefig(io.BytesIO(), format="rgba", dpi=dpi, **kwargs)
+                image = numpy.array(self.figure.canvas.buffer_rgba())
+                image.flags.writeable = False
+            else:
+                image, _ = _render_figure(self.figure, format=format, dpi=dpi, **kwargs)
+
+            # Do not cache the image if the figure changed while it was rendered.
+            if key is not None and version == self._version:
+                self._render_cache = {k: v for k, v in self._render_cache.items() if v[0] == version}
+                self._render_cache[key] = (version, image)
+            return image
+
+    def _render(self, format="png", **kwargs):
+        "Render the figure. Returns the image as bytes and the time it took to render it."
+        t_start = time.perf_counter()
+        image = self.render(format=format, **kwargs)
+        return image, time.perf_counter() - t_start
+
+
+class HeadlessAxes(MatplotlibAxes):
+    """
+    MatplotlibAxes which does not draw the figure when it changes.
+
+    There is nothing to show, so the figure is drawn only when it is exported
+    or rendered. Instead of a redraw, ``on_changed`` is called.
+
+    Parameters
+    ----------
+    model : Axes
+    axes : matplotlib.axes.Axes
+    on_changed : callable
+        Expected signature::
+
+            func() -> None
+    """
+
+    def __init__(self, model: Axes, axes, *, on_changed):
+        # This is called while the artists are added in __init__ of the base class.
+        self._on_changed = on_changed
+        super().__init__(model=model, axes=axes)
+
+    def draw_idle(self):
+        self._on_changed()
+
+
+def _render_figure(figure, format="png", **kwargs):
+    "Render the matplotlib figure. Returns the image as bytes and the time it took to render it."
+    t_start = time.perf_counter()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=format, **kwargs)
+    return buffer.getvalue(), time.perf_counter() - t_start
+
+
+def _render_pickled_figure(data, format="png", **kwargs):
+    "Unpickle and render the figure. This runs in a worker process."
+    t_start = time.perf_counter()
+    figure = pickle.loads(data)
+    image, _ = _render_figure(figure, format=format, **kwargs)
+    return image, time.perf_counter() - t_start
+
+
+def _render_figures_parallel(figures, n_workers, format="png", **kwargs):
+    """
+    Render the figures in a process pool. Yields the image bytes and the render time
+    for each figure, in order. A figure that can not be pickled is rendered in this process.
+    """
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = []
+        for figure in figures:
+            # Pickle the figures now: they may be updated while the images are rendered.
+            try:
+                data = pickle.dumps(figure.figure)
+            except Exception:
+                futures.append(None)
+            else:
+                futures.append(executor.submit(_render_pickled_figure, data, format=format, **kwargs))
+        for figure, future in zip(figures, futures):
+            if future is None:
+                yield figure._render(format=format, **kwargs)
+            else:
+                yield future.result()
+
+
+def _export_filenames(titles, format):
+    """
+    Generate unique file names from the figure titles. Path separators are replaced
+    and name collisions are avoided by appending "-1", "-2", "-3", ... to duplicates.
+    The names depend only on the titles and their order.
+    """
+    filenames = []
+    used_names = set()
+    titles_tallied = {}
+    for title in titles:
+        name = str(title).replace("/", "_").replace("\\", "_")
+        filename = name
+        while filename in used_names:
+            filename = f"{name}-{titles_tallied.get(name, 1)}"
+            titles_tallied[name] = titles_tallied.get(name, 1) + 1
+        titles_tallied.setdefault(name, 1)
+        used_names.add(filename)
+        filenames.append(f"{filename}.{format}")
+    return filenames
+
 
 def _make_figure(figure_spec):
     "Create a Figure and Axes."
-    matplotlib.use("Agg")  # must set before importing matplotlib.pyplot
-    import matplotlib.pyplot as plt  # noqa
-
+    # Do not use pyplot: the figure is not registered in its global state, so
+    # nothing has to be cleaned up if the figure is discarded without closing it.
+    fig = matplotlib.figure.Figure()
+    _canvas_pool.attach(fig)
     # TODO Let Figure give different options to subplots here,
     # but verify that number of axes created matches the number of axes
     # specified.
-    fig, axes = plt.subplots(len(figure_spec.axes))
-    # Handl return type instability in plt.subplots.
+    axes = fig.subplots(len(figure_spec.axes))
+    # Handl return type instability in Figure.subplots.
     if not isinstance(axes, collections.abc.Iterable):
         axes = [axes]
     return fig, axes
 
 
-def _close_figure(figure):
+class _CanvasPool:
     """
-    Workaround for matplotlib regression relating to closing figures in Agg
+    Recycle the Agg canvases of closed figures.
+
+    A canvas keeps its renderer, which holds the pixel buffer of the size of
+    the figure, and reuses it when it draws a figure of the same size and dpi.
+    Canvases are therefore pooled by figure size and dpi, and a process that
+    renders many figures does not allocate a new buffer for each of them.
 
-    See https://github.com/matplotlib/matplotlib/pull/18184/
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of canvases of each size kept in the pool.
     """
-    # TODO It would be better to switch the approach based on matplotlib
-    # versions known to have this problem, rather than blindly trying. Update
-    # this once a fixed has been released and we know the earliest version of
-    # matplotlib that does not have this bug.
-    try:
-        figure.canvas.close()
-    except AttributeError:
-        from matplotlib._pylab_helpers import Gcf
-
-        num = next(
-            (manager.num for manager in Gcf.figs.values() if manager.canvas.figure == figure),
-            None,
-        )
-        if num is not None:
-            Gcf.destroy(num)
+
+    def __init__(self, max_size=CANVAS_POOL_SIZE):
+        self.max_size = max_size
+        self._canvases = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(figure):
+        return tuple(figure.get_size_inches()), figure.dpi
+
+    def attach(self, figure):
+        "Attach a recycled or a new canvas to the figure."
+        with self._lock:
+            canvases = self._canvases.get(self._key(figure))
+            canvas = canvases.pop() if canvases else None
+        if canvas is None:
+            return FigureCanvasAgg(figure)
+        canvas.figure = figure
+        figure.set_canvas(canvas)
+        return canvas
+
+    def release(self, figure):
+        "Detach the canvas from the figure and return it to the pool."
+        canvas = figure.canvas
+        # The closed figure gets a canvas which does not render anything.
+        FigureCanvasBase(figure)
+        if not isinstance(canvas, FigureCanvasAgg):
+            return
+        with self._lock:
+            canvases = self._canvases[self._key(figure)]
+            if len(canvases) < self.max_size:
+                canvases.append(canvas)
+
+    def clear(self):
+        with self._lock:
+            self._canvases.clear()
+
+
+_canvas_pool = _CanvasPool()
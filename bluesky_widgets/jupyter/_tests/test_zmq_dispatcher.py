@@ -0,0 +1,51 @@
+import os
+import pickle
+import time
+
+import zmq
+
+from ..zmq_dispatcher import RemoteDispatcher
+
+
+def test_remote_dispatcher():
+    "Test that the documents are dispatched and the local socket is removed once the dispatcher is stopped."
+    context = zmq.Context()
+    publisher = context.socket(zmq.PUB)
+    port = publisher.bind_to_random_port("tcp://127.0.0.1")
+    try:
+        dispatcher = RemoteDispatcher(("127.0.0.1", port), prefix=b"test")
+        received = []
+        dispatcher.subscribe(lambda name, doc: received.append((name, doc)))
+        dispatcher.start()
+
+        # The subscription takes effect some time after the subscriber connects
+        t_stop = time.monotonic() + 10
+        while not received:
+            assert time.monotonic() < t_stop, "Timeout occurred"
+            publisher.send(b"test start " + pickle.dumps({"uid": "run-1"}))
+            time.sleep(0.05)
+        # Documents published with other prefixes are skipped
+        publisher.send(b"other event " + pickle.dumps({"seq_num": 0}))
+        for n in range(3):
+            publisher.send(b"test event " + pickle.dumps({"seq_num": n + 1}))
+        t_stop = time.monotonic() + 10
+        while received[-1] != ("event", {"seq_num": 3}):
+            assert time.monotonic() < t_stop, "Timeout occurred"
+            time.sleep(0.01)
+
+        # The start document may be received several times
+        assert [_ for _ in received if _[0] != "start"] == [("event", {"seq_num": n + 1}) for n in range(3)]
+        assert received[0] == ("start", {"uid": "run-1"})
+
+        pair_path = dispatcher._pair_path
+        if zmq.has("ipc"):
+            assert os.path.exists(pair_path)
+        t0 = time.monotonic()
+        dispatcher.stop()
+        assert time.monotonic() - t0 < 2
+        assert not dispatcher._process.is_alive()
+        if zmq.has("ipc"):
+            assert not os.path.exists(pair_path)
+    finally:
+        publisher.close(linger=0)
+        context.term()
@@ -1,11 +1,17 @@
 import multiprocessing
+import os
 import pickle
+import tempfile
 import threading
-from queue import Empty
+import uuid
 
 import zmq
 from bluesky.run_engine import Dispatcher, DocumentNames
 
+POLL_TIMEOUT = 0.1  # sec, how often the dispatching thread checks whether it should stop
+BATCH_SIZE = 1000  # max messages forwarded from the subprocess at once
+STOP_TIMEOUT = 5  # sec, how long to wait for the subprocess to exit before terminating it
+
 
 class RemoteDispatcher:
     """
@@ -13,6 +19,11 @@ class RemoteDispatcher:
 
     This is designed to be run in a Jupyter kernel.
 
+    Messages are received in a subprocess, to avoid stepping on Jupyter's use
+    of zmq, and forwarded still serialized, in batches, over a local PAIR
+    socket to a thread in this process, which deserializes and dispatches
+    them.
+
     Parameters
     ----------
     address : tuple | str
@@ -24,6 +35,9 @@ class RemoteDispatcher:
         If unset, no mesages will be ignored.
     deserializer: function, optional
         optional function to deserialize data. Default is pickle.loads
+    batch_size : int, optional
+        Maximum number of messages forwarded from the subprocess at once.
+        Default is 1000.
 
     Examples
     --------
@@ -36,7 +50,7 @@ class RemoteDispatcher:
     >>> d.stop()  # stops them and blocks until they stop
     """
 
-    def __init__(self, address, *, prefix=b"", deserializer=pickle.loads):
+    def __init__(self, address, *, prefix=b"", deserializer=pickle.loads, batch_size=BATCH_SIZE):
         if isinstance(prefix, str):
             raise ValueError("prefix must be bytes, not string")
         if b" " in prefix:
@@ -46,34 +60,33 @@ class RemoteDispatcher:
             address = address.split(":", maxsplit=1)
         self._deserializer = deserializer
         self.address = (address[0], int(address[1]))
+        self.batch_size = int(batch_size)
 
         self.closed = False
         self._thread = None
         self._process = None
-        self._result_queue = multiprocessing.Queue()
-        self._kill_worker = multiprocessing.Queue()
+        self._context = None
+        self._pair = None
+        # Path of the ipc socket file, removed once the dispatcher is stopped
+        self._pair_path = None
         self._dispatcher = Dispatcher()
         self.subscribe = self._dispatcher.subscribe
         self._waiting_for_start = True
 
-    def _receive_data(self):
-        our_prefix = self._prefix  # local var to save an attribute lookup
-        # TODO Pull on the socket more than once here, until it blocks, to
-        # ensure we do not get more and more behind over time.
-        message = self._socket.recv()
-        prefix, name, doc = message.split(b" ", 2)
+    def _parse(self, message):
+        "Return (name, doc) or None if the message should be skipped."
+        # Messages with some other prefix are filtered out by the subscription.
+        _, name, doc = message.split(b" ", 2)
         name = name.decode()
-        if (not our_prefix) or prefix == our_prefix:
-            if self._waiting_for_start:
-                if name == "start":
-                    self._waiting_for_start = False
-                else:
-                    # We subscribed midstream and are seeing documents for
-                    # which we do not have the full run. Wait for a 'start'
-                    # doc.
-                    return
-            doc = self._deserializer(doc)
-        return name, doc
+        if self._waiting_for_start:
+            if name == "start":
+                self._waiting_for_start = False
+            else:
+                # We subscribed midstream and are seeing documents for
+                # which we do not have the full run. Wait for a 'start'
+                # doc.
+                return None
+        return name, self._deserializer(doc)
 
     def start(self):
         if self.closed:
@@ -82,40 +95,102 @@ class RemoteDispatcher:
                 "started and interrupted. Create a fresh "
                 "instance with {}".format(repr(self))
             )
+        self._context = zmq.Context()
+        self._pair = self._context.socket(zmq.PAIR)
+        if zmq.has("ipc"):
+            self._pair_path = os.path.join(tempfile.gettempdir(), f"bsw-{uuid.uuid4().hex}")
+            pair_address = f"ipc://{self._pair_path}"
+            self._pair.bind(pair_address)
+        else:
+            port = self._pair.bind_to_random_port("tcp://127.0.0.1")
+            pair_address = f"tcp://127.0.0.1:{port}"
         self._process = multiprocessing.Process(
-            target=self._zmq_worker, args=(self._kill_worker, self._result_queue)
+            target=_zmq_worker,
+            args=(self.address, self._prefix, pair_address, self.batch_size),
+            daemon=True,
         )
         self._process.start()
-        self._thread = threading.Thread(target=self._dispatcher_worker)
+        # From here on, only the dispatching thread touches the PAIR socket.
+        self._thread = threading.Thread(target=self._dispatcher_worker, daemon=True)
         self._thread.start()
 
-    def _zmq_worker(self, kill_worker, result_queue):
-        "This runs in a subprocess to avoid stepping on Jupyter's use of zmq."
-        self._context = zmq.Context()
-        self._socket = self._context.socket(zmq.SUB)
-        url = "tcp://%s:%d" % self.address
-        self._socket.connect(url)
-        self._socket.setsockopt_string(zmq.SUBSCRIBE, "")
-        # http://stackoverflow.com/questions/7538988/zeromq-how-to-prevent-infinite-wait#comment68021160_7540299
-        # self._socket.setsockopt(zmq.RCVTIMEO, 100)  # miliseconds
-        # self._socket.setsockopt(zmq.LINGER, 0)
-        while kill_worker.empty():
-            result = self._receive_data()
-            if result is not None:
-                result_queue.put(result)
-
     def _dispatcher_worker(self):
         "This runs in a thread."
-        while not self.closed:
+        pair = self._pair
+        try:
+            while not self.closed:
+                if not pair.poll(int(1000 * POLL_TIMEOUT)):
+                    continue
+                for message in pair.recv_multipart():
+                    item = self._parse(message)
+                    if item is None:
+                        continue
+                    name, doc = item
+                    self._dispatcher.process(DocumentNames[name], doc)
+        finally:
+            # Tell the subprocess to exit. If it has not connected yet, there
+            # is no one to tell, and stop() will terminate it.
             try:
-                result = self._result_queue.get(timeout=0.1)
-            except Empty:
-                continue
-            name, doc = result
-            self._dispatcher.process(DocumentNames[name], doc)
+                pair.send(b"", zmq.NOBLOCK)
+            except zmq.ZMQError:
+                pass
+            pair.close(linger=int(1000 * POLL_TIMEOUT))
+            self._context.term()
+            if self._pair_path is not None:
+                try:
+                    os.remove(self._pair_path)
+                except FileNotFoundError:
+                    pass
 
     def stop(self):
         self.closed = True
-        self._kill_worker.put(object())
-        self._thread.join()
-        self._process.join()
+        if self._thread is not None:
+            # The dispatching thread checks this at least every POLL_TIMEOUT.
+            self._thread.join()
+        if self._process is not None:
+            self._process.join(STOP_TIMEOUT)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+
+
+def _zmq_worker(address, prefix, pair_address, batch_size):
+    "This runs in a subprocess to avoid stepping on Jupyter's use of zmq."
+    context = zmq.Context()
+    subscriber = context.socket(zmq.SUB)
+    subscriber.connect("tcp://%s:%d" % address)
+    # Let 0MQ filter by prefix. Messages are b"<prefix> <name> <doc>".
+    subscriber.setsockopt(zmq.SUBSCRIBE, prefix + b" " if prefix else b"")
+    pair = context.socket(zmq.PAIR)
+    pair.connect(pair_address)
+    poller = zmq.Poller()
+    poller.register(subscriber, zmq.POLLIN)
+    poller.register(pair, zmq.POLLIN)
+    try:
+        while True:
+            # Block until there is data or we are told to stop; no timeout needed.
+            events = dict(poller.poll())
+            if pair in events:
+                break
+            # Drain everything available, up to a full batch, and forward it
+            # without copying or deserializing.
+            batch = []
+            while len(batch) < batch_size:
+                try:
+                    batch.append(subscriber.recv(zmq.NOBLOCK, copy=False))
+                except zmq.Again:
+                    break
+            # If the dispatching thread is behind, wait for it, but keep
+            # listening for the stop message.
+            while batch:
+                try:
+                    pair.send_multipart(batch, zmq.NOBLOCK, copy=False)
+                except zmq.Again:
+                    if pair.poll(int(1000 * POLL_TIMEOUT), zmq.POLLIN):
+                        return
+                else:
+                    batch = None
+    finally:
+        subscriber.close(linger=0)
+        pair.close(linger=0)
+        context.term()
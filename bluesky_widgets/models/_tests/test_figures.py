@@ -157,3 +157,40 @@ def test_artist_set_axes_after_init(artist_factory):
         Axes(artists=[artist])
     exc = exc_info.value
     assert hasattr(exc, "__cause__") and isinstance(exc.__cause__, AxesAlreadySet)
+
+
+def test_axes_indexes():
+    "Axes.by_label and Axes.by_uuid track artists as they are added, removed, and relabeled."
+    a1, a2, b = (Line.from_run(transform, run, label) for label in ("a", "a", "b"))
+    axes = Axes(artists=[a1, b])
+    by_label_a = axes.by_label["a"]
+    axes.artists.append(a2)
+    assert axes.by_label["a"] == [a1, a2]
+    # Appending an artist does not copy the list of artists with the label.
+    assert axes.by_label["a"] is by_label_a
+    # Inserting one out of order keeps the order of Axes.artists.
+    a0 = Line.from_run(transform, run, "a")
+    axes.artists.insert(0, a0)
+    assert axes.by_label["a"] == [a0, a1, a2]
+    axes.remove(a0)
+    assert axes.by_label["b"] == [b]
+    assert axes.by_uuid[a2.uuid] is a2
+    # It is safe to remove artists while looping over a label.
+    for artist in axes.by_label["a"]:
+        axes.remove(artist)
+    assert "a" not in axes.by_label
+    assert a1.uuid not in axes.by_uuid
+    assert list(axes.artists) == [b]
+    b.label = "c"
+    assert "b" not in axes.by_label
+    assert axes.by_label["c"] == [b]
+    axes.remove_by_uuid(b.uuid)
+    assert not axes.artists
+    assert not axes.by_label
+    assert not axes.by_uuid
+    with pytest.raises(KeyError):
+        axes.remove_by_uuid(b.uuid)
+    axes.discard(b)  # no-op
+    # A removed artist no longer updates the indexes.
+    b.label = "d"
+    assert not axes.by_label
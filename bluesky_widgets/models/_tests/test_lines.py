@@ -1,5 +1,6 @@
+import numpy
 import pytest
-from bluesky_live.run_builder import build_simple_run
+from bluesky_live.run_builder import RunBuilder, build_simple_run
 
 from ..plot_builders import Lines
 from ..plot_specs import Axes, Figure
@@ -254,3 +255,57 @@ def test_title(test_titles, expected_titles, FigureView):
     assert view.figure.axes[0].get_title() == expected_titles[3]
 
     view.close()
+
+
+@pytest.mark.parametrize(
+    "x,y,incremental",
+    [
+        ("motor", "det", True),
+        ("time", "-log(det) + 2 * np.sqrt(motor)", True),
+        ("motor", "det > 3", True),
+        ("motor", "det / det[0]", False),
+        ("motor", "cumsum(det)", False),
+        ("motor", lambda det: det * 2, False),
+    ],
+)
+def test_incremental_updates(x, y, incremental, FigureView):
+    "Test that live data is appended incrementally, when possible."
+    with RunBuilder() as builder:
+        builder.add_stream("primary", data={"motor": [1, 2], "det": [10.0, 20.0]})
+        run = builder.get_run()
+        model = Lines(x, [y])
+        view = FigureView(model.figure)
+        model.add_run(run)
+        (line,) = model.axes.artists
+        received = []
+        line.events.new_data.connect(received.append)
+        for i in range(3, 6):
+            builder.add_data("primary", data={"motor": [i], "det": [10.0 * i]})
+            assert len(received) == i - 2
+            assert (getattr(received[-1], "appended", None) is not None) == incremental
+            # The appended data should be the same as a full re-evaluation.
+            actual = line.update()
+            expected = model._transform(run, x, y)
+            assert numpy.allclose(actual["x"], expected["x"])
+            assert numpy.allclose(actual["y"], expected["y"])
+            assert len(actual["y"]) == i
+    view.close()
+
+
+def test_incremental_ignores_other_streams(FigureView):
+    "Data from unrelated streams should not trigger an update."
+    with RunBuilder() as builder:
+        builder.add_stream("primary", data={"motor": [1, 2], "det": [10.0, 20.0]})
+        builder.add_stream("baseline", data={"temperature": [300.0]})
+        run = builder.get_run()
+        model = Lines("motor", ["det"])
+        view = FigureView(model.figure)
+        model.add_run(run)
+        (line,) = model.axes.artists
+        received = []
+        line.events.new_data.connect(received.append)
+        builder.add_data("baseline", data={"temperature": [301.0]})
+        assert not received
+        builder.add_data("primary", data={"motor": [3], "det": [30.0]})
+        assert len(received) == 1
+    view.close()
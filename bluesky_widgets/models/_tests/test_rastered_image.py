@@ -230,3 +230,15 @@ def test_figure_set_after_instantiation():
     assert model.figure is None
     figure = Figure((axes,), title="")
     assert model.figure is figure
+
+
+def test_raster_released_with_run(non_snaking_run, snaking_run, FigureView):
+    "The raster buffer for a Run should be released when the Run is removed."
+    model = RasteredImages("ccd", shape=(2, 2), max_runs=1)
+    view = FigureView(model.figure)
+    model.add_run(non_snaking_run)
+    model.add_run(snaking_run)
+    assert list(model._rasters) == [snaking_run.metadata["start"]["uid"]]
+    model.discard_run(snaking_run)
+    assert not model._rasters
+    view.close()
@@ -0,0 +1,891 @@
+import asyncio
+import copy
+import itertools
+import json
+import queue
+import threading
+import time
+
+import pytest
+import yaml
+from bluesky_queueserver import bind_plan_arguments
+
+from .. import run_engine_client
+from ..run_engine_client import (
+    AsyncRunEngineClient,
+    ConsoleOutputBuffer,
+    RunEngineClient,
+    _diff_history_items,
+    _diff_queue_items,
+    _longest_increasing_subsequence,
+)
+
+
+def test_console_output_buffer_control_sequences():
+    "Test that new lines, carriage returns and cursor up sequences are interpreted."
+    buffer = ConsoleOutputBuffer()
+    buffer.write("first\nsecond ")
+    buffer.write("line\n")
+    assert buffer.lines == ["first", "second line", ""]
+    assert buffer.get_text() == "first\nsecond line"
+
+    # Progress bar: the current line is overwritten
+    buffer.write("[#    ] 20%")
+    buffer.write("\r[###  ] 60%\r[#####] 100%")
+    assert buffer.lines[-1] == "[#####] 100%"
+
+    # Move one line up and overwrite the beginning of the line
+    buffer.write("\n\x1b[A\rSECOND")
+    assert buffer.lines == ["first", "second line", "SECOND] 100%", ""]
+
+
+def test_console_output_buffer_changes():
+    "Test that removed and changed lines are tracked between the updates."
+    buffer = ConsoleOutputBuffer(max_lines=3)
+    buffer.write("a\nb\nc\n")
+    assert buffer.pop_changes() == (0, 0)
+    assert buffer.pop_changes() == (0, 4)
+
+    # Overwriting the last line changes only the last line
+    buffer.write("d\re")
+    assert buffer.pop_changes() == (0, 3)
+
+    buffer.trim()
+    assert buffer.lines == ["b", "c", "e"]
+    assert buffer.pop_changes() == (1, 3)
+
+    buffer.write("\nf")
+    buffer.trim()
+    assert buffer.lines == ["c", "e", "f"]
+    assert buffer.pop_changes() == (1, 2)
+
+    buffer.clear()
+    assert buffer.lines == [""]
+    assert buffer.pop_changes() == (3, 0)
+
+
+def _history_items(n_items):
+    return [
+        {"name": "count", "kwargs": {"num": n}, "item_uid": f"uid-{n}", "result": {"time_start": 1.6e9 + n}}
+        for n in range(n_items)
+    ]
+
+
+@pytest.mark.parametrize("n_items", [0, 1, 250])
+@pytest.mark.parametrize("file_format", ["json", "jsonl", "yaml", "txt"])
+def test_save_plan_history_to_file(tmp_path, file_format, n_items):
+    "Test that the plan history is written to file incrementally with progress reports."
+    history = _history_items(n_items)
+    # The history is loaded from the server, but saving does not require connection
+    client = RunEngineClient.__new__(RunEngineClient)
+    client._plan_history_items = history
+
+    file_path = tmp_path / f"history.{file_format}"
+    progress = []
+    client.save_plan_history_to_file(
+        file_path=file_path, file_format=file_format, progress=lambda *args: progress.append(args)
+    )
+    assert progress[-1] == (n_items, n_items)
+    assert len(progress) == max(1, -(-n_items // 100))
+
+    with open(file_path) as f:
+        if file_format == "json":
+            assert f.read() == json.dumps(history, indent=2)
+        elif file_format == "jsonl":
+            assert [json.loads(line) for line in f] == history
+        elif file_format == "yaml":
+            assert f.read() == yaml.dump(history)
+        else:
+            assert f.read().count("PLAN ") == n_items
+
+
+@pytest.mark.parametrize("file_format", ["json", "jsonl", "yaml", "txt"])
+def test_save_plan_history_to_file_complete(tmp_path, file_format):
+    "Test that the file is fully written and closed once the saving is reported complete."
+    history = _history_items(250)
+    client = RunEngineClient.__new__(RunEngineClient)
+    client._plan_history_items = history
+
+    file_path = tmp_path / f"history.{file_format}"
+    contents = []
+
+    def progress(n_saved, n_total):
+        if n_saved == n_total:
+            contents.append(file_path.read_text())
+
+    client.save_plan_history_to_file(file_path=file_path, file_format=file_format, progress=progress)
+    assert contents == [file_path.read_text()]
+    if file_format == "json":
+        assert json.loads(contents[0]) == history
+    elif file_format == "jsonl":
+        assert [json.loads(line) for line in contents[0].splitlines()] == history
+    elif file_format == "yaml":
+        assert yaml.safe_load(contents[0]) == history
+    else:
+        assert contents[0].count("PLAN ") == len(history)
+
+
+def test_save_plan_history_to_file_txt_workers(tmp_path):
+    "Test that the items formatted by the pool of processes are saved the same way as in serial mode."
+    client = RunEngineClient.__new__(RunEngineClient)
+    client._plan_history_items = _history_items(250)
+
+    contents = []
+    for n_workers in (None, 2):
+        file_path = tmp_path / f"history-{n_workers}.txt"
+        progress = []
+        client.save_plan_history_to_file(
+            file_path=file_path,
+            file_format="txt",
+            progress=lambda *args: progress.append(args),
+            n_workers=n_workers,
+        )
+        assert progress == [(100, 250), (200, 250), (250, 250)]
+        contents.append(file_path.read_text())
+
+    assert contents[0].count("PLAN ") == 250
+    assert contents[1] == contents[0]
+
+
+def test_save_plan_history_to_file_unsupported_format(tmp_path):
+    client = RunEngineClient.__new__(RunEngineClient)
+    client._plan_history_items = []
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        client.save_plan_history_to_file(file_path=tmp_path / "history.csv", file_format="csv")
+
+
+class _FakeRequestError(Exception):
+    pass
+
+
+class FakeREManagerAPI:
+    "Replaces the REManagerAPI of a client. Returns 'status_value' in response to status requests."
+
+    RequestTimeoutError = _FakeRequestError
+    RequestError = _FakeRequestError
+    ClientError = _FakeRequestError
+
+    def __init__(self, status_value=None):
+        self.status_value = status_value or {"manager_state": "idle"}
+        self.n_status_requests = 0
+        # Cleared to block status requests
+        self.respond = threading.Event()
+        self.respond.set()
+
+    def status(self, *, reload=False):
+        self.n_status_requests += 1
+        self.respond.wait()
+        return dict(self.status_value)
+
+    def close(self):
+        pass
+
+
+_zmq_ports = itertools.count(61000)
+
+
+@pytest.fixture
+def make_client():
+    "Create clients with a fake API. Clients created by one call of the factory share a status poller."
+    clients = []
+
+    def factory(n_clients=1):
+        zmq_control_addr = f"tcp://localhost:{next(_zmq_ports)}"
+        new_clients = []
+        for _ in range(n_clients):
+            client = RunEngineClient(zmq_control_addr=zmq_control_addr)
+            client._client.close()
+            client._client = FakeREManagerAPI()
+            new_clients.append(client)
+        clients.extend(new_clients)
+        return new_clients
+
+    yield factory
+
+    for client in clients:
+        client.stop_status_monitoring()
+
+
+def _wait_until(condition, timeout=5):
+    t_stop = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < t_stop, "Timeout occurred"
+        time.sleep(0.01)
+
+
+def test_status_monitoring_shared_poller(make_client):
+    "Test that the clients connected to the same RE Manager share one poller until the last one stops."
+    client_a, client_b = make_client(2)
+    client_a.start_status_monitoring()
+    client_b.start_status_monitoring()
+    poller = run_engine_client._status_pollers[client_a._server_key]
+    assert poller.has(client_a) and poller.has(client_b)
+
+    # One request (by the first client) updates both clients
+    _wait_until(lambda: client_a.re_manager_connected and client_b.re_manager_connected)
+    assert client_a._client.n_status_requests >= 1
+    assert client_b._client.n_status_requests == 0
+
+    client_a.stop_status_monitoring()
+    assert not poller.stopped
+    assert run_engine_client._status_pollers[client_b._server_key] is poller
+
+    # The remaining client now requests the status
+    client_b._client.status_value = {"manager_state": "executing_queue"}
+    _wait_until(lambda: client_b.re_manager_status["manager_state"] == "executing_queue")
+    assert client_a.re_manager_status["manager_state"] == "idle"
+
+    client_b.stop_status_monitoring()
+    assert poller.stopped
+    assert client_b._server_key not in run_engine_client._status_pollers
+    poller._thread.join(timeout=5)
+    assert not poller._thread.is_alive()
+
+    # Monitoring may be restarted by a new poller
+    client_b.start_status_monitoring()
+    assert run_engine_client._status_pollers[client_b._server_key] is not poller
+
+
+def test_status_monitoring_stop_latency(make_client):
+    "Test that stopping does not wait for the pending status request and no status is applied after it."
+    (client,) = make_client()
+    client._client.respond.clear()
+    client.start_status_monitoring()
+    poller = run_engine_client._status_pollers[client._server_key]
+    _wait_until(lambda: client._client.n_status_requests > 0)
+
+    t0 = time.monotonic()
+    client.stop_status_monitoring()
+    assert time.monotonic() - t0 < 0.1
+    assert poller.stopped
+
+    client._client.respond.set()
+    poller._thread.join(timeout=5)
+    assert not poller._thread.is_alive()
+    assert client.re_manager_connected is None
+
+
+def test_status_monitoring_remove_while_polling(make_client):
+    "Test that a client removed while the status is applied to other clients is skipped."
+    client_a, client_b = make_client(2)
+    client_a.start_status_monitoring()
+    _wait_until(lambda: client_a.re_manager_connected)
+
+    # Block the poller while it applies the status to the first client
+    applying, proceed = threading.Event(), threading.Event()
+
+    def on_status_changed(event):
+        applying.set()
+        proceed.wait()
+
+    client_a.events.status_changed.connect(on_status_changed)
+    client_b.start_status_monitoring()
+    client_a._client.status_value = {"manager_state": "paused"}
+    assert applying.wait(timeout=5)
+
+    # The lock is not held while the status is applied: removing the client does not block
+    t0 = time.monotonic()
+    client_b.stop_status_monitoring()
+    assert time.monotonic() - t0 < 0.1
+    n_requests = client_a._client.n_status_requests
+    proceed.set()
+
+    # The next status is applied to the first client only
+    _wait_until(lambda: client_a._client.n_status_requests > n_requests + 1)
+    assert client_a.re_manager_status["manager_state"] == "paused"
+    assert client_b.re_manager_connected is None
+
+
+class FakeAsyncREManagerAPI:
+    """
+    Replaces the asyncio API of a client. The data is consistent with the status: the UIDs
+    in the status are the UIDs of the returned data. The names of the requests are recorded.
+    """
+
+    RequestTimeoutError = _FakeRequestError
+    RequestError = _FakeRequestError
+    ClientError = _FakeRequestError
+
+    def __init__(self):
+        self.requests = []
+        # Names of the requests that raise an exception
+        self.failing = set()
+        self.uids = {
+            "plan_queue_uid": "queue-1",
+            "run_list_uid": "runs-1",
+            "plan_history_uid": "history-1",
+            "plans_allowed_uid": "plans-1",
+            "devices_allowed_uid": "devices-1",
+        }
+        self.manager_state = "idle"
+
+    async def _request(self, name, response):
+        self.requests.append(name)
+        await asyncio.sleep(0)
+        if name in self.failing:
+            raise _FakeRequestError(f"Request {name!r} failed")
+        return response
+
+    async def status(self, *, reload=False):
+        return await self._request("status", dict(self.uids, manager_state=self.manager_state))
+
+    async def devices_allowed(self, *, user_group):
+        response = {
+            "success": True,
+            "devices_allowed": {"det": {}},
+            "devices_allowed_uid": self.uids["devices_allowed_uid"],
+        }
+        return await self._request("devices_allowed", response)
+
+    async def plans_allowed(self, *, user_group):
+        response = {
+            "success": True,
+            "plans_allowed": {"count": {}},
+            "plans_allowed_uid": self.uids["plans_allowed_uid"],
+        }
+        return await self._request("plans_allowed", response)
+
+    async def queue_get(self):
+        items = [{"name": "count", "item_uid": "item-1"}]
+        response = {
+            "success": True,
+            "items": items,
+            "running_item": {},
+            "plan_queue_uid": self.uids["plan_queue_uid"],
+        }
+        return await self._request("queue_get", response)
+
+    async def history_get(self):
+        items = [{"name": "count", "item_uid": "item-0"}]
+        response = {"success": True, "items": items, "plan_history_uid": self.uids["plan_history_uid"]}
+        return await self._request("history_get", response)
+
+    async def re_runs(self):
+        response = {"success": True, "run_list": [], "run_list_uid": self.uids["run_list_uid"]}
+        return await self._request("re_runs", response)
+
+
+@pytest.fixture
+def async_client():
+    client = AsyncRunEngineClient(zmq_control_addr=f"tcp://localhost:{next(_zmq_ports)}")
+    client._async_client = FakeAsyncREManagerAPI()
+    yield client
+    # Only the asyncio API was used, the blocking API was never created
+    assert client._sync_client is None
+
+
+def _record_events(client):
+    "Record the names of the emitted events in the order they are emitted."
+    emitted = []
+    for name in ("status_changed", "plan_queue_changed", "running_item_changed", "plan_history_changed"):
+        getattr(client.events, name).connect(lambda event, name=name: emitted.append(name))
+    for name in ("allowed_devices_changed", "allowed_plans_changed"):
+        getattr(client.events, name).connect(lambda event, name=name: emitted.append(name))
+    return emitted
+
+
+def test_async_manager_connecting_ops(async_client):
+    "Test that the data is loaded concurrently, then the status is applied without reloading the data."
+    emitted = _record_events(async_client)
+    asyncio.run(async_client.manager_connecting_ops_async())
+
+    requests = async_client.async_client.requests
+    # All the requests are sent before any response is processed
+    assert requests[:5] == ["status", "devices_allowed", "plans_allowed", "queue_get", "history_get"]
+    # The list of runs is not loaded by the requests above, so it is loaded once the status is applied.
+    assert requests[5:] == ["re_runs"]
+
+    assert async_client._allowed_devices_uid == "devices-1"
+    assert async_client._allowed_plans_uid == "plans-1"
+    assert async_client._plan_queue_uid == "queue-1"
+    assert async_client._plan_history_uid == "history-1"
+    assert async_client._run_list_uid == "runs-1"
+    assert async_client.re_manager_connected is True
+    assert emitted[-1] == "status_changed"
+    assert emitted.count("status_changed") == 1
+
+
+def test_async_manager_connecting_ops_failed_request(async_client):
+    "Test that a failed request does not prevent the other responses from being processed."
+    async_client.async_client.failing.add("devices_allowed")
+    asyncio.run(async_client.manager_connecting_ops_async())
+
+    assert async_client._allowed_devices_uid == ""
+    assert async_client._allowed_plans_uid == "plans-1"
+    assert async_client._plan_queue_uid == "queue-1"
+    assert async_client._plan_history_uid == "history-1"
+    # The status is applied and the list of devices is requested again, since it is outdated
+    assert async_client.re_manager_connected is True
+    assert sorted(async_client.async_client.requests[5:]) == ["devices_allowed", "re_runs"]
+
+
+def test_async_apply_re_manager_status(async_client):
+    "Test that only the outdated data is reloaded."
+    asyncio.run(async_client.manager_connecting_ops_async())
+    api = async_client.async_client
+    api.requests.clear()
+    emitted = _record_events(async_client)
+
+    api.uids.update(plan_queue_uid="queue-2", plan_history_uid="history-2")
+    changed = asyncio.run(async_client._apply_re_manager_status_async(dict(api.uids, manager_state="idle")))
+    assert changed is True
+    assert sorted(api.requests) == ["history_get", "queue_get"]
+    assert emitted[-1] == "status_changed"
+
+    # Nothing is reloaded if the status did not change
+    api.requests.clear()
+    changed = asyncio.run(async_client._apply_re_manager_status_async(dict(api.uids, manager_state="idle")))
+    assert changed is False
+    assert api.requests == []
+
+    # RE Manager is not accessible
+    assert asyncio.run(async_client._apply_re_manager_status_async(None)) is True
+    assert async_client.re_manager_connected is False
+    assert api.requests == []
+
+
+def test_async_status_monitoring(async_client, monkeypatch):
+    "Test that the status is kept up to date until the task is cancelled."
+    monkeypatch.setattr(run_engine_client, "STATUS_UPDATE_PERIOD_MIN", 0.01)
+    monkeypatch.setattr(run_engine_client, "STATUS_UPDATE_PERIOD_MAX", 0.02)
+    api = async_client.async_client
+
+    async def monitor():
+        task = asyncio.ensure_future(async_client.status_monitoring_async())
+        while async_client._plan_queue_uid != "queue-1":
+            await asyncio.sleep(0.01)
+        api.uids["plan_queue_uid"] = "queue-2"
+        api.manager_state = "executing_queue"
+        while async_client.re_manager_status["manager_state"] != "executing_queue":
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(monitor(), 5))
+    assert async_client._plan_queue_uid == "queue-2"
+    assert api.requests.count("queue_get") == 2
+    n_requests = len(api.requests)
+    time.sleep(0.1)
+    assert len(api.requests) == n_requests
+
+
+def test_async_wait_for(async_client):
+    "Test that the status is polled until the condition is satisfied or the timeout expires."
+    api = async_client.async_client
+
+    async def start_queue():
+        await asyncio.sleep(0.2)
+        api.manager_state = "executing_queue"
+
+    async def wait_for_queue():
+        asyncio.ensure_future(start_queue())
+        await async_client.wait_for_async(lambda status: status["manager_state"] == "executing_queue", timeout=5)
+
+    asyncio.run(wait_for_queue())
+    assert async_client.re_manager_status["manager_state"] == "executing_queue"
+    # The status is polled every STATUS_WAIT_PERIOD while waiting
+    assert api.requests.count("status") > 1
+
+    t0 = time.monotonic()
+    with pytest.raises(RuntimeError, match="Failed to stop the queue: timeout occurred"):
+        asyncio.run(
+            async_client.wait_for_async(
+                lambda status: status["manager_state"] == "idle", 0.3, msg="stop the queue"
+            )
+        )
+    assert 0.3 <= time.monotonic() - t0 < 1
+
+
+def _set_status_later(client, delay, **status):
+    "Change the status returned by the fake API after a delay."
+    timer = threading.Timer(delay, lambda: client._client.status_value.update(status))
+    timer.start()
+    return timer
+
+
+def _is_executing(status):
+    return status["manager_state"] == "executing_queue"
+
+
+def test_wait_for_starts_monitoring(make_client):
+    "Test that the status monitoring is started for the duration of the wait and updates the status often."
+    (client,) = make_client()
+    _set_status_later(client, 0.3, manager_state="executing_queue")
+    t0 = time.monotonic()
+    client.wait_for(_is_executing, timeout=5)
+    # The status is requested every STATUS_WAIT_PERIOD while waiting
+    assert time.monotonic() - t0 < 0.3 + 2 * run_engine_client.STATUS_WAIT_PERIOD
+    assert client._client.n_status_requests > 2
+    assert client.re_manager_status["manager_state"] == "executing_queue"
+    # The monitoring is stopped once the condition is satisfied
+    assert client._server_key not in run_engine_client._status_pollers
+
+
+def test_wait_for_timeout(make_client):
+    (client,) = make_client()
+    client.start_status_monitoring()
+    with pytest.raises(RuntimeError, match="Failed to start the queue: timeout occurred"):
+        client.wait_for(_is_executing, timeout=0.3, msg="start the queue")
+    # The monitoring started before the wait continues, the polling period is restored
+    poller = run_engine_client._status_pollers[client._server_key]
+    assert poller.has(client)
+    assert poller._n_waiting == 0
+
+
+def test_wait_for_checks_later_statuses(make_client):
+    "Test that the condition is not checked for the status received before the call."
+    (client,) = make_client()
+    client._client.status_value["manager_state"] = "executing_queue"
+    client.load_re_manager_status(unbuffered=True)
+    assert _is_executing(client.re_manager_status)
+    n_requests = client._client.n_status_requests
+    client.wait_for(_is_executing, timeout=5)
+    assert client._client.n_status_requests > n_requests
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_wait_for_monitoring_stopped(make_client, shared):
+    "Test that the status is polled if the monitoring is stopped by another thread while waiting."
+    client, *other_clients = make_client(2 if shared else 1)
+    for c in [client] + other_clients:
+        c.start_status_monitoring()
+    poller = run_engine_client._status_pollers[client._server_key]
+
+    threading.Timer(0.2, client.stop_status_monitoring).start()
+    _set_status_later(client, 0.5, manager_state="executing_queue")
+    client.wait_for(_is_executing, timeout=5)
+    assert not poller.has(client)
+    assert poller.stopped is not shared
+
+
+def test_wait_for_async_status_monitoring(make_client):
+    "Test that the coroutine is resumed by the status monitoring thread."
+    (client,) = make_client()
+    _set_status_later(client, 0.3, manager_state="executing_queue")
+    asyncio.run(client.wait_for_async(_is_executing, timeout=5))
+    assert client.re_manager_status["manager_state"] == "executing_queue"
+    assert client._server_key not in run_engine_client._status_pollers
+    assert client._status_callbacks == []
+
+    with pytest.raises(RuntimeError, match="timeout occurred"):
+        asyncio.run(client.wait_for_async(lambda status: False, timeout=0.3))
+    assert client._status_callbacks == []
+
+
+def _items(spec):
+    "Queue items from a string of UIDs, e.g. 'abc'. Upper case UIDs are items changed in place."
+    return [{"name": "count", "item_uid": uid.lower(), "changed": uid.isupper()} for uid in spec]
+
+
+def _apply_changes(items, changes):
+    items = list(items)
+    for op, n, item in changes:
+        if op == "remove":
+            items.pop(n)
+        elif op == "insert":
+            items.insert(n, item)
+        else:
+            assert op == "update"
+            items[n] = item
+    return items
+
+
+@pytest.mark.parametrize("values", [[], [3], [1, 2, 3], [3, 2, 1], [2, 2, 2], [0, 8, 4, 12, 2, 10, 6, 14, 1, 9]])
+def test_longest_increasing_subsequence(values):
+    indices = _longest_increasing_subsequence(values)
+    assert indices == sorted(indices)
+    subsequence = [values[n] for n in indices]
+    assert all(a < b for a, b in zip(subsequence, subsequence[1:]))
+    # The length is checked by brute force
+    n_longest = max(
+        (
+            len(c)
+            for k in range(len(values) + 1)
+            for c in itertools.combinations(values, k)
+            if list(c) == sorted(set(c))
+        ),
+        default=0,
+    )
+    assert len(indices) == n_longest
+
+
+@pytest.mark.parametrize(
+    "old, new, n_changes",
+    [
+        ("", "", 0),
+        ("abc", "abc", 0),
+        ("", "abc", 3),  # Load the queue
+        ("abcd", "abdc", 2),  # Move one item
+        ("abcde", "eabcd", 2),
+        ("abcdefgh", "badcefgh", 4),  # Swap pairs of items
+        ("abc", "xabc", 1),  # Insert
+        ("abc", "abxc", 1),
+        ("abc", "abcx", 1),
+        ("abc", "ac", 1),  # Delete
+        ("abcde", "ace", 2),
+        ("abc", "aBc", 1),  # Update in place
+        ("abcdefgh", "xaCbefgh", 5),  # Insert, delete, update and move
+    ],
+)
+def test_diff_queue_items(old, new, n_changes):
+    old_items, new_items = _items(old), _items(new)
+    changes = _diff_queue_items(old_items, new_items)
+    assert len(changes) == n_changes
+    assert _apply_changes(old_items, changes) == new_items
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ("abc", ""),  # Clear: the table is reloaded
+        ("abc", "c"),  # More changes than rows
+        ("abcd", "dcba"),
+        ("abcd", "xyzw"),  # All the items are replaced
+        ("abb", "ab"),  # Duplicate UID
+        ("ab", "abb"),
+    ],
+)
+def test_diff_queue_items_reload(old, new):
+    "Test the cases when the items can not be matched or the table is better reloaded."
+    assert _diff_queue_items(_items(old), _items(new)) is None
+
+
+def test_diff_queue_items_missing_uid():
+    items = _items("ab")
+    assert _diff_queue_items(items, items + [{"name": "count"}]) is None
+    assert _diff_queue_items([{"name": "count"}] + items, items) is None
+
+
+@pytest.mark.parametrize(
+    "old, new, n_changes",
+    [
+        ("", "", 0),
+        ("abc", "abc", 0),
+        ("", "abc", 3),
+        ("abc", "abcde", 2),
+        ("aa", "aaa", 1),  # UIDs may be repeated in the history
+        ("abc", "abc" + "d" * 10, 10),
+    ],
+)
+def test_diff_history_items(old, new, n_changes):
+    old_items, new_items = _items(old), _items(new)
+    changes = _diff_history_items(old_items, new_items)
+    assert len(changes) == n_changes
+    assert all(op == "insert" for op, _, _ in changes)
+    assert _apply_changes(old_items, changes) == new_items
+
+
+@pytest.mark.parametrize("old, new", [("abc", ""), ("abc", "ab"), ("abc", "abd"), ("abc", "xabc")])
+def test_diff_history_items_reload(old, new):
+    "Test that the history is reloaded if it was cleared or the new history does not start with the old one."
+    assert _diff_history_items(_items(old), _items(new)) is None
+
+
+class FakeConsoleMonitor:
+    "Replaces the console monitor of the API. Messages and exceptions are returned in the order they are added."
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.enabled = False
+        self.n_calls = 0
+
+    def enable(self):
+        self.enabled = True
+
+    def disable_wait(self):
+        self.enabled = False
+
+    def next_msg(self, timeout=None):
+        self.n_calls += 1
+        try:
+            msg = self.queue.get(timeout=timeout) if timeout else self.queue.get_nowait()
+        except queue.Empty:
+            raise _FakeRequestError("Timeout") from None
+        if isinstance(msg, Exception):
+            raise msg
+        return msg
+
+
+@pytest.fixture
+def console_client(make_client):
+    (client,) = make_client()
+    client._client.console_monitor = FakeConsoleMonitor()
+    yield client
+    client.stop_console_output_monitoring()
+
+
+def _console_messages(n_first, n_last):
+    return [{"time": float(n), "msg": f"line {n}\n"} for n in range(n_first, n_last)]
+
+
+def test_console_output_order(console_client):
+    monitor = console_client._client.console_monitor
+    console_client.start_console_output_monitoring()
+    assert monitor.enabled
+
+    received = []
+    for n in range(0, 300, 100):
+        for msg in _console_messages(n, n + 100):
+            monitor.queue.put(msg)
+        _wait_until(lambda: (received.extend(console_client.console_output_pop()[0]) or len(received)) == n + 100)
+    assert received == [(_["time"], _["msg"]) for _ in _console_messages(0, 300)]
+    assert console_client.console_output_pop() == ([], 0)
+
+
+def test_console_output_overflow(console_client):
+    "Test that the oldest messages are dropped if the messages are not popped."
+    monitor = console_client._client.console_monitor
+    console_client.console_output_max_messages = 10
+    for msg in _console_messages(0, 25):
+        monitor.queue.put(msg)
+    console_client.start_console_output_monitoring()
+    _wait_until(lambda: monitor.queue.empty() and console_client._console_output_dropped == 15)
+
+    messages, n_dropped = console_client.console_output_pop()
+    assert messages == [(_["time"], _["msg"]) for _ in _console_messages(15, 25)]
+    assert n_dropped == 15
+
+
+def test_console_output_stop(console_client):
+    "Test that the reader exits promptly once monitoring is stopped and disables the monitor."
+    monitor = console_client._client.console_monitor
+    console_client.start_console_output_monitoring()
+    reader = console_client._console_output_reader
+    console_client.stop_console_output_monitoring()
+    reader.join(timeout=2 * run_engine_client.CONSOLE_OUTPUT_POLL_TIMEOUT)
+    assert not reader.is_alive()
+    assert not monitor.enabled
+
+    # Monitoring can be restarted
+    console_client.start_console_output_monitoring()
+    monitor.queue.put({"time": 0.0, "msg": "restarted\n"})
+    _wait_until(lambda: console_client._console_output)
+    assert console_client.console_output_pop() == ([(0.0, "restarted\n")], 0)
+
+
+def test_console_output_error_backoff(console_client):
+    "Test that the reader waits before retrying after an error and stops promptly while waiting."
+    monitor = console_client._client.console_monitor
+    for _ in range(100):
+        monitor.queue.put(RuntimeError("Connection failed"))
+    console_client.start_console_output_monitoring()
+    time.sleep(0.5)
+    assert monitor.n_calls <= 0.5 / run_engine_client.CONSOLE_OUTPUT_POLL_TIMEOUT + 1
+
+    reader = console_client._console_output_reader
+    t0 = time.monotonic()
+    console_client.stop_console_output_monitoring()
+    reader.join(timeout=1)
+    assert time.monotonic() - t0 < 0.1
+
+
+def _plan_parameters(*names):
+    "Parameters of a plan as described in the list of allowed plans."
+    kind = {"name": "POSITIONAL_OR_KEYWORD", "value": 1}
+    return {"parameters": [{"name": name, "kind": kind, "default": "None"} for name in names]}
+
+
+def _load_allowed_plans(client, plans_allowed_uid, **plans):
+    client._process_allowed_plans(
+        {"success": True, "plans_allowed": plans, "plans_allowed_uid": plans_allowed_uid}
+    )
+
+
+@pytest.mark.parametrize(
+    "args, kwargs",
+    [([], {}), ([["det1"]], {}), ([["det1"], 3], {}), ([["det1"]], {"num": 3}), ([], {"detectors": [], "num": 5})],
+)
+def test_get_bound_item_arguments(make_client, monkeypatch, args, kwargs):
+    "Test that the arguments are bound as by 'bind_plan_arguments' and the results are cached."
+    (client,) = make_client()
+    plan_parameters = _plan_parameters("detectors", "num")
+    _load_allowed_plans(client, "plans-1", count=plan_parameters)
+    n_constructed, n_bound = [], []
+    construct_parameters = run_engine_client.construct_parameters
+    monkeypatch.setattr(
+        run_engine_client,
+        "construct_parameters",
+        lambda *a, **kw: n_constructed.append(None) or construct_parameters(*a, **kw),
+    )
+    get_plan_signature = client._get_plan_signature
+    monkeypatch.setattr(
+        client, "_get_plan_signature", lambda name: n_bound.append(name) or get_plan_signature(name)
+    )
+
+    item = {"item_type": "plan", "name": "count", "args": args, "kwargs": kwargs, "item_uid": "item-1"}
+    expected = bind_plan_arguments(plan_args=args, plan_kwargs=kwargs, plan_parameters=plan_parameters).arguments
+    assert client.get_bound_item_arguments(item) == ([], expected)
+    assert len(n_bound) == 1
+
+    # The arguments bound for the item are cached
+    assert client.get_bound_item_arguments(copy.deepcopy(item)) == ([], expected)
+    assert len(n_bound) == 1
+    # The signature of the plan is cached
+    assert client.get_bound_item_arguments(dict(item, item_uid="item-2")) == ([], expected)
+    assert len(n_bound) == 2
+    assert len(n_constructed) == 1
+
+    # The item with the same UID was modified
+    item_modified = dict(item, args=[["det2"]], kwargs={})
+    assert client.get_bound_item_arguments(item_modified) == ([], {"detectors": ["det2"]})
+    assert len(n_bound) == 3
+    assert len(n_constructed) == 1
+
+
+def test_get_bound_item_arguments_cache_size(make_client, monkeypatch):
+    "Test that the arguments are cached for a limited number of the most recently used items."
+    monkeypatch.setattr(run_engine_client, "BOUND_ARGUMENTS_CACHE_SIZE", 3)
+    (client,) = make_client()
+    _load_allowed_plans(client, "plans-1", count=_plan_parameters("detectors", "num"))
+    n_bound = []
+    get_plan_signature = client._get_plan_signature
+    monkeypatch.setattr(
+        client, "_get_plan_signature", lambda name: n_bound.append(name) or get_plan_signature(name)
+    )
+
+    def get_bound(uid):
+        item = {"item_type": "plan", "name": "count", "args": [["det1"]], "kwargs": {}, "item_uid": uid}
+        assert client.get_bound_item_arguments(item) == ([], {"detectors": ["det1"]})
+
+    for uid in "abc":
+        get_bound(uid)
+    get_bound("a")
+    assert len(n_bound) == 3
+    # The least recently used item ('b') is dropped
+    get_bound("d")
+    assert [key[0] for key in client._bound_item_arguments] == ["c", "a", "d"]
+    get_bound("a")
+    assert len(n_bound) == 4
+    get_bound("b")
+    assert len(n_bound) == 5
+    assert len(client._bound_item_arguments) == 3
+
+
+def test_get_bound_item_arguments_allowed_plans_changed(make_client):
+    "Test that the cached results are not used once the new list of allowed plans is loaded."
+    (client,) = make_client()
+    _load_allowed_plans(client, "plans-1", count=_plan_parameters("detectors", "num"))
+    item = {"item_type": "plan", "name": "count", "args": [["det1"], 3], "kwargs": {}, "item_uid": "item-1"}
+    assert client.get_bound_item_arguments(item) == ([], {"detectors": ["det1"], "num": 3})
+    assert client._get_plan_signature("count") is client._get_plan_signature("count")
+
+    # The new version of the plan accepts one parameter: arguments can not be bound
+    _load_allowed_plans(client, "plans-2", count=_plan_parameters("detectors"))
+    assert client.get_bound_item_arguments(item) == ([["det1"], 3], {})
+    assert list(client._get_plan_signature("count").parameters) == ["detectors"]
+
+    # The plan is not allowed
+    _load_allowed_plans(client, "plans-3")
+    assert client.get_bound_item_arguments(item) == ([["det1"], 3], {})
+    with pytest.raises(RuntimeError, match="Failed to construct the signature of the plan 'count'"):
+        client._get_plan_signature("count")
+    # Items that are not plans are not bound
+    instruction = {
+        "item_type": "instruction",
+        "name": "queue_stop",
+        "args": [1],
+        "kwargs": {},
+        "item_uid": "item-2",
+    }
+    assert client.get_bound_item_arguments(instruction) == ([1], {})
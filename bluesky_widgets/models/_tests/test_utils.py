@@ -1,9 +1,24 @@
+import gc
+import inspect
+import random
+import types
+import weakref
+
 import numpy
 import pytest
 import xarray
 from bluesky_live.run_builder import RunBuilder, build_simple_run
 
-from ..utils import call_or_eval, construct_namespace
+from ..utils import (
+    LazyNamespace,
+    RunList,
+    RunManager,
+    _elementwise_columns,
+    call_or_eval,
+    compile_expression,
+    construct_namespace,
+    signature_parameters,
+)
 
 
 def test_namespace():
@@ -133,3 +148,191 @@ def test_call_or_eval_magical_signature_inspection():
     thing = object()
     result = call_or_eval({"x": func4}, run, [], namespace={"thing": thing})
     assert result["x"] is thing
+
+
+def test_compile_expression_is_cached():
+    "Expressions are parsed and compiled once, and their names are recorded."
+    code, names = compile_expression("3 + np.log(det / I0)")
+    assert names == {"np", "det", "I0"}
+    assert compile_expression("3 + np.log(det / I0)")[0] is code
+    with pytest.raises(SyntaxError):
+        compile_expression("invalid***syntax")
+
+
+@pytest.mark.parametrize(
+    "item, expected",
+    [
+        ("det", {"det"}),
+        ("-log(det) + 2 * np.sqrt(motor)", {"det", "motor"}),
+        ("det > 3", {"det"}),
+        ("det / det[0]", None),
+        ("det @ det", None),
+        ("cumsum(det)", None),
+        ("3", None),
+    ],
+)
+def test_elementwise_columns(item, expected):
+    namespace = {"np": numpy, "log": numpy.log, "cumsum": numpy.cumsum}
+    assert _elementwise_columns(item, {"det", "motor"}, namespace) == expected
+
+
+def test_signature_parameters():
+    "Callables are inspected once, and unhashable callables are supported."
+
+    def func(a, b=1):
+        pass
+
+    assert signature_parameters(func) == (("a", True), ("b", False))
+
+    class Unhashable:
+        __hash__ = None
+
+        def __call__(self, c):
+            pass
+
+    assert signature_parameters(Unhashable()) == (("c", True),)
+
+    class NoWeakReferences:
+        __slots__ = ()
+
+        def __call__(self, d=None):
+            pass
+
+    assert signature_parameters(NoWeakReferences()) == (("d", False),)
+
+
+def test_signature_parameters_cache_does_not_keep_callables_alive(monkeypatch):
+    "Callables are inspected once while they exist, and are not kept alive by the cache."
+    calls = []
+    signature = inspect.signature
+    monkeypatch.setattr(inspect, "signature", lambda func: calls.append(func) or signature(func))
+
+    def make_func(data):
+        def func(a):
+            return data
+
+        return func
+
+    func = make_func(numpy.zeros(10))
+    assert signature_parameters(func) == (("a", True),)
+    assert signature_parameters(func) == (("a", True),)
+    assert len(calls) == 1
+    calls.clear()
+
+    func_ref = weakref.ref(func)
+    del func
+    gc.collect()
+    assert func_ref() is None
+
+
+def test_lazy_namespace(monkeypatch):
+    "Streams are loaded at most once, and only if a name refers to them."
+    with RunBuilder() as builder:
+        builder.add_stream("primary", data={"motor": [1, 2], "det": [10, 20]})
+        builder.add_stream("baseline", data={"temperature": [300, 301]})
+    run = builder.get_run()
+    calls = []
+    for stream_name in ["primary", "baseline"]:
+        to_dask = run[stream_name].to_dask
+        monkeypatch.setattr(
+            run[stream_name],
+            "to_dask",
+            lambda stream_name=stream_name, to_dask=to_dask: calls.append(stream_name) or to_dask(),
+        )
+    namespace = LazyNamespace(run, ["primary", "baseline"], {"c": 3})
+    assert namespace["c"] == 3
+    assert numpy.array_equal(namespace["motor"] + namespace["det"], [11, 22])
+    assert calls == ["primary"]
+    # The stream's time is relative to the start of the run, like the column.
+    assert numpy.array_equal(namespace["primary"]["time"], namespace["time"])
+    assert calls == ["primary"]
+    # Names further down the order of precedence require checking all streams.
+    assert namespace["log"] is numpy.log
+    assert "nonexistent" not in namespace
+    assert numpy.array_equal(namespace["temperature"], [300, 301])
+    assert calls == ["primary", "baseline"]
+    # The eager namespace has the same contents.
+    assert set(namespace) == {"c"} | set(construct_namespace(run, ["primary", "baseline"]))
+
+
+def test_run_list_membership_by_uid():
+    "RunList identifies Runs by uid and keeps its bookkeeping through changes."
+    runs = [build_simple_run({"x": [1, 2]}) for _ in range(4)]
+    run_list = RunList(runs[:2])
+    seen_in_callback = []
+    run_list.events.added.connect(lambda event: seen_in_callback.append(event.item in run_list))
+    run_list.events.removed.connect(lambda event: seen_in_callback.append(event.item in run_list))
+    run_list.append(runs[2])
+    run_list.insert(0, runs[3])
+    assert [run_list.index(run) for run in runs] == [1, 2, 3, 0]
+    run_list.remove(runs[0])
+    assert runs[0] not in run_list
+    assert [run_list.index(run) for run in runs[1:]] == [1, 2, 0]
+    with pytest.raises(ValueError):
+        run_list.index(runs[0])
+    del run_list[0]
+    run_list[0] = runs[0]
+    assert list(run_list) == [runs[0], runs[2]]
+    assert runs[1] not in run_list
+    assert runs[3] not in run_list
+    run_list.clear()
+    assert not any(run in run_list for run in runs)
+    assert seen_in_callback == [True, True, False, False, False, True, False, False]
+
+
+def test_run_manager_culls_unpinned_runs():
+    "RunManager removes the oldest unpinned Runs, oldest first."
+    run_manager = RunManager(max_runs=2, needs_streams=("primary",))
+    removed = []
+    run_manager.runs.events.removed.connect(lambda event: removed.append(event.item))
+    runs = [build_simple_run({"x": [1, 2]}) for _ in range(5)]
+    run_manager.add_run(runs[0], pinned=True)
+    for run in runs[1:4]:
+        run_manager.add_run(run)
+    run_manager.add_run(runs[4], pinned=True)
+    assert list(run_manager.runs) == [runs[0], runs[2], runs[3], runs[4]]
+    run_manager.max_runs = 0
+    assert list(run_manager.runs) == [runs[0], runs[4]]
+    assert removed == runs[1:4]
+    run_manager.discard_run(runs[0])
+    run_manager.discard_run(runs[0])  # no-op
+    assert list(run_manager.runs) == [runs[4]]
+    assert run_manager.pinned == {runs[4].metadata["start"]["uid"]}
+
+
+def test_run_list_index_after_mixed_changes():
+    "RunList.index stays correct, without rebuilding its map, through inserts and removals anywhere."
+    rng = random.Random(0)
+    # Some uids are repeated.
+    runs = [types.SimpleNamespace(metadata={"start": {"uid": f"uid-{n % 15}"}}) for n in range(20)]
+    run_list = RunList(runs[:5])
+    run_list.index(runs[0])
+    uid_to_index = run_list._uid_to_index
+    for _ in range(500):
+        operation = rng.choice(["append", "insert", "pop", "pop_first", "pop_last", "remove", "setitem"])
+        if operation == "append" or not run_list:
+            run_list.append(rng.choice(runs))
+        elif operation == "insert":
+            run_list.insert(rng.randint(-len(run_list), len(run_list)), rng.choice(runs))
+        elif operation == "pop":
+            run_list.pop(rng.randrange(-len(run_list), len(run_list)))
+        elif operation == "pop_first":
+            del run_list[0]
+        elif operation == "pop_last":
+            run_list.pop()
+        elif operation == "remove":
+            run_list.remove(rng.choice(run_list))
+        else:
+            run_list[rng.randrange(len(run_list))] = rng.choice(runs)
+        uids = [run.metadata["start"]["uid"] for run in run_list]
+        for run in runs:
+            uid = run.metadata["start"]["uid"]
+            if uid in uids:
+                assert run_list.index(run) == uids.index(uid)
+            else:
+                assert run not in run_list
+                with pytest.raises(ValueError):
+                    run_list.index(run)
+    assert run_list._uid_to_index is uid_to_index
+    run_list.clear()
+    assert not run_list._uid_to_index
@@ -1,12 +1,26 @@
+import collections
+
 from ..plot_builders import Images
 from ._base import AutoPlotter
 
 
 class AutoImages(AutoPlotter):
     """
-    Construct figures with line plots automatically.
+    Construct figures with images automatically.
+
+    The decision of which images to plot is based on data shape.
+
+    There is one figure per (stream name, field). Successive Runs with the same
+    field are shown in the same figure, up to ``max_runs`` at a time. At most
+    ``max_figures`` figures are kept; when a new one is needed, the least
+    recently updated one is removed.
 
-    The decision of which lines to plot is based on metadata and data shape.
+    Parameters
+    ----------
+    max_runs : Integer, optional
+        Default, ``None``, defers to the default of ``Images``.
+    max_figures : Integer, optional
+        Default, ``None``, means no limit.
 
     Examples
     --------
@@ -19,11 +33,12 @@ class AutoImages(AutoPlotter):
     >>> model.add_run(run)
     """
 
-    def __init__(self, *, max_runs=None):
+    def __init__(self, *, max_runs=None, max_figures=None):
         super().__init__()
-        # Map (stream_name, field) to instance of Images
-        self._field_to_builder = {}
+        # Map (stream_name, field) to instance of Images, least recently used first
+        self._field_to_builder = collections.OrderedDict()
         self._max_runs = max_runs
+        self._max_figures = max_figures
 
     @property
     def max_runs(self):
@@ -32,11 +47,43 @@ class AutoImages(AutoPlotter):
     @max_runs.setter
     def max_runs(self, value):
         if value is not None:
-            for builders in self._lines_instances.values():
-                for builder in builders:
-                    builder.max_runs = value
+            for builder in self._field_to_builder.values():
+                builder.max_runs = value
         self._max_runs = value
 
+    @property
+    def max_figures(self):
+        return self._max_figures
+
+    @max_figures.setter
+    def max_figures(self, value):
+        self._max_figures = value
+        self._evict()
+
+    def _evict(self):
+        "Remove the least recently used figures to keep their number <= max_figures."
+        if self._max_figures is None:
+            return
+        while len(self._field_to_builder) > self._max_figures:
+            _, images = self._field_to_builder.popitem(last=False)
+            self._release(images)
+            if images.figure in self.figures:
+                self.figures.remove(images.figure)
+
+    @staticmethod
+    def _release(images):
+        "Discard all Runs from a builder, which drops their image data."
+        for run in list(images.runs):
+            images.discard_run(run)
+
+    def _on_figure_removed(self, event):
+        super()._on_figure_removed(event)
+        figure = event.item
+        for key, images in list(self._field_to_builder.items()):
+            if images.figure is figure:
+                del self._field_to_builder[key]
+                self._release(images)
+
     def handle_new_stream(self, run, stream_name):
         """
         This is used internally and should not be called directly by user code.
@@ -51,12 +98,18 @@ class AutoImages(AutoPlotter):
         ds = run[stream_name].to_dask()
         for field in ds:
             if 2 <= ds[field].ndim < 5:
-                key = (stream_name, field, run.metadata["start"]["uid"])
+                key = (stream_name, field)
                 try:
                     images = self._field_to_builder[key]
                 except KeyError:
-                    images = Images(field=field, needs_streams=(stream_name,))
+                    images_kwargs = {}
+                    if self.max_runs is not None:
+                        images_kwargs["max_runs"] = self.max_runs
+                    images = Images(field=field, needs_streams=(stream_name,), **images_kwargs)
                     self._field_to_builder[key] = images
                     self.plot_builders.append(images)
                     self.figures.append(images.figure)
+                else:
+                    self._field_to_builder.move_to_end(key)
                 images.add_run(run)
+        self._evict()
@@ -33,3 +33,42 @@ def test_images_multiple_fields():
     assert model.figures[0].axes[0].artists
     assert model.figures[1].axes[0].artists
     view.close()
+
+
+def test_images_max_runs():
+    "Runs with the same field share a figure, which shows at most max_runs of them."
+    model = AutoImages(max_runs=2)
+    view = HeadlessFigures(model.figures)
+    runs = [build_simple_run({"ccd": numpy.random.random((11, 13))}) for _ in range(3)]
+    for run in runs:
+        model.add_run(run)
+    assert len(model.figures) == 1
+    (images,) = model.plot_builders
+    assert list(images.runs) == runs[-2:]
+    assert len(model.figures[0].axes[0].artists) == 2
+    model.max_runs = 1
+    assert list(images.runs) == runs[-1:]
+    assert len(model.figures[0].axes[0].artists) == 1
+    view.close()
+
+
+def test_images_max_figures():
+    "The least recently updated figure is removed to stay within max_figures."
+    model = AutoImages(max_figures=2)
+    view = HeadlessFigures(model.figures)
+    run_a = build_simple_run({"a": numpy.random.random((11, 13))})
+    run_b = build_simple_run({"b": numpy.random.random((11, 13))})
+    run_c = build_simple_run({"c": numpy.random.random((11, 13))})
+    model.add_run(run_a)
+    model.add_run(run_b)
+    model.add_run(build_simple_run({"a": numpy.random.random((11, 13))}))  # 'a' is now most recent
+    model.add_run(run_c)
+    assert [builder.field for builder in model.plot_builders] == ["a", "c"]
+    assert len(model.figures) == 2
+    # Closing a figure forgets its builder, so a later Run gets a new figure.
+    model.figures.remove(model.plot_builders[0].figure)
+    assert [builder.field for builder in model.plot_builders] == ["c"]
+    model.add_run(run_a)
+    assert [builder.field for builder in model.plot_builders] == ["c", "a"]
+    assert len(model.figures) == 2
+    view.close()
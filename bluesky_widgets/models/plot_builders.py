@@ -8,7 +8,13 @@ from ..utils.dict_view import DictView
 from ..utils.event import EmitterGroup, Event
 from ..utils.list import EventedList
 from .plot_specs import Axes, Figure, Image, Line
-from .utils import RunManager, auto_label, call_or_eval, run_is_live_and_not_completed
+from .utils import (
+    IncrementalEvaluator,
+    RunManager,
+    auto_label,
+    call_or_eval,
+    run_is_live_and_not_completed,
+)
 
 
 class Lines:
@@ -60,6 +66,11 @@ class Lines:
     axes : Axes, optional
         If None, an axes and figure are created with default labels and titles
         derived from the ``x`` and ``y`` parameters.
+    incremental : Boolean, optional
+        If True (default), process only the newly-arrived rows of live Runs
+        when x and y are elementwise expressions, such as ``"motor"`` or
+        ``"-log(det)"``. Other expressions, such as ``"det / det[0]"``, and
+        callables are always fully re-evaluated on each update.
 
     Attributes
     ----------
@@ -83,6 +94,9 @@ class Lines:
         Read-only access to stream names needed
     namespace : Dict
         Read-only access to user-provided namespace
+    incremental : Boolean
+        Whether to process new data incrementally where possible. This affects
+        only lines added after it is changed.
 
     Examples
     --------
@@ -148,6 +162,7 @@ class Lines:
         needs_streams=("primary",),
         namespace=None,
         axes=None,
+        incremental=True,
     ):
         super().__init__()
 
@@ -165,6 +180,7 @@ class Lines:
         self._ys_to_artists = collections.defaultdict(list)
         self._label_maker = label_maker
         self._namespace = namespace
+        self.incremental = bool(incremental)
         if axes is None:
             axes = Axes(
                 x_label=auto_label(self.x),
@@ -220,6 +236,9 @@ class Lines:
     def _transform(self, run, x, y):
         return call_or_eval({"x": x, "y": y}, run, self.needs_streams, self.namespace)
 
+    def _incremental(self, run, x, y):
+        return IncrementalEvaluator.from_mapping({"x": x, "y": y}, run, self.needs_streams, self.namespace)
+
     def _add_lines(self, event):
         "Add a line."
         if self._control_y_label:
@@ -249,7 +268,8 @@ class Lines:
                 label += " (pinned)"
 
             func = functools.partial(self._transform, x=self.x, y=y)
-            line = Line.from_run(func, run, label, style)
+            incremental = functools.partial(self._incremental, x=self.x, y=y) if self.incremental else None
+            line = Line.from_run(func, run, label, style, incremental=incremental)
             self._run_manager.track_artist(line, [run])
             self.axes.artists.append(line)
             self._ys_to_artists[y].append(line)
@@ -284,7 +304,8 @@ class Lines:
                 label += " (pinned)"
 
             func = functools.partial(self._transform, x=self.x, y=y)
-            line = Line.from_run(func, run, label, style)
+            incremental = functools.partial(self._incremental, x=self.x, y=y) if self.incremental else None
+            line = Line.from_run(func, run, label, style, incremental=incremental)
             self._run_manager.track_artist(line, [run])
             self.axes.artists.append(line)
             self._ys_to_artists[y].append(line)
@@ -645,8 +666,12 @@ class RasteredImages:
         self._y_positive = y_positive
         self._show_colorbar = bool(show_colorbar)
 
+        # Map Run uid to _Raster.
+        self._rasters = {}
+
         self._run_manager = RunManager(max_runs, needs_streams)
         self._run_manager.events.run_ready.connect(self._add_image)
+        self._run_manager.runs.events.removed.connect(self._on_run_removed)
         self.add_run = self._run_manager.add_run
         self.discard_run = self._run_manager.discard_run
 
@@ -771,17 +796,21 @@ class RasteredImages:
         ...
 
     def _transform(self, run, field):
-        image_data = numpy.ones(self._shape) * numpy.nan
+        # The raster for each Run is kept between updates and only the
+        # newly-arrived points are filled in. The array returned is updated in
+        # place by subsequent calls.
+        uid = run.metadata["start"]["uid"]
+        try:
+            raster = self._rasters[uid]
+        except KeyError:
+            raster = self._rasters[uid] = _Raster(self._shape, run.metadata["start"]["snaking"])
         result = call_or_eval({"data": field}, run, self.needs_streams, self.namespace)
-        data = result["data"]
-        snaking = run.metadata["start"]["snaking"]
-        for index in range(len(data)):
-            pos = list(numpy.unravel_index(index, self._shape))
-            if snaking[1] and (pos[0] % 2):
-                pos[1] = self._shape[1] - pos[1] - 1
-            pos = tuple(pos)
-            image_data[pos] = data[index]
-        return {"array": image_data}
+        raster.fill(result["data"])
+        return {"array": raster.image}
+
+    def _on_run_removed(self, event):
+        "Release the raster for a Run that has been removed."
+        self._rasters.pop(event.item.metadata["start"]["uid"], None)
 
     @property
     def namespace(self):
@@ -816,3 +845,38 @@ class RasteredImages:
     @property
     def pinned(self):
         return self._run_manager._pinned
+
+
+class _Raster:
+    """
+    An image filled in point by point, in (possibly snaking) raster order.
+
+    Parameters
+    ----------
+    shape : Tuple[Integer]
+        The (row, col) shape of the raster
+    snaking : Tuple[Boolean]
+        From the 'snaking' metadata of the Run
+    """
+
+    def __init__(self, shape, snaking):
+        self.image = numpy.full(shape, numpy.nan)
+        # Precompute the flat index into the image of each point.
+        rows, cols = numpy.unravel_index(numpy.arange(self.image.size), shape)
+        if snaking[1]:
+            odd = rows % 2 == 1
+            cols[odd] = shape[1] - cols[odd] - 1
+        self._flat_indexes = numpy.ravel_multi_index((rows, cols), shape)
+        self._num_filled = 0
+
+    def fill(self, data):
+        "Fill in any points of data that have not yet been filled."
+        num_points = min(len(data), self.image.size)
+        if num_points < self._num_filled:
+            # The data has been replaced by something shorter. Start over.
+            self.image.fill(numpy.nan)
+            self._num_filled = 0
+        if num_points > self._num_filled:
+            new = slice(self._num_filled, num_points)
+            self.image.flat[self._flat_indexes[new]] = numpy.asarray(data[new])
+            self._num_filled = num_points
@@ -7,7 +7,6 @@ not know about their parents: thus, Figures know about their Axes and Axes know
 about their Artists.
 """
 
-import collections
 import uuid as uuid_module
 
 from ..utils.dict_view import DictView, UpdateOnlyDict
@@ -164,6 +163,9 @@ class Axes(BaseSpec):
         "_aspect",
         "_x_limits",
         "_y_limits",
+        "_by_label",
+        "_by_uuid",
+        "_indexed_labels",
     )
 
     def __init__(
@@ -197,7 +199,15 @@ class Axes(BaseSpec):
             x_limits=Event,
             y_limits=Event,
         )
+        # Indexes of self.artists, maintained as artists are added, removed,
+        # and relabeled. Map label to list of artists, uuid to artist, and
+        # uuid to the label under which the artist is indexed.
+        self._by_label = {}
+        self._by_uuid = {}
+        self._indexed_labels = {}
         self.artists.events.adding.connect(self._on_artist_adding)
+        self.artists.events.added.connect(self._on_artist_added)
+        self.artists.events.removed.connect(self._on_artist_removed)
         self.artists.extend(artists or [])
 
     @property
@@ -244,30 +254,41 @@ class Axes(BaseSpec):
 
         >>> spec = axes_spec.by_label["Scan 3"]
         >>> spec.style.update(color="red")
+
+        This is a live view, updated as artists are added, removed, or
+        relabeled. Each list is replaced, not modified, when its label loses an
+        artist, so it is safe to remove artists while looping over it. Artists
+        added with the label are appended to the list in place.
         """
-        mapping = collections.defaultdict(list)
-        for artist in self.artists:
-            mapping[artist.label].append(artist)
-        return DictView(dict(mapping))
+        return DictView(self._by_label)
 
     @property
     def by_uuid(self):
         """
         Access artists as a read-only dict keyed by uuid.
+
+        Like :attr:`by_label`, this is a live view.
         """
-        return DictView({artist.uuid: artist for artist in self.artists})
+        return DictView(self._by_uuid)
 
     def discard(self, artist):
         "Discard any Aritst."
-        try:
+        if self._by_uuid.get(artist.uuid) is artist:
             self.artists.remove(artist)
-        except ValueError:
-            pass
 
     def remove(self, artist):
         "Remove any Aritst."
         self.artists.remove(artist)
 
+    def remove_by_uuid(self, uuid):
+        """
+        Remove the Artist with this uuid. Raises KeyError if there is none.
+
+        Only finding the Artist is O(1). Removing it from :attr:`artists` is
+        O(n) in the number of artists, as for any list.
+        """
+        self.artists.remove(self._by_uuid[uuid])
+
     @property
     def title(self):
         "String for figure title. Settable"
@@ -335,6 +356,42 @@ class Axes(BaseSpec):
         artist = event.item
         artist.set_axes(self)
 
+    def _on_artist_added(self, event):
+        artist = event.item
+        self._by_uuid[artist.uuid] = artist
+        self._index_label(artist)
+        artist.events.label.connect(self._on_artist_label)
+
+    def _on_artist_removed(self, event):
+        artist = event.item
+        artist.events.label.disconnect(self._on_artist_label)
+        self._unindex_label(artist)
+        del self._by_uuid[artist.uuid]
+
+    def _on_artist_label(self, event):
+        artist = event.artist_spec
+        self._unindex_label(artist)
+        self._index_label(artist)
+
+    def _index_label(self, artist):
+        label = artist.label
+        artists = self._by_label.get(label, [])
+        if artists and self.artists[-1] is not artist:
+            # Inserted (or relabeled) out of order: keep the order of self.artists.
+            artists = [artist_ for artist_ in self.artists if artist_.label == label]
+        else:
+            artists.append(artist)
+        self._by_label[label] = artists
+        self._indexed_labels[artist.uuid] = label
+
+    def _unindex_label(self, artist):
+        label = self._indexed_labels.pop(artist.uuid)
+        artists = [artist_ for artist_ in self._by_label[label] if artist_ is not artist]
+        if artists:
+            self._by_label[label] = artists
+        else:
+            del self._by_label[label]
+
     def __repr__(self):
         return (
             f"{self.__class__.__name__}(artists={self.artists!r}, "
@@ -404,7 +461,7 @@ class ArtistSpec(BaseSpec):
         self._live = False
 
     @classmethod
-    def from_run(cls, transform, run, label, style=None, axes=None, uuid=None):
+    def from_run(cls, transform, run, label, style=None, axes=None, uuid=None, incremental=None):
         """
         Construct a line representing data from one BlueskyRun.
 
@@ -427,18 +484,53 @@ class ArtistSpec(BaseSpec):
         uuid : UUID, optional
             Automatically assigned to provide a unique identifier for this Figure,
             used internally to track it.
+        incremental : callable, optional
+            Expected signature::
+
+                func(run: BlueskyRun) -> IncrementalEvaluator | None
+
+            If given and the Run is live, new data is processed incrementally
+            and the ``new_data`` Event carries only the newly-``appended``
+            results. If it returns None, or the IncrementalEvaluator later
+            gives up, this falls back to calling ``transform`` on every
+            update.
         """
         # Isolating bluesky-aware stuff here, including this import.
-        from .utils import run_is_live_and_not_completed
-
-        def update():
-            return transform(run)
+        from .utils import lock_if_live, run_is_live_and_not_completed
 
         live = run_is_live_and_not_completed(run)
-        line = cls(update, label=label, style=style, live=live)
-        if live:
-            run.events.new_data.connect(line.events.new_data)
-            run.events.completed.connect(line.events.completed)
+        evaluator = None
+        # Hold the lock so that no data slips in between seeding the
+        # IncrementalEvaluator and subscribing it to updates.
+        with lock_if_live(run):
+            if live and incremental is not None:
+                evaluator = incremental(run)
+
+            def update():
+                if evaluator is not None and evaluator.active:
+                    return evaluator.result()
+                return transform(run)
+
+            line = cls(update, label=label, style=style, live=live)
+            if live:
+                if evaluator is None:
+                    run.events.new_data.connect(line.events.new_data)
+                else:
+
+                    def on_new_data(event):
+                        if evaluator.active:
+                            appended = evaluator.on_new_data(event)
+                            if appended is not None:
+                                line.events.new_data(appended=appended)
+                                return
+                            if evaluator.active:
+                                # This data is not relevant to this artist.
+                                return
+                        line.events.new_data(run=event.run, updated=event.updated)
+
+                    run.events.new_doc.connect(evaluator.on_new_doc)
+                    run.events.new_data.connect(on_new_data)
+                run.events.completed.connect(line.events.completed)
         return line
 
     def set_axes(self, axes):
@@ -1,19 +1,52 @@
+import asyncio
+import bisect
 import collections
+import concurrent.futures
 import copy
 import datetime
+import functools
 import importlib
+import inspect
+import itertools
 import json
 import os.path
 import pprint
+import re
+import threading
 import time
 
 import yaml
 from bluesky_live.event import EmitterGroup, Event
-from bluesky_queueserver import bind_plan_arguments
+from bluesky_queueserver import construct_parameters
 from bluesky_queueserver.manager.conversions import spreadsheet_to_plan_list
 from bluesky_queueserver_api._defaults import default_user_group
 from bluesky_queueserver_api.http import REManagerAPI as REManagerAPI_HTTP
+from bluesky_queueserver_api.http.aio import REManagerAPI as REManagerAPI_HTTP_AIO
 from bluesky_queueserver_api.zmq import REManagerAPI as REManagerAPI_ZMQ
+from bluesky_queueserver_api.zmq.aio import REManagerAPI as REManagerAPI_ZMQ_AIO
+
+# Bounds of the adaptive status polling period (seconds): the status is polled
+#   often while RE Manager is busy or something has just changed, and less and
+#   less often while nothing changes.
+STATUS_UPDATE_PERIOD_MIN = 0.5
+STATUS_UPDATE_PERIOD_MAX = 5.0
+# Timeout for a single wait for a status message pushed by RE Manager (seconds).
+#   Bounds the time it takes to stop status monitoring.
+STATUS_MONITOR_POLL_TIMEOUT = 0.2
+# Status polling period while a client is waiting for a condition (see 'RunEngineClient.wait_for').
+STATUS_WAIT_PERIOD = 0.1
+# Maximum number of console output messages waiting to be processed by the application.
+#   The oldest messages are dropped if the application falls behind.
+CONSOLE_OUTPUT_MAX_MESSAGES = 10000
+# Timeout for a single wait for console output (seconds). Bounds the time it takes to stop monitoring.
+CONSOLE_OUTPUT_POLL_TIMEOUT = 0.2
+# File formats supported by 'RunEngineClient.save_plan_history_to_file'.
+HISTORY_FILE_FORMATS = ("txt", "json", "jsonl", "yaml", "msgpack")
+# Number of history items written to file between progress reports.
+HISTORY_SAVE_CHUNK_SIZE = 100
+# Maximum number of queue and history items with cached bound arguments (see 'get_bound_item_arguments').
+#   The least recently used items are dropped first.
+BOUND_ARGUMENTS_CACHE_SIZE = 10000
 
 
 class RunEngineClient:
@@ -55,19 +88,31 @@ class RunEngineClient:
             )
         if http_server_uri:
             print(f"HTTP server address: {http_server_uri}")
-            self._client = REManagerAPI_HTTP(http_server_uri=http_server_uri)
-            if http_server_api_key:
-                self._client.set_authorization_key(api_key=http_server_api_key)
         else:
             print(f"0MQ control server address: {zmq_control_addr or 'default'}")
             print(f"0MQ info server address: {zmq_info_addr or 'default'}")
-            self._client = REManagerAPI_ZMQ(zmq_control_addr=zmq_control_addr, zmq_info_addr=zmq_info_addr)
+        self._zmq_control_addr = zmq_control_addr
+        # Address of remote 0MQ socket used to publish RE Manager console output
+        self._zmq_info_addr = zmq_info_addr
+        self._http_server_uri = http_server_uri
+        self._http_server_api_key = http_server_api_key
+        self._init_client()
+        # Clients with the same key share one status poller (see 'start_status_monitoring').
+        if http_server_uri:
+            self._server_key = ("http", http_server_uri, http_server_api_key)
+        else:
+            self._server_key = ("zmq", zmq_control_addr, zmq_info_addr)
 
         self.set_map_param_labels_to_keys()
 
-        # Address of remote 0MQ socket used to publish RE Manager console output
-        self._zmq_info_addr = zmq_info_addr
         self._stop_console_monitor = False
+        # Console output is received by a long-lived thread and kept in a bounded buffer
+        #   of (time, msg) until the application requests it.
+        self.console_output_max_messages = CONSOLE_OUTPUT_MAX_MESSAGES
+        self._console_output = collections.deque()
+        self._console_output_dropped = 0
+        self._console_output_condition = threading.Condition()
+        self._console_output_reader = None
 
         # User name and group are hard coded for now
         self._user_name = user_name
@@ -78,11 +123,19 @@ class RunEngineClient:
         self._re_manager_status_time = time.time()
         # Minimum period of status update (avoid excessive call frequency)
         self._re_manager_status_update_period = 0.2
+        # Notified each time a status is applied (see 'wait_for'). The version counts applied statuses.
+        self._status_condition = threading.Condition()
+        self._status_version = 0
+        self._status_callbacks = []
 
         self._allowed_devices = {}
         self._allowed_devices_uid = ""
         self._allowed_plans = {}
         self._allowed_plans_uid = ""
+        # Plan signatures and bound item arguments computed for the current list of allowed plans.
+        #   Keys: (plan name, allowed plans UID) and (item UID, allowed plans UID).
+        self._plan_signatures = {}
+        self._bound_item_arguments = collections.OrderedDict()
         self._plan_queue_items = []
         # Dictionary key: item uid, value: item pos in queue:
         self._plan_queue_items_pos = {}
@@ -135,6 +188,19 @@ class RunEngineClient:
             history_item_process=Event,
         )
 
+    def _init_client(self):
+        "Create the API used to communicate with RE Manager (``self._client``)."
+        self._client = self._create_client()
+
+    def _create_client(self):
+        if self._http_server_uri:
+            client = REManagerAPI_HTTP(http_server_uri=self._http_server_uri)
+            if self._http_server_api_key:
+                client.set_authorization_key(api_key=self._http_server_api_key)
+        else:
+            client = REManagerAPI_ZMQ(zmq_control_addr=self._zmq_control_addr, zmq_info_addr=self._zmq_info_addr)
+        return client
+
     @property
     def re_manager_status(self):
         return self._re_manager_status
@@ -143,6 +209,11 @@ class RunEngineClient:
     def re_manager_connected(self):
         return self._re_manager_connected
 
+    @property
+    def allowed_plans_uid(self):
+        """UID of the currently loaded list of allowed plans."""
+        return self._allowed_plans_uid
+
     def clear(self):
         # Clear the queue.
         try:
@@ -174,150 +245,376 @@ class RunEngineClient:
         #       need to manage status in the application. The following code should be rewritten
         #       to take advantage of the existing API features.
         if unbuffered or (time.time() - self._re_manager_status_time > self._re_manager_status_update_period):
-            status = self._re_manager_status.copy()
-            accessible = self._re_manager_connected
             try:
                 new_manager_status = self._client.status()
-                self._re_manager_status.clear()
-                self._re_manager_status.update(new_manager_status)
-                self._re_manager_connected = True
-
-                new_queue_uid = self._re_manager_status.get("plan_queue_uid", "")
-                if new_queue_uid != self._plan_queue_uid:
-                    self.load_plan_queue()
-                new_run_list_uid = self._re_manager_status.get("run_list_uid", "")
-                if new_run_list_uid != self._run_list_uid:
-                    self.load_run_list()
-                new_history_uid = self._re_manager_status.get("plan_history_uid", "")
-                if new_history_uid != self._plan_history_uid:
-                    self.load_plan_history()
-                new_allowed_plans_uid = self._re_manager_status.get("plans_allowed_uid", "")
-                if new_allowed_plans_uid != self._allowed_plans_uid:
-                    self.load_allowed_plans()
-                new_allowed_devices_uid = self._re_manager_status.get("devices_allowed_uid", "")
-                if new_allowed_devices_uid != self._allowed_devices_uid:
-                    self.load_allowed_devices()
-
             except (self._client.RequestTimeoutError, self._client.RequestError, self._client.ClientError):
-                self._re_manager_connected = False
-            if (status != self._re_manager_status) or (accessible != self._re_manager_connected):
-                # Status changed. Initiate the updates
-                self.events.status_changed(
-                    status=self._re_manager_status,
-                    is_connected=self._re_manager_connected,
-                )
+                new_manager_status = None
+            self._apply_re_manager_status(new_manager_status)
+
+    def _apply_re_manager_status(self, new_manager_status):
+        """
+        Update RE Manager status and reload the data that changed according to the status.
+
+        Parameters
+        ----------
+        new_manager_status: dict or None
+            New status or ``None`` if RE Manager is not accessible.
+
+        Returns
+        -------
+        bool
+            ``True`` if the status or the connection state changed.
+        """
+        status, accessible, outdated = self._set_re_manager_status(new_manager_status)
+        for name in outdated:
+            getattr(self, f"load_{name}")()
+        return self._complete_status_update(status, accessible)
+
+    def _set_re_manager_status(self, new_manager_status):
+        """
+        Set the new status. Returns the old status, the old connection state and the list of names
+        of the data that changed according to the status and need to be reloaded (e.g. ``"plan_queue"``
+        means that ``load_plan_queue`` needs to be called).
+        """
+        status = self._re_manager_status.copy()
+        accessible = self._re_manager_connected
+        outdated = []
+        if new_manager_status is None:
+            self._re_manager_connected = False
+        else:
+            self._re_manager_status.clear()
+            self._re_manager_status.update(new_manager_status)
+            self._re_manager_connected = True
+
+            for name, key, uid in (
+                ("plan_queue", "plan_queue_uid", self._plan_queue_uid),
+                ("run_list", "run_list_uid", self._run_list_uid),
+                ("plan_history", "plan_history_uid", self._plan_history_uid),
+                ("allowed_plans", "plans_allowed_uid", self._allowed_plans_uid),
+                ("allowed_devices", "devices_allowed_uid", self._allowed_devices_uid),
+            ):
+                if self._re_manager_status.get(key, "") != uid:
+                    outdated.append(name)
+
+        return status, accessible, outdated
+
+    def _complete_status_update(self, status, accessible):
+        "Emit the events once the status is set and the data is reloaded. Returns True if the status changed."
+        changed = (status != self._re_manager_status) or (accessible != self._re_manager_connected)
+        if changed:
+            # Status changed. Initiate the updates
+            self.events.status_changed(
+                status=self._re_manager_status,
+                is_connected=self._re_manager_connected,
+            )
+
+        with self._status_condition:
+            self._status_version += 1
+        self._wake_status_waiters()
+
+        return changed
+
+    def _wake_status_waiters(self):
+        "Wake up the threads and coroutines waiting for a status condition (see 'wait_for')."
+        with self._status_condition:
+            self._status_condition.notify_all()
+            callbacks = list(self._status_callbacks)
+        for callback in callbacks:
+            callback()
+
+    def start_status_monitoring(self):
+        """
+        Start keeping the status up to date in a background thread.
+
+        The status is updated as soon as RE Manager publishes it, if it does, and is polled
+        otherwise: often while RE Manager is busy, less and less often while it is idle and
+        nothing changes. All clients in the process connected to the same RE Manager share
+        one background thread and one status request per update. Changes are reported by
+        ``events.status_changed`` (emitted in the background thread) as before.
+        """
+        with _status_pollers_lock:
+            poller = _status_pollers.get(self._server_key)
+            if (poller is None) or not poller.add(self):
+                # There is no poller or it is stopping.
+                poller = _status_pollers[self._server_key] = _StatusPoller(self._server_key)
+                poller.add(self)
+
+    def stop_status_monitoring(self):
+        """
+        Stop keeping the status up to date. The function returns immediately (it does not wait for
+        the current status request to complete), the status is not updated by the background
+        thread after it returns, unless the update was already being applied to this client.
+        """
+        with _status_pollers_lock:
+            poller = _status_pollers.get(self._server_key)
+        if poller is not None:
+            poller.remove(self)
+        # The waiting threads poll the status from now on
+        self._wake_status_waiters()
+
+    def _begin_status_wait(self):
+        """
+        Make sure that the status is kept up to date and updated as often as possible.
+        Returns the status poller and ``True`` if monitoring was started by this call.
+        """
+        started = False
+        while True:
+            with _status_pollers_lock:
+                poller = _status_pollers.get(self._server_key)
+            if (poller is not None) and poller.has(self):
+                break
+            self.start_status_monitoring()
+            started = True
+        poller.begin_wait()
+        return poller, started
+
+    def _end_status_wait(self, poller, started):
+        poller.end_wait()
+        if started:
+            poller.remove(self)
+
+    def _check_status_condition(self, condition, version):
+        "Check the condition if a status was received after 'version'. Must hold 'self._status_condition'."
+        return (
+            (self._status_version > version) and self._re_manager_connected and condition(self._re_manager_status)
+        )
+
+    def wait_for(self, condition, timeout=0, *, msg="complete operation"):
+        """
+        Block until RE Manager status satisfies the condition. The condition is checked each time
+        a new status is received (only statuses received after the function is called are checked).
+        Status monitoring (see ``start_status_monitoring``) is started for the duration of the wait
+        if it is not running and the status is updated as often as possible while waiting.
+
+        Parameters
+        ----------
+        condition: callable
+            ``condition(status)`` returns ``True`` if the condition is satisfied. ``status`` is
+            the dictionary returned by RE Manager (``re_manager_status``).
+        timeout : float
+            maximum time to wait. Exception is raised if timeout expires.
+            If ``timeout=0``, the function blocks until the condition is satisfied.
+        msg: str
+            Description of the operation used in the error message.
+
+        Raises
+        ------
+        RuntimeError
+            timeout expired
+        """
+        with self._status_condition:
+            version = self._status_version
+        t_stop = time.monotonic() + timeout if timeout else None
+        poller, started = self._begin_status_wait()
+        try:
+            with self._status_condition:
+                while not self._check_status_condition(condition, version):
+                    wait_time = None if t_stop is None else t_stop - time.monotonic()
+                    if (wait_time is not None) and (wait_time <= 0):
+                        raise RuntimeError(f"Failed to {msg}: timeout occurred")
+                    if not poller.has(self):
+                        # Monitoring was stopped by another thread while waiting. Poll the status.
+                        self.load_re_manager_status(unbuffered=True)
+                        wait_time = STATUS_UPDATE_PERIOD_MIN if wait_time is None else wait_time
+                        wait_time = min(wait_time, STATUS_UPDATE_PERIOD_MIN)
+                    self._status_condition.wait(wait_time)
+        finally:
+            self._end_status_wait(poller, started)
+
+    async def wait_for_async(self, condition, timeout=0, *, msg="complete operation"):
+        """
+        Asyncio version of ``wait_for``. The coroutine is resumed from the thread that receives the status.
+        ``AsyncRunEngineClient`` replaces it with a coroutine that polls the status using the asyncio API.
+
+        Parameters
+        ----------
+        condition: callable
+            ``condition(status)`` returns ``True`` if the condition is satisfied.
+        timeout : float
+            maximum time to wait. Exception is raised if timeout expires.
+            If ``timeout=0``, the coroutine waits until the condition is satisfied.
+        msg: str
+            Description of the operation used in the error message.
+
+        Raises
+        ------
+        RuntimeError
+            timeout expired
+        """
+        loop = asyncio.get_running_loop()
+        status_received = asyncio.Event()
+
+        def on_status_applied():
+            loop.call_soon_threadsafe(status_received.set)
+
+        with self._status_condition:
+            version = self._status_version
+            self._status_callbacks.append(on_status_applied)
+        t_stop = loop.time() + timeout if timeout else None
+        poller, started = self._begin_status_wait()
+        try:
+            while True:
+                status_received.clear()
+                with self._status_condition:
+                    if self._check_status_condition(condition, version):
+                        break
+                wait_time = None if t_stop is None else t_stop - loop.time()
+                if (wait_time is not None) and (wait_time <= 0):
+                    raise RuntimeError(f"Failed to {msg}: timeout occurred")
+                if not poller.has(self):
+                    # Monitoring was stopped while waiting. Poll the status.
+                    await loop.run_in_executor(
+                        None, functools.partial(self.load_re_manager_status, unbuffered=True)
+                    )
+                    wait_time = STATUS_UPDATE_PERIOD_MIN if wait_time is None else wait_time
+                    wait_time = min(wait_time, STATUS_UPDATE_PERIOD_MIN)
+                try:
+                    await asyncio.wait_for(status_received.wait(), wait_time)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._status_condition:
+                self._status_callbacks.remove(on_status_applied)
+            self._end_status_wait(poller, started)
 
     def load_allowed_devices(self):
         try:
-            result = self._client.devices_allowed(user_group=self._user_group)
-            if result["success"] is False:
-                raise RuntimeError(f"Failed to load list of allowed devices: {result['msg']}")
-            self._allowed_devices.clear()
-            self._allowed_devices.update(result["devices_allowed"])
-            self._allowed_devices_uid = result["devices_allowed_uid"]
-            self.events.allowed_devices_changed(allowed_devices=self._allowed_devices)
+            self._process_allowed_devices(self._client.devices_allowed(user_group=self._user_group))
         except Exception as ex:
             print(f"Exception: {ex}")
 
+    def _process_allowed_devices(self, result):
+        "Process the response to 'devices_allowed' request."
+        if result["success"] is False:
+            raise RuntimeError(f"Failed to load list of allowed devices: {result['msg']}")
+        self._allowed_devices.clear()
+        self._allowed_devices.update(result["devices_allowed"])
+        self._allowed_devices_uid = result["devices_allowed_uid"]
+        self.events.allowed_devices_changed(allowed_devices=self._allowed_devices)
+
     def load_allowed_plans(self):
         try:
-            result = self._client.plans_allowed(user_group=self._user_group)
-            if result["success"] is False:
-                raise RuntimeError(f"Failed to load list of allowed plans: {result['msg']}")
-            self._allowed_plans.clear()
-            self._allowed_plans.update(result["plans_allowed"])
-            self._allowed_plans_uid = result["plans_allowed_uid"]
-            self.events.allowed_plans_changed(allowed_plans=self._allowed_plans)
+            self._process_allowed_plans(self._client.plans_allowed(user_group=self._user_group))
         except Exception as ex:
             print(f"Exception: {ex}")
 
+    def _process_allowed_plans(self, result):
+        "Process the response to 'plans_allowed' request."
+        if result["success"] is False:
+            raise RuntimeError(f"Failed to load list of allowed plans: {result['msg']}")
+        self._allowed_plans.clear()
+        self._allowed_plans.update(result["plans_allowed"])
+        self._allowed_plans_uid = result["plans_allowed_uid"]
+        # Signatures and arguments bound for the old list of plans are never used again
+        self._plan_signatures = {}
+        self._bound_item_arguments = collections.OrderedDict()
+        self.events.allowed_plans_changed(allowed_plans=self._allowed_plans)
+
     def load_plan_queue(self):
         try:
-            result = self._client.queue_get()
-            if result["success"] is False:
-                raise RuntimeError(f"Failed to load queue: {result['msg']}")
-            self._plan_queue_items.clear()
-            self._plan_queue_items.extend(result["items"])
-            self._running_item.clear()
-            self._running_item.update(result["running_item"])
-            self._plan_queue_uid = result["plan_queue_uid"]
-
-            # The dictionary that relates item uids and their positions in the queue.
-            #   Used to speed up computations during queue operations.
-            self._plan_queue_items_pos = {
-                item["item_uid"]: n for n, item in enumerate(self._plan_queue_items) if "item_uid" in item
-            }
-
-            # Deselect queue items that are not in the queue or are not part of the contiguous
-            #   selection. The selection will be cleared when the table is reloaded, so save
-            #   it in local variable.
-            selected_uids = self.selected_queue_item_uids
-            pos, uids = -1, []
-            for uid in selected_uids:
-                p = self.queue_item_uid_to_pos(uid)
-                if p >= 0:
-                    if (pos < 0) or ((p >= 0) and (p == pos + 1)):
-                        pos = p
-                        uids.append(uid)
-                    else:
-                        break
-            self.selected_queue_item_uids = uids
-
-            # Update the representation of the queue
-            self.events.plan_queue_changed(
-                plan_queue_items=self._plan_queue_items,
-                selected_item_uids=self.selected_queue_item_uids.copy(),
-            )
-            self.events.running_item_changed(
-                running_item=self._running_item,
-                run_list=self._run_list,
-            )
-
+            self._process_plan_queue(self._client.queue_get())
         except Exception as ex:
             print(f"Exception: {ex}")
 
+    def _process_plan_queue(self, result):
+        "Process the response to 'queue_get' request."
+        if result["success"] is False:
+            raise RuntimeError(f"Failed to load queue: {result['msg']}")
+        changes = _diff_queue_items(self._plan_queue_items, result["items"])
+        changes_from_uid = self._plan_queue_uid
+        self._plan_queue_items.clear()
+        self._plan_queue_items.extend(result["items"])
+        self._running_item.clear()
+        self._running_item.update(result["running_item"])
+        self._plan_queue_uid = result["plan_queue_uid"]
+
+        # The dictionary that relates item uids and their positions in the queue.
+        #   Used to speed up computations during queue operations.
+        self._plan_queue_items_pos = {
+            item["item_uid"]: n for n, item in enumerate(self._plan_queue_items) if "item_uid" in item
+        }
+
+        # Deselect queue items that are not in the queue or are not part of the contiguous
+        #   selection. The selection will be cleared when the table is reloaded, so save
+        #   it in local variable.
+        selected_uids = self.selected_queue_item_uids
+        pos, uids = -1, []
+        for uid in selected_uids:
+            p = self.queue_item_uid_to_pos(uid)
+            if p >= 0:
+                if (pos < 0) or ((p >= 0) and (p == pos + 1)):
+                    pos = p
+                    uids.append(uid)
+                else:
+                    break
+        self.selected_queue_item_uids = uids
+
+        # Update the representation of the queue. 'changes' is the sequence of row operations
+        #   that turns the queue with UID 'changes_from_uid' into the new queue, or None.
+        self.events.plan_queue_changed(
+            plan_queue_items=self._plan_queue_items,
+            selected_item_uids=self.selected_queue_item_uids.copy(),
+            plan_queue_uid=self._plan_queue_uid,
+            changes=changes,
+            changes_from_uid=changes_from_uid,
+        )
+        self.events.running_item_changed(
+            running_item=self._running_item,
+            run_list=self._run_list,
+        )
+
     def load_run_list(self):
         try:
-            result = self._client.re_runs()
-            if result["success"] is False:
-                raise RuntimeError(f"Failed to load run_list: {result['msg']}")
-            self._run_list.clear()
-            self._run_list.extend(result["run_list"])
-            self._run_list_uid = result["run_list_uid"]
-
-            self.events.running_item_changed(
-                running_item=self._running_item,
-                run_list=self._run_list,
-            )
-
+            self._process_run_list(self._client.re_runs())
         except Exception as ex:
             print(f"Exception: {ex}")
 
+    def _process_run_list(self, result):
+        "Process the response to 're_runs' request."
+        if result["success"] is False:
+            raise RuntimeError(f"Failed to load run_list: {result['msg']}")
+        self._run_list.clear()
+        self._run_list.extend(result["run_list"])
+        self._run_list_uid = result["run_list_uid"]
+
+        self.events.running_item_changed(
+            running_item=self._running_item,
+            run_list=self._run_list,
+        )
+
     def load_plan_history(self):
         try:
-            result = self._client.history_get()
-            if result["success"] is False:
-                raise RuntimeError(f"Failed to load history: {result['msg']}")
-            self._plan_history_items.clear()
-            self._plan_history_items.extend(result["items"])
-            self._plan_history_uid = result["plan_history_uid"]
-
-            # Deselect queue history if it does not exist in the queue
-            #   Selection will be cleared when the table is reloaded, so save it in local variable
-            selected_item_pos = self.selected_history_item_pos
-            if selected_item_pos and (selected_item_pos[-1] >= len(self._plan_history_items)):
-                selected_item_pos = []
-                self.selected_history_item_pos = selected_item_pos
-
-            self.events.plan_history_changed(
-                plan_history_items=self._plan_history_items.copy(),
-                selected_item_pos=self.selected_history_item_pos,
-            )
-
+            self._process_plan_history(self._client.history_get())
         except Exception as ex:
             print(f"Exception: {ex}")
 
-    def save_plan_history_to_file(self, *, file_path, file_format):
+    def _process_plan_history(self, result):
+        "Process the response to 'history_get' request."
+        if result["success"] is False:
+            raise RuntimeError(f"Failed to load history: {result['msg']}")
+        changes = _diff_history_items(self._plan_history_items, result["items"])
+        changes_from_uid = self._plan_history_uid
+        self._plan_history_items.clear()
+        self._plan_history_items.extend(result["items"])
+        self._plan_history_uid = result["plan_history_uid"]
+
+        # Deselect queue history if it does not exist in the queue
+        #   Selection will be cleared when the table is reloaded, so save it in local variable
+        selected_item_pos = self.selected_history_item_pos
+        if selected_item_pos and (selected_item_pos[-1] >= len(self._plan_history_items)):
+            selected_item_pos = []
+            self.selected_history_item_pos = selected_item_pos
+
+        # 'changes' has the same meaning as for 'plan_queue_changed'.
+        self.events.plan_history_changed(
+            plan_history_items=self._plan_history_items.copy(),
+            selected_item_pos=self.selected_history_item_pos,
+            plan_history_uid=self._plan_history_uid,
+            changes=changes,
+            changes_from_uid=changes_from_uid,
+        )
+
+    def save_plan_history_to_file(self, *, file_path, file_format, progress=None, n_workers=None):
         """
         Save plan history to the file on locally mounted disk. The function
         does not download the plan history from the server and can be called
@@ -328,36 +625,59 @@ class RunEngineClient:
         file_path : str
             Full path to the file
         file_format : str
-            File format: "txt", "json" or "yaml"
+            File format: "txt", "json", "jsonl" (JSON Lines), "yaml" or "msgpack"
+            (requires ``msgpack`` package)
+        progress : callable or None
+            Function ``progress(n_saved, n_total)``, which is called each time a chunk
+            of items is written to the file.
+        n_workers : int or None
+            Number of processes used to format the items. Used only for "txt" format,
+            the items are formatted in the current process if ``None`` or ``1``.
+        """
+        for n_saved, n_total in self.iter_save_plan_history_to_file(
+            file_path=file_path, file_format=file_format, n_workers=n_workers
+        ):
+            if progress is not None:
+                progress(n_saved, n_total)
+
+    def iter_save_plan_history_to_file(self, *, file_path, file_format, n_workers=None):
+        """
+        Generator version of ``save_plan_history_to_file``: the items are written
+        to the file one by one and ``(n_saved, n_total)`` is yielded after each chunk
+        of ``HISTORY_SAVE_CHUNK_SIZE`` items. The last ``(n_total, n_total)`` is yielded
+        after the file is closed. The generator may be run
+        in a background thread (e.g. using ``GeneratorWorker``) to report progress.
+        The items are not copied, only the list of references to the items.
+
+        Parameters
+        ----------
+        file_path : str
+            Full path to the file
+        file_format : str
+            File format: "txt", "json", "jsonl", "yaml" or "msgpack"
+        n_workers : int or None
+            Number of processes used to format the items ("txt" format only).
         """
         file_format = file_format.lower()
-        history = copy.copy(self._plan_history_items)
-
-        if file_format == "txt":
-            with open(file_path, "wt") as f:
-                for n, plan in enumerate(history):
-                    t_start = plan.get("result", {}).get("time_start", None)
-                    t_stop = plan.get("result", {}).get("time_stop", None)
-
-                    s = f"PLAN {n + 1}"
-                    if t_start:
-                        s += f": {datetime.datetime.fromtimestamp(t_start)}"
-                        if t_stop:
-                            s += f" - {datetime.datetime.fromtimestamp(t_stop)}"
-
-                    f.write("=" * 80)
-                    f.write(f"\n{s: ^80}\n")
-                    f.write("=" * 80)
-                    f.write(f"\n{pprint.pformat(plan, width=80)}\n")
-        elif file_format == "json":
-            with open(file_path, "wt") as f:
-                json.dump(history, f, indent=2)
-        elif file_format == "yaml":
-            with open(file_path, "w") as f:
-                yaml.dump(history, f)
-        else:
+        if file_format not in HISTORY_FILE_FORMATS:
             raise ValueError(f"Unsupported output format: {file_format!r}")
 
+        # The list of items may be replaced while the file is saved, but the items are not modified.
+        history = list(self._plan_history_items)
+        n_total = len(history)
+
+        chunks = _history_file_chunks(history, file_format, n_workers=n_workers)
+        mode = "wb" if file_format == "msgpack" else "wt"
+        with open(file_path, mode) as f:
+            n_saved = 0
+            for n_items, data in chunks:
+                f.write(data)
+                if n_items != n_saved and n_items != n_total and n_items % HISTORY_SAVE_CHUNK_SIZE == 0:
+                    n_saved = n_items
+                    yield n_saved, n_total
+        # The saving is reported complete once the file is closed
+        yield n_total, n_total
+
     # ============================================================================
     #                       Useful functions
     def get_allowed_plan_parameters(self, *, name):
@@ -436,33 +756,91 @@ class RunEngineClient:
         map_dict = map_dict if (map_dict is not None) else _default_map
         self._map_column_labels_to_keys = map_dict
 
+    def _get_plan_signature(self, name):
+        """
+        Returns the signature of the allowed plan. The signature is constructed once for each
+        loaded list of allowed plans.
+
+        Raises
+        ------
+        RuntimeError
+            the plan is not in the list of allowed plans or the signature could not be constructed
+        """
+        # Read the UID first: the UID is updated after the list of plans
+        key = (name, self._allowed_plans_uid)
+        try:
+            signature = self._plan_signatures[key]
+        except KeyError:
+            plan_parameters = self._allowed_plans.get(name, None)
+            try:
+                if plan_parameters is None:
+                    raise RuntimeError(f"Plan '{name}' is not in the list of allowed plans")
+                parameters = construct_parameters(copy.deepcopy(plan_parameters["parameters"]))
+                signature = inspect.Signature(parameters)
+            except Exception:
+                signature = None
+            self._plan_signatures[key] = signature
+
+        if signature is None:
+            raise RuntimeError(f"Failed to construct the signature of the plan '{name}'")
+        return signature
+
     def get_bound_item_arguments(self, item):
+        """
+        Bind ``args`` and ``kwargs`` of the plan to the parameters of the plan from the list of
+        allowed plans. The results are cached for each item UID and list of allowed plans
+        (for at most ``BOUND_ARGUMENTS_CACHE_SIZE`` most recently used items).
+
+        Parameters
+        ----------
+        item : dict
+            Dictionary containing item parameters
+
+        Returns
+        -------
+        list, dict
+            Empty list and the dictionary of bound arguments if the arguments were bound successfully,
+            otherwise ``args`` and ``kwargs`` of the item.
+        """
         item_args = item.get("args", [])
         item_kwargs = item.get("kwargs", {})
         item_type = item.get("item_type", None)
         item_name = item.get("name", None)
 
-        try:
-            if item_type == "plan":
-                plan_parameters = self._allowed_plans.get(item_name, None)
-                if plan_parameters is None:
-                    raise RuntimeError(f"Plan '{item_name}' is not in the list of allowed plans")
-                bound_arguments = bind_plan_arguments(
-                    plan_args=item_args,
-                    plan_kwargs=item_kwargs,
-                    plan_parameters=plan_parameters,
-                )
+        if item_type != "plan":
+            return item_args, item_kwargs
+
+        item_uid = item.get("item_uid", None)
+        key = (item_uid, self._allowed_plans_uid)
+        cached = self._bound_item_arguments.get(key, None) if item_uid else None
+        # Items with the same UID are expected to be identical, but check in case an item was modified
+        if cached and (cached[0] == (item_name, item_args, item_kwargs)):
+            self._bound_item_arguments.move_to_end(key)
+            item_args, item_kwargs = cached[1]
+        else:
+            bound = (item_args, item_kwargs)
+            try:
+                bound_arguments = self._get_plan_signature(item_name).bind(*item_args, **item_kwargs)
                 # If the arguments were bound successfully, then replace 'args' and 'kwargs'.
-                item_args = []
-                item_kwargs = bound_arguments.arguments
-        except Exception:
-            # print(
-            #     f"Failed to bind arguments (item_type='{item_type}', "
-            #     f"item_name='{item_name}'). Exception: {ex}"
-            # )
-            pass
+                bound = ([], bound_arguments.arguments)
+            except Exception:
+                # print(
+                #     f"Failed to bind arguments (item_type='{item_type}', "
+                #     f"item_name='{item_name}'). Exception: {ex}"
+                # )
+                pass
+            if item_uid:
+                self._bound_item_arguments[key] = (
+                    (item_name, copy.deepcopy(item_args), copy.deepcopy(item_kwargs)),
+                    bound,
+                )
+                self._bound_item_arguments.move_to_end(key)
+                while len(self._bound_item_arguments) > BOUND_ARGUMENTS_CACHE_SIZE:
+                    self._bound_item_arguments.popitem(last=False)
+            item_args, item_kwargs = bound
 
-        return item_args, item_kwargs
+        # The cached values must not be modified by the caller
+        return list(item_args), dict(item_kwargs)
 
     def get_item_value_for_label(self, *, item, label, as_str=True):
         """
@@ -1081,15 +1459,11 @@ class RunEngineClient:
 
         # Wait for the environment to be created.
         if timeout:
-            t_stop = time.time() + timeout
-            while True:
-                self.load_re_manager_status()
-                status2 = self._re_manager_status
-                if status2["worker_environment_exists"] and status2["manager_state"] == "idle":
-                    break
-                if timeout and (time.time() > t_stop):
-                    raise RuntimeError("Failed to start RE Worker: timeout occurred")
-                time.sleep(0.5)
+
+            def condition(status):
+                return status["worker_environment_exists"] and status["manager_state"] == "idle"
+
+            self.wait_for(condition, timeout, msg="start RE Worker")
 
         self.activate_env_destroy(False)
 
@@ -1122,17 +1496,11 @@ class RunEngineClient:
         except Exception as ex:
             raise RuntimeError(f"Failed to close RE Worker environment: {ex}") from ex
 
-        # Wait for the environment to be created.
-        if timeout:
-            t_stop = time.time() + timeout
-        while True:
-            self.load_re_manager_status()
-            status2 = self._re_manager_status
-            if not status2["worker_environment_exists"] and status2["manager_state"] == "idle":
-                break
-            if timeout and (time.time() > t_stop):
-                raise RuntimeError("Failed to start RE Worker: timeout occurred")
-            time.sleep(0.5)
+        # Wait for the environment to be closed.
+        def condition(status):
+            return not status["worker_environment_exists"] and status["manager_state"] == "idle"
+
+        self.wait_for(condition, timeout, msg="close RE Worker")
 
         self.activate_env_destroy(False)
 
@@ -1189,17 +1557,11 @@ class RunEngineClient:
         except Exception as ex:
             raise RuntimeError(f"Failed to destroy RE Worker environment: {ex}") from ex
 
-        # Wait for the environment to be created.
-        if timeout:
-            t_stop = time.time() + timeout
-        while True:
-            self.load_re_manager_status()
-            status2 = self._re_manager_status
-            if not status2["worker_environment_exists"] and status2["manager_state"] == "idle":
-                break
-            if timeout and (time.time() > t_stop):
-                raise RuntimeError("Failed to start RE Worker: timeout occurred")
-            time.sleep(0.5)
+        # Wait for the environment to be destroyed.
+        def condition(status):
+            return not status["worker_environment_exists"] and status["manager_state"] == "idle"
+
+        self.wait_for(condition, timeout, msg="destroy RE Worker")
 
         self.activate_env_destroy(False)
 
@@ -1240,17 +1602,7 @@ class RunEngineClient:
     #                        RE Control
 
     def _wait_for_completion(self, *, condition, msg="complete operation", timeout=0):
-        if timeout:
-            t_stop = time.time() + timeout
-
-        while True:
-            self.load_re_manager_status()
-            status = self._re_manager_status
-            if condition(status):
-                break
-            if timeout and (time.time() > t_stop):
-                raise RuntimeError(f"Failed to {msg}: timeout occurred")
-            time.sleep(0.5)
+        self.wait_for(condition, timeout, msg=msg)
 
     def re_pause(self, timeout=0, *, option):
         """
@@ -1343,26 +1695,721 @@ class RunEngineClient:
     #                        RE Manager console output
 
     def start_console_output_monitoring(self):
+        """
+        Start receiving console output in a background thread. Use ``console_output_pop``
+        to get the received messages.
+        """
+        reader = self._console_output_reader
+        if (reader is not None) and reader.is_alive():
+            if not self._stop_console_monitor:
+                return
+            # Monitoring is being stopped, wait until the thread exits
+            reader.join()
         self._stop_console_monitor = False
         self._client.console_monitor.enable()
-        # self._rco = ReceiveConsoleOutput(zmq_subscribe_addr=self._zmq_info_addr, timeout=200)
+        self._console_output_reader = threading.Thread(target=self._receive_console_output, daemon=True)
+        self._console_output_reader.start()
 
     def stop_console_output_monitoring(self):
-        self._stop_console_monitor = True
+        with self._console_output_condition:
+            self._stop_console_monitor = True
+            self._console_output_condition.notify_all()
+
+    def _receive_console_output(self):
+        "This runs in a thread."
+        monitor = self._client.console_monitor
+        try:
+            while not self._stop_console_monitor:
+                try:
+                    payload = monitor.next_msg(timeout=CONSOLE_OUTPUT_POLL_TIMEOUT)
+                except self._client.RequestTimeoutError:
+                    continue
+                except Exception as ex:
+                    print(f"Exception occurred: {ex}")
+                    # Do not retry immediately: the error is likely to repeat (e.g. no connection)
+                    with self._console_output_condition:
+                        if not self._stop_console_monitor:
+                            self._console_output_condition.wait(CONSOLE_OUTPUT_POLL_TIMEOUT)
+                    continue
+
+                # Drain all pending messages without waiting
+                batch = [payload]
+                while len(batch) < self.console_output_max_messages:
+                    try:
+                        batch.append(monitor.next_msg())
+                    except self._client.RequestTimeoutError:
+                        break
+                self._put_console_output([(_.get("time", None), _.get("msg", None)) for _ in batch])
+        finally:
+            try:
+                monitor.disable_wait()
+            except Exception as ex:
+                print(f"Exception occurred: {ex}")
+
+    def _put_console_output(self, messages):
+        "Add messages to the buffer, dropping the oldest messages if the buffer is full."
+        with self._console_output_condition:
+            self._console_output.extend(messages)
+            n_drop = len(self._console_output) - self.console_output_max_messages
+            for _ in range(max(n_drop, 0)):
+                self._console_output.popleft()
+                self._console_output_dropped += 1
+            self._console_output_condition.notify_all()
+
+    def console_output_pop(self):
+        """
+        Returns all console output messages received since the previous call.
+
+        Returns
+        -------
+        messages: list(tuple)
+            List of ``(time, msg)`` tuples in the order the messages were received.
+        n_dropped: int
+            The number of messages that were dropped because the buffer was full.
+        """
+        with self._console_output_condition:
+            messages = list(self._console_output)
+            self._console_output.clear()
+            n_dropped, self._console_output_dropped = self._console_output_dropped, 0
+        return messages, n_dropped
 
     # def console_monitoring_thread(self, *, callback):
     def console_monitoring_thread(self):
-        while True:
-            try:
-                payload = self._client.console_monitor.next_msg(timeout=0.2)
-                time, msg = payload.get("time", None), payload.get("msg", None)
-                return time, msg
+        """
+        Wait for console output and return the oldest message as ``(time, msg)``. Returns ``None``
+        if monitoring was stopped. Kept for compatibility, ``console_output_pop`` returns all the
+        received messages at once.
+        """
+        with self._console_output_condition:
+            while not self._console_output:
+                if self._stop_console_monitor:
+                    return None
+                self._console_output_condition.wait(CONSOLE_OUTPUT_POLL_TIMEOUT)
+            return self._console_output.popleft()
 
-            except self._client.RequestTimeoutError:
-                pass
+
+class AsyncRunEngineClient(RunEngineClient):
+    """
+    Run Engine client for asyncio applications. It has the same events and state as
+    ``RunEngineClient``. The data is loaded and the status is monitored by coroutines, which use
+    the asyncio API of Queue Server, so one event loop can monitor many RE Managers concurrently.
+    The events are emitted in the event loop.
+
+    Coroutines are named after the respective ``RunEngineClient`` methods with the ``_async``
+    suffix. The inherited methods are still available and block (e.g. queue operations).
+    The blocking API of Queue Server used by the inherited methods is created when it is
+    first needed, so the client opens no blocking connections if only the coroutines are used.
+
+    The parameters are the same as for ``RunEngineClient``.
+    """
+
+    def _init_client(self):
+        # The blocking API is created on the first access (see '_client')
+        self._sync_client = None
+        # The asyncio API must be created in the event loop (see 'async_client')
+        self._async_client = None
+
+    @property
+    def _client(self):
+        if self._sync_client is None:
+            self._sync_client = self._create_client()
+        return self._sync_client
+
+    @_client.setter
+    def _client(self, client):
+        self._sync_client = client
+
+    @property
+    def async_client(self):
+        """
+        Asyncio API of Queue Server. Created on the first access, which must be made in the event loop.
+        """
+        if self._async_client is None:
+            if self._http_server_uri:
+                self._async_client = REManagerAPI_HTTP_AIO(http_server_uri=self._http_server_uri)
+                if self._http_server_api_key:
+                    self._async_client.set_authorization_key(api_key=self._http_server_api_key)
+            else:
+                self._async_client = REManagerAPI_ZMQ_AIO(
+                    zmq_control_addr=self._zmq_control_addr, zmq_info_addr=self._zmq_info_addr
+                )
+        return self._async_client
+
+    async def close_async(self):
+        """Close the asyncio API. The client must not be used after it is closed."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    async def _load_status_async(self):
+        "Request the status. Returns None if RE Manager is not accessible."
+        client = self.async_client
+        try:
+            return await client.status(reload=True)
+        except (client.RequestTimeoutError, client.RequestError, client.ClientError):
+            return None
+
+    async def manager_connecting_ops_async(self):
+        """
+        Load the status and all the data while connecting to RE Manager. The requests are sent concurrently.
+        """
+        client = self.async_client
+        status, *results = await asyncio.gather(
+            self._load_status_async(),
+            client.devices_allowed(user_group=self._user_group),
+            client.plans_allowed(user_group=self._user_group),
+            client.queue_get(),
+            client.history_get(),
+            return_exceptions=True,
+        )
+        processors = (
+            self._process_allowed_devices,
+            self._process_allowed_plans,
+            self._process_plan_queue,
+            self._process_plan_history,
+        )
+        for process, result in zip(processors, results):
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                process(result)
             except Exception as ex:
-                print(f"Exception occurred: {ex}")
+                print(f"Exception: {ex}")
+        # The data that is not loaded yet (e.g. the list of runs) is loaded as the status is applied
+        await self._apply_re_manager_status_async(None if isinstance(status, Exception) else status)
+
+    async def load_re_manager_status_async(self):
+        await self._apply_re_manager_status_async(await self._load_status_async())
+
+    async def _apply_re_manager_status_async(self, new_manager_status):
+        "Version of '_apply_re_manager_status' that reloads the changed data concurrently."
+        status, accessible, outdated = self._set_re_manager_status(new_manager_status)
+        await asyncio.gather(*[getattr(self, f"load_{name}_async")() for name in outdated])
+        return self._complete_status_update(status, accessible)
+
+    async def _load_async(self, request, process):
+        try:
+            process(await request)
+        except Exception as ex:
+            print(f"Exception: {ex}")
+
+    async def load_allowed_devices_async(self):
+        request = self.async_client.devices_allowed(user_group=self._user_group)
+        await self._load_async(request, self._process_allowed_devices)
+
+    async def load_allowed_plans_async(self):
+        request = self.async_client.plans_allowed(user_group=self._user_group)
+        await self._load_async(request, self._process_allowed_plans)
+
+    async def load_plan_queue_async(self):
+        await self._load_async(self.async_client.queue_get(), self._process_plan_queue)
+
+    async def load_run_list_async(self):
+        await self._load_async(self.async_client.re_runs(), self._process_run_list)
+
+    async def load_plan_history_async(self):
+        await self._load_async(self.async_client.history_get(), self._process_plan_history)
+
+    async def status_monitoring_async(self):
+        """
+        Keep the status up to date until the task running the coroutine is cancelled. The status is
+        polled often while RE Manager is busy or something has just changed, and less and less often
+        while nothing changes (see ``start_status_monitoring``).
+        """
+        period = STATUS_UPDATE_PERIOD_MIN
+        while True:
+            status = await self._load_status_async()
+            changed = await self._apply_re_manager_status_async(status)
+            busy = (status is not None) and (status.get("manager_state", "idle") != "idle")
+            if changed or busy:
+                period = STATUS_UPDATE_PERIOD_MIN
+            else:
+                period = min(2 * period, STATUS_UPDATE_PERIOD_MAX)
+            await asyncio.sleep(period)
+
+    async def wait_for_async(self, condition, timeout=0, *, msg="complete operation"):
+        """
+        Wait until RE Manager status satisfies the condition (see ``RunEngineClient.wait_for``).
+        Replaces ``RunEngineClient.wait_for_async``: the status monitoring thread is not used,
+        instead the status is requested every ``STATUS_WAIT_PERIOD`` while waiting.
+        """
+        loop = asyncio.get_running_loop()
+        t_stop = loop.time() + timeout if timeout else None
+        with self._status_condition:
+            version = self._status_version
+        while True:
+            await self._apply_re_manager_status_async(await self._load_status_async())
+            with self._status_condition:
+                if self._check_status_condition(condition, version):
+                    return
+            wait_time = STATUS_WAIT_PERIOD
+            if t_stop is not None:
+                if loop.time() >= t_stop:
+                    raise RuntimeError(f"Failed to {msg}: timeout occurred")
+                wait_time = min(wait_time, t_stop - loop.time())
+            await asyncio.sleep(max(wait_time, 0))
+
+
+class ConsoleOutputBuffer:
+    """
+    Bounded buffer of lines of console output. The buffer interprets the control sequences
+    used to display progress bars (carriage return and cursor up) and keeps track of
+    the lines that were removed, modified or added since the last call to ``pop_changes``,
+    so that the display could be updated incrementally.
+
+    Parameters
+    ----------
+    max_lines: int
+        Default maximum number of lines kept by ``trim``.
+    """
+
+    _pattern_new_line = "\n"
+    _pattern_cr = "\r"
+    _pattern_up_one_line = "\x1b\x5b\x41"  # ESC [#A
+    _re_control = re.compile("(\n|\r|\x1b\\[A)")
+
+    def __init__(self, max_lines=1000):
+        self.max_lines = max_lines
+        self._lines = collections.deque([""])
+        self._line = 0  # Number of current line
+        self._ind = 0  # Index in the current line
+        self._n_removed = 0  # The number of lines removed from the beginning since 'pop_changes'
+        self._dirty_from = 0  # The index of the first line modified or added since 'pop_changes'
+
+    def __len__(self):
+        return len(self._lines)
+
+    @property
+    def lines(self):
+        """List of lines. Lines may be added, removed and modified by calling ``write``."""
+        return list(self._lines)
+
+    def write(self, msg):
+        """
+        Add console output to the buffer.
+
+        Parameters
+        ----------
+        msg: str
+            Text that may contain new lines (``\\n``), carriage returns (``\\r``) and cursor up
+            control sequences (``ESC [A``).
+        """
+        if not msg:
+            return
+
+        if (self._pattern_new_line not in msg) and ("\x1b" not in msg):
+            # Fast path: text, possibly with carriage returns (progress bar) written to the current line.
+            segments = msg.split(self._pattern_cr)
+            self._write_text(segments[0])
+            for segment in segments[1:]:
+                self._ind = 0
+                self._write_text(segment)
+            return
+
+        for token in self._re_control.split(msg):
+            if token == self._pattern_new_line:
+                self._line += 1
+                if self._line >= len(self._lines):
+                    self._lines.append("")
+                    self._mark_dirty(self._line)
+                self._ind = 0
+            elif token == self._pattern_cr:
+                self._ind = 0
+            elif token == self._pattern_up_one_line:
+                if self._line:
+                    self._line -= 1
+            elif token:
+                self._write_text(token)
+
+    def _write_text(self, substr):
+        "Write the text to the current line at the current position."
+        if not substr:
+            return
+        line = self._lines[self._line]
+        # Extend the current line with spaces if needed
+        if len(line) < self._ind:
+            line += " " * (self._ind - len(line))
+        new_line = line[: self._ind] + substr + line[self._ind + len(substr) :]
+        self._ind += len(substr)
+        if new_line != self._lines[self._line]:
+            self._lines[self._line] = new_line
+            self._mark_dirty(self._line)
+
+    def _mark_dirty(self, n_line):
+        self._dirty_from = min(self._dirty_from, n_line)
+
+    def trim(self, max_lines=None):
+        """
+        Remove lines from the beginning of the buffer so that it contains at most ``max_lines``
+        lines. ``self.max_lines`` is used if ``max_lines`` is ``None``.
+        """
+        max_lines = self.max_lines if max_lines is None else max_lines
+        n_remove = max(len(self._lines) - max(max_lines, 1), 0)
+        for _ in range(n_remove):
+            self._lines.popleft()
+        self._line = max(self._line - n_remove, 0)
+        self._n_removed += n_remove
+        self._dirty_from = max(self._dirty_from - n_remove, 0)
+
+    def clear(self):
+        """Remove all lines."""
+        self._n_removed += len(self._lines)
+        self._lines = collections.deque([""])
+        self._line = 0
+        self._ind = 0
+        self._dirty_from = 0
+
+    def pop_changes(self):
+        """
+        Returns the changes made since the previous call and resets them.
+
+        Returns
+        -------
+        n_removed: int
+            The number of lines removed from the beginning of the buffer.
+        dirty_from: int
+            The index (after the removal) of the first line that was modified or added.
+            Lines with lower indices were not changed. Equals the number of lines
+            if no lines were changed.
+        """
+        changes = (self._n_removed, self._dirty_from)
+        self._n_removed = 0
+        self._dirty_from = len(self._lines)
+        return changes
+
+    def get_text(self, start=0):
+        """
+        Returns the text of the lines starting from ``start``. The trailing empty line is not included.
+        """
+        lines = list(itertools.islice(self._lines, start, None))
+        if lines and (lines[-1] == ""):
+            lines.pop()
+        return "\n".join(lines)
+
+    def count_displayed_lines(self):
+        """
+        Returns the number of lines in the text (the trailing empty line is not counted).
+        """
+        n = len(self._lines)
+        return n - 1 if self._lines[-1] == "" else n
+
+
+def _format_history_item_txt(n, plan):
+    "Format history item ``plan`` (``n`` is the index) for a text file."
+    t_start = plan.get("result", {}).get("time_start", None)
+    t_stop = plan.get("result", {}).get("time_stop", None)
+
+    s = f"PLAN {n + 1}"
+    if t_start:
+        s += f": {datetime.datetime.fromtimestamp(t_start)}"
+        if t_stop:
+            s += f" - {datetime.datetime.fromtimestamp(t_stop)}"
+
+    return "=" * 80 + f"\n{s: ^80}\n" + "=" * 80 + f"\n{pprint.pformat(plan, width=80)}\n"
+
+
+def _history_file_chunks(history, file_format, *, n_workers=None):
+    """
+    Serialize the list of history items. Yields ``(n_items, data)``, where ``data`` is
+    the next piece of the file contents (``bytes`` for "msgpack", ``str`` otherwise) and
+    ``n_items`` is the number of items serialized so far. The contents of the files is
+    the same as produced by ``json.dump(history, f, indent=2)`` and ``yaml.dump(history, f)``.
+    """
+    n_total = len(history)
+
+    if file_format == "txt":
+        if n_workers and n_workers > 1 and n_total > HISTORY_SAVE_CHUNK_SIZE:
+            chunksize = max(1, min(HISTORY_SAVE_CHUNK_SIZE, n_total // (4 * n_workers)))
+            with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+                formatted = executor.map(_format_history_item_txt, range(n_total), history, chunksize=chunksize)
+                for n, data in enumerate(formatted):
+                    yield n + 1, data
+        else:
+            for n, plan in enumerate(history):
+                yield n + 1, _format_history_item_txt(n, plan)
+
+    elif file_format == "json":
+        # Streamed JSON array, formatted the same way as by 'json.dump(history, f, indent=2)'
+        if not n_total:
+            yield 0, "[]"
+            return
+        yield 0, "["
+        for n, plan in enumerate(history):
+            data = json.dumps(plan, indent=2).replace("\n", "\n  ")
+            yield n + 1, (",\n  " if n else "\n  ") + data
+        yield n_total, "\n]"
+
+    elif file_format == "jsonl":
+        for n, plan in enumerate(history):
+            yield n + 1, json.dumps(plan) + "\n"
+
+    elif file_format == "yaml":
+        # A list of items is dumped as a sequence of single item lists
+        if not n_total:
+            yield 0, yaml.dump([])
+        for n, plan in enumerate(history):
+            yield n + 1, yaml.dump([plan])
+
+    elif file_format == "msgpack":
+        try:
+            import msgpack
+        except ImportError as ex:
+            raise ImportError("Package 'msgpack' is required to save plan history in 'msgpack' format") from ex
+
+        packer = msgpack.Packer()
+        yield 0, packer.pack_array_header(n_total)
+        for n, plan in enumerate(history):
+            yield n + 1, packer.pack(plan)
+
+    else:
+        raise ValueError(f"Unsupported output format: {file_format!r}")
 
-            if self._stop_console_monitor:
-                self._client.console_monitor.disable_wait()
+
+def _longest_increasing_subsequence(values):
+    """
+    Returns the indices of one of the longest strictly increasing subsequences of ``values``.
+    """
+    # tails[k]: index of the smallest value that ends an increasing subsequence of length k + 1
+    tails, tail_values, previous = [], [], [None] * len(values)
+    for n, value in enumerate(values):
+        k = bisect.bisect_left(tail_values, value)
+        previous[n] = tails[k - 1] if k else None
+        if k == len(tails):
+            tails.append(n)
+            tail_values.append(value)
+        else:
+            tails[k] = n
+            tail_values[k] = value
+    indices = []
+    n = tails[-1] if tails else None
+    while n is not None:
+        indices.append(n)
+        n = previous[n]
+    return indices[::-1]
+
+
+def _diff_queue_items(old_items, new_items):
+    """
+    Compute the changes that turn one version of the plan queue into another.
+
+    Items are matched by ``item_uid``. Removed items and items that moved relative to the
+    others are removed, new and moved items are inserted at their new positions, and items
+    that stayed in place but changed are updated.
+
+    Parameters
+    ----------
+    old_items, new_items: list(dict)
+        Queue items.
+
+    Returns
+    -------
+    list(tuple) or None
+        Operations ``("remove", row, None)``, ``("insert", row, item)`` and
+        ``("update", row, item)`` to be applied in order to a table showing ``old_items``,
+        or ``None`` if the items can not be matched by UID or the changes amount to
+        replacing the whole table.
+    """
+    old_uids = [item.get("item_uid") for item in old_items]
+    new_uids = [item.get("item_uid") for item in new_items]
+    for uids in (old_uids, new_uids):
+        if (None in uids) or (len(set(uids)) != len(uids)):
+            return None
+    old_pos = {uid: n for n, uid in enumerate(old_uids)}
+    new_pos = {uid: n for n, uid in enumerate(new_uids)}
+
+    # The items that stay in place: the longest sequence of items that are found in
+    #   both versions in the same order.
+    kept_uids = [uid for uid in old_uids if uid in new_pos]
+    stay = {kept_uids[n] for n in _longest_increasing_subsequence([new_pos[uid] for uid in kept_uids])}
+
+    changes = []
+    # Remove from the bottom up, so that the rows of the remaining items do not change.
+    for n in reversed(range(len(old_uids))):
+        if old_uids[n] not in stay:
+            changes.append(("remove", n, None))
+    # Insert from the top down: rows above 'n' are already in their final state.
+    for n, uid in enumerate(new_uids):
+        if uid not in stay:
+            changes.append(("insert", n, new_items[n]))
+        elif new_items[n] != old_items[old_pos[uid]]:
+            changes.append(("update", n, new_items[n]))
+
+    if len(changes) > len(new_items):
+        return None
+    return changes
+
+
+def _diff_history_items(old_items, new_items):
+    """
+    Compute the changes that turn one version of the plan history into another.
+
+    Items are only ever appended to the history (or the history is cleared), so the changes
+    are insertions of the appended items. Returns ``None`` if the new history does not start
+    with the old one. See ``_diff_queue_items`` for the format.
+    """
+    n_old = len(old_items)
+    if len(new_items) < n_old:
+        return None
+    # UIDs may be repeated in the history, so compare position by position.
+    for old_item, new_item in zip(old_items, new_items):
+        if old_item.get("item_uid") != new_item.get("item_uid"):
+            return None
+    return [("insert", n, new_items[n]) for n in range(n_old, len(new_items))]
+
+
+# Status pollers shared by the clients in this process, keyed by RE Manager address.
+_status_pollers = {}
+_status_pollers_lock = threading.Lock()
+
+
+class _StatusPoller:
+    """
+    Keep the status of one RE Manager up to date for all the clients connected to it.
+
+    The status is requested by one of the clients (the first one) and applied to all of them.
+    If RE Manager publishes the status (system info monitor), the published status is used and
+    requests are sent only if nothing was published for the duration of the polling period.
+    """
+
+    def __init__(self, key):
+        self._key = key
+        self._clients = []
+        # Protects the list of clients. Never held while a status is requested or applied: applying
+        #   the status reloads data from RE Manager, and 'remove' is called from the GUI thread.
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        # Set to interrupt waiting and update the status immediately
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._period = STATUS_UPDATE_PERIOD_MIN
+        # The number of clients waiting for a status condition (see 'begin_wait')
+        self._n_waiting = 0
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def has(self, client):
+        "Check if the client receives status updates from this poller."
+        with self._lock:
+            return client in self._clients
+
+    def begin_wait(self):
+        "Update the status now and then every STATUS_WAIT_PERIOD until 'end_wait' is called."
+        with self._lock:
+            self._n_waiting += 1
+        self._wakeup.set()
+
+    def end_wait(self):
+        with self._lock:
+            self._n_waiting -= 1
+
+    def add(self, client):
+        "Add a client. Return False if the poller is stopping and cannot accept it."
+        with self._lock:
+            if self._stopped.is_set():
+                return False
+            if client not in self._clients:
+                self._clients.append(client)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            return True
+
+    def remove(self, client):
+        """
+        Remove a client. Stop the poller if it was the last one. The function does not wait for
+        the thread to exit (it may be waiting for a response from RE Manager), the thread exits
+        after completing the current request and applies no more statuses.
+        """
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+            if self._clients:
+                return
+            self._stopped.set()
+            self._wakeup.set()
+        with _status_pollers_lock:
+            if _status_pollers.get(self._key) is self:
+                del _status_pollers[self._key]
+
+    def _run(self):
+        monitor = None
+        try:
+            while not self._stopped.is_set():
+                with self._lock:
+                    if not self._clients:
+                        break
+                    leader = self._clients[0]
+                new_monitor = getattr(leader._client, "system_info_monitor", None)
+                if new_monitor is not monitor:
+                    if monitor is not None:
+                        monitor.disable()
+                    monitor = new_monitor
+                if (monitor is not None) and not monitor.enabled:
+                    # The monitor may also be disabled by a stopped poller exiting after this one started.
+                    monitor.enable()
+
+                waiting = self._n_waiting > 0
+                period = STATUS_WAIT_PERIOD if waiting else self._period
+                status = self._wait_for_published_status(monitor, leader._client.RequestTimeoutError, period)
+                if self._stopped.is_set():
+                    break
+                if status is None:
+                    try:
+                        # Someone is waiting for a state change, the buffered status may be too old
+                        status = leader._client.status(reload=True) if waiting else leader._client.status()
+                    except (
+                        leader._client.RequestTimeoutError,
+                        leader._client.RequestError,
+                        leader._client.ClientError,
+                    ):
+                        status = None
+
+                with self._lock:
+                    clients = list(self._clients)
+                changed = False
+                for client in clients:
+                    # Skip the clients removed while the status was requested or applied to other clients
+                    if self._stopped.is_set() or not self.has(client):
+                        continue
+                    changed = client._apply_re_manager_status(status) or changed
+                busy = (status is not None) and (status.get("manager_state", "idle") != "idle")
+                if changed or busy:
+                    self._period = STATUS_UPDATE_PERIOD_MIN
+                else:
+                    self._period = min(2 * self._period, STATUS_UPDATE_PERIOD_MAX)
+        finally:
+            if monitor is not None:
+                monitor.disable()
+
+    def _wait_for_published_status(self, monitor, timeout_error, period):
+        "Wait for one polling period or a wakeup. Return the most recent published status or None."
+        if monitor is None:
+            self._wakeup.wait(period)
+            self._wakeup.clear()
+            return None
+        deadline = time.monotonic() + period
+        status = None
+        while not self._stopped.is_set():
+            if self._wakeup.is_set():
+                self._wakeup.clear()
+                break
+            timeout = min(STATUS_MONITOR_POLL_TIMEOUT, deadline - time.monotonic())
+            if timeout <= 0:
+                break
+            try:
+                msg = monitor.next_msg(timeout=timeout)
+            except timeout_error:
+                continue
+            status = msg.get("msg", {}).get("status", status)
+            if status is not None:
+                # Skip to the most recent status, if several were published.
+                while True:
+                    try:
+                        msg = monitor.next_msg()
+                    except timeout_error:
+                        break
+                    status = msg.get("msg", {}).get("status", status)
                 break
+        return status
@@ -1,7 +1,10 @@
 import ast
 import collections
+import collections.abc
 import contextlib
+import functools
 import inspect
+import weakref
 
 import numpy
 
@@ -12,17 +15,146 @@ from ..utils.list import EventedList
 class RunList(EventedList):
     """
     A list of BlueskyRuns.
+
+    Runs are identified by their uid. Membership checks are O(1), and so is
+    finding the index of a Run. The uid-to-index map is updated as Runs are
+    added and removed: appending and removing the first or the last Run are
+    O(1), inserting and removing elsewhere are O(n), like the list operations.
     """
 
-    __slots__ = ()
+    __slots__ = ("_uid_counts", "_uid_to_index", "_index_offset")
 
-    def __contains__(self, run):
-        uid = run.metadata["start"]["uid"]
-        for run_ in self:
-            if run_.metadata["start"]["uid"] == uid:
-                return True
+    def __init__(self, iterable=None):
+        super().__init__(iterable)
+        self._reindex()
+
+    def _reindex(self):
+        "Rebuild the uid counts from scratch and invalidate the uid-to-index map."
+        self._uid_counts = collections.Counter(_uid(run) for run in self)
+        # Map uid to the index of the first Run with the uid, plus the offset,
+        # so that all indices can be shifted at once by changing the offset.
+        self._uid_to_index = None
+        self._index_offset = 0
+
+    def _shift(self, start, delta):
+        "Shift the indices of the Runs at and after 'start'."
+        if start == 0:
+            self._index_offset -= delta
         else:
-            return False
+            start += self._index_offset
+            for uid, index in self._uid_to_index.items():
+                if index >= start:
+                    self._uid_to_index[uid] = index + delta
+
+    def _added(self, uid, index):
+        "Update the bookkeeping before the Run is inserted at 'index' (0 <= index <= len(self))."
+        self._uid_counts[uid] += 1
+        if self._uid_to_index is None:
+            return
+        if index < len(self):
+            self._shift(index, 1)
+        index += self._index_offset
+        if self._uid_to_index.get(uid, index) >= index:
+            self._uid_to_index[uid] = index
+
+    def _removed(self, uid, index):
+        "Update the bookkeeping before the Run at 'index' (0 <= index < len(self)) is removed."
+        self._uid_counts[uid] -= 1
+        if not self._uid_counts[uid]:
+            del self._uid_counts[uid]
+        if self._uid_to_index is None:
+            return
+        first = self._uid_to_index[uid] == index + self._index_offset
+        if first:
+            del self._uid_to_index[uid]
+        if index < len(self) - 1:
+            self._shift(index + 1, -1)
+        if first and (uid in self._uid_counts):
+            # Another Run has the uid: find the next one.
+            for i in range(index + 1, len(self)):
+                if _uid(self[i]) == uid:
+                    self._uid_to_index[uid] = i - 1 + self._index_offset
+                    break
+
+    def __contains__(self, run):
+        return _uid(run) in self._uid_counts
+
+    def index(self, run):
+        """
+        Return the index of the first Run with the same uid as ``run``.
+
+        Raises ValueError if there is no such Run.
+        """
+        uid = _uid(run)
+        if uid not in self._uid_counts:
+            raise ValueError(f"Run {uid!r} is not in list")
+        if self._uid_to_index is None:
+            uid_to_index = {}
+            for i, run_ in enumerate(self):
+                uid_to_index.setdefault(_uid(run_), i)
+            self._uid_to_index = uid_to_index
+            self._index_offset = 0
+        return self._uid_to_index[uid] - self._index_offset
+
+    # Update the uid bookkeeping *before* modifying the list, so that it is
+    # current when the 'added' and 'removed' events are emitted. If a
+    # callback raises, the list may or may not have been changed: insert,
+    # append and __setitem__ emit 'adding' or 'removing' before the change,
+    # but pop removes the Run first, and 'added' and 'removed' are emitted
+    # after the change. Either way, rebuild the bookkeeping from the list as
+    # it is.
+
+    def insert(self, index, run):
+        index = min(max(index + len(self) if index < 0 else index, 0), len(self))
+        self._added(_uid(run), index)
+        try:
+            super().insert(index, run)
+        except Exception:
+            self._reindex()
+            raise
+
+    def append(self, run):
+        self._added(_uid(run), len(self))
+        try:
+            super().append(run)
+        except Exception:
+            self._reindex()
+            raise
+
+    def pop(self, index=-1):
+        index = range(len(self))[index]
+        self._removed(_uid(self[index]), index)
+        try:
+            return super().pop(index)
+        except Exception:
+            self._reindex()
+            raise
+
+    def remove(self, run):
+        "Remove the first Run with the same uid as ``run``."
+        self.pop(self.index(run))
+
+    def __delitem__(self, index):
+        self.pop(index)
+
+    def __setitem__(self, index, run):
+        index = range(len(self))[index]
+        # As if the Run was removed and the new Run was inserted at the same index.
+        self._removed(_uid(self[index]), index)
+        self._added(_uid(run), index)
+        try:
+            super().__setitem__(index, run)
+        except Exception:
+            self._reindex()
+            raise
+
+    def clear(self):
+        while len(self):
+            self.pop()
+
+
+def _uid(run):
+    return run.metadata["start"]["uid"]
 
 
 def run_is_completed(run):
@@ -92,22 +224,101 @@ def construct_namespace(run, stream_names):
     -------
     namespace : Dict
     """
-    namespace = dict(_base_namespace)  # shallow copy
     with lock_if_live(run):
-        run_start_time = run.metadata["start"]["time"]
-        # Add columns from streams in stream_names. Earlier entries will get
-        # precedence.
-        for stream_name in reversed(stream_names):
-            ds = run[stream_name].to_dask()
-            namespace.update({column: ds[column] for column in ds})
-            namespace.update({column: ds[column] for column in ds.coords})
-        if "time" in namespace:
-            namespace["time"] = namespace["time"] - run_start_time
-        namespace.update({stream_name: run[stream_name].to_dask() for stream_name in stream_names})
-        for stream_name in stream_names:
-            namespace[stream_name]["time"] = namespace[stream_name]["time"] - run_start_time
-    namespace.update({"run": run})
-    return namespace
+        return dict(LazyNamespace(run, stream_names))
+
+
+class LazyNamespace(collections.abc.Mapping):
+    """
+    A read-only namespace, like :func:`construct_namespace`, that loads data on demand.
+
+    Columns and streams are only looked up when they are first accessed, and
+    each stream's dataset is obtained at most once, so an expression that
+    refers to two columns does not pay for the other two hundred. The numpy
+    names are shared, not copied.
+
+    Parameters
+    ----------
+    run : BlueskyRun
+    stream_names : List[String]
+    namespace : Dict, optional
+        User-provided names, which take precedence over all others.
+    """
+
+    def __init__(self, run, stream_names, namespace=None):
+        self._run = run
+        self._stream_names = tuple(stream_names)
+        self._namespace = namespace or {}
+        self._run_start_time = run.metadata["start"]["time"]
+        # Cache datasets (by stream name) and resolved items (by name).
+        self._datasets = {}
+        self._cache = {}
+
+    def _dataset(self, stream_name):
+        try:
+            return self._datasets[stream_name]
+        except KeyError:
+            with lock_if_live(self._run):
+                ds = self._run[stream_name].to_dask()
+            self._datasets[stream_name] = ds
+            return ds
+
+    def _stream_for_column(self, column):
+        # Streams earlier in the list get precedence.
+        for stream_name in self._stream_names:
+            ds = self._dataset(stream_name)
+            if column in ds or column in ds.coords:
+                return stream_name
+        return None
+
+    def __getitem__(self, key):
+        if key in self._namespace:
+            return self._namespace[key]
+        if key == "run":
+            return self._run
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        if key in self._stream_names:
+            # Copy so that we may adjust "time" without altering the Dataset
+            # that columns are taken from.
+            value = self._dataset(key).copy()
+            value["time"] = value["time"] - self._run_start_time
+        else:
+            stream_name = self._stream_for_column(key)
+            if stream_name is not None:
+                value = self._dataset(stream_name)[key]
+                if key == "time":
+                    value = value - self._run_start_time
+            else:
+                # This raises KeyError if key is not found anywhere.
+                return _base_namespace[key]
+        self._cache[key] = value
+        return value
+
+    def __contains__(self, key):
+        return (
+            key in self._namespace
+            or key == "run"
+            or key in self._stream_names
+            or key in _base_namespace
+            or self._stream_for_column(key) is not None
+        )
+
+    def __iter__(self):
+        keys = dict.fromkeys(self._namespace)
+        keys["run"] = None
+        keys.update(dict.fromkeys(self._stream_names))
+        for stream_name in self._stream_names:
+            ds = self._dataset(stream_name)
+            keys.update(dict.fromkeys(ds))
+            keys.update(dict.fromkeys(ds.coords))
+        keys.update(dict.fromkeys(_base_namespace))
+        yield from keys
+
+    def __len__(self):
+        return sum(1 for _ in self)
 
 
 class BadExpression(Exception):
@@ -165,9 +376,9 @@ def call_or_eval(mapping, run, stream_names, namespace=None):
     >>> call_or_eval({"f": lambda a, b: (a - b) / (a + b)}, run, ["primary"])
     """
     with lock_if_live(run):
-        namespace_ = construct_namespace(run, stream_names)
-        # Overlay user-provided namespace.
-        namespace_.update(namespace or {})
+        # Overlay user-provided namespace. Data is only loaded for the names
+        # that the items actually refer to.
+        namespace_ = LazyNamespace(run, stream_names, namespace)
         del namespace  # Avoid conflating namespace and namespace_ below.
 
         return {key: call_or_eval_one(item, namespace_) for key, item in mapping.items()}
@@ -184,7 +395,7 @@ def call_or_eval_one(item, namespace):
         expression, or a callable. The signature of the callable may include
         any valid Python identifiers provideed in the namespace.
 
-    namespace : Dict
+    namespace : Mapping
         The namespace that the item is evaluated against.
 
     Returns
@@ -204,13 +415,12 @@ def call_or_eval_one(item, namespace):
         # Inspect the callable's signature. For each parameter, find an
         # item in our namespace with a matching name. This is similar
         # to the "magic" of pytest fixtures.
-        parameters = inspect.signature(item).parameters
         kwargs = {}
-        for name, parameter in parameters.items():
+        for name, required in signature_parameters(item):
             try:
                 kwargs[name] = namespace[name]
             except KeyError:
-                if parameter.default is parameter.empty:
+                if required:
                     raise ValueError(f"Cannot find match for parameter {name}")
                 # Otherwise, it's an optional parameter, so skip it.
         return item(**kwargs)
@@ -224,18 +434,325 @@ def call_or_eval_one(item, namespace):
             pass
         # Check whether it is valid Python syntax.
         try:
-            ast.parse(item)
+            code, names = compile_expression(item)
         except SyntaxError as err:
             raise ValueError(f"Could find {item!r} in namespace or parse it as a Python expression.") from err
-        # Try to evaluate it as a Python expression in the namespace.
+        # Try to evaluate it as a Python expression in the namespace,
+        # resolving only the names that it refers to.
         try:
-            return eval(item, namespace)
+            return eval(code, {name: namespace[name] for name in names if name in namespace})
         except Exception as err:
             raise ValueError(f"Could find {item!r} in namespace or evaluate it.") from err
     else:
         raise ValueError(f"expected callable or string, received {item!r} of type {type(item).__name__}")
 
 
+@functools.lru_cache(maxsize=1024)
+def compile_expression(expression):
+    """
+    Parse and compile an expression, caching the result.
+
+    Parameters
+    ----------
+    expression : String
+
+    Returns
+    -------
+    code : CodeType
+        Suitable for passing to ``eval``
+    names : Frozenset[String]
+        The (free) names referenced by the expression
+
+    Raises
+    ------
+    SyntaxError
+        If expression is not a valid Python expression
+    """
+    tree = ast.parse(expression, mode="eval")
+    names = frozenset(node.id for node in ast.walk(tree) if isinstance(node, ast.Name))
+    return compile(tree, "<expression>", "eval"), names
+
+
+# Keyed on the callable, without keeping it alive (callables may be closures over large data).
+_signature_parameters_cache = weakref.WeakKeyDictionary()
+
+
+def _signature_parameters(func):
+    return tuple(
+        (name, parameter.default is parameter.empty)
+        for name, parameter in inspect.signature(func).parameters.items()
+    )
+
+
+def signature_parameters(func):
+    """
+    Inspect the parameters of a callable, caching the result where possible.
+
+    Parameters
+    ----------
+    func : Callable
+
+    Returns
+    -------
+    parameters : Tuple[Tuple[String, Boolean]]
+        Pairs of (name, required) for each parameter
+    """
+    try:
+        return _signature_parameters_cache[func]
+    except KeyError:
+        pass
+    except TypeError:
+        # func is unhashable or does not support weak references, so we cannot cache it.
+        return _signature_parameters(func)
+    parameters = _signature_parameters(func)
+    _signature_parameters_cache[func] = parameters
+    return parameters
+
+
+def _elementwise_columns(item, columns, namespace):
+    """
+    Return the column names referenced by an elementwise expression.
+
+    An expression is "elementwise" if evaluating it on a slice of rows gives
+    the same result as slicing the result of evaluating it on all rows. That
+    is true of arithmetic, comparisons, and numpy ufuncs applied to columns
+    and scalars. It is not true of (for example) ``det / det[0]``,
+    ``det @ det``, ``cumsum(det)``, or an opaque callable.
+
+    Parameters
+    ----------
+    item : String | Callable
+    columns : Container[String]
+        Names that will resolve to columns of the stream.
+    namespace : Dict
+        The names that will resolve to anything other than a column.
+
+    Returns
+    -------
+    referenced : Set[String] or None
+        None if the expression is not (or cannot be shown to be) elementwise.
+    """
+    if not isinstance(item, str):
+        return None
+    if item in columns:
+        # This handles names that are not valid Python identifiers.
+        return {item}
+    try:
+        tree = ast.parse(item, mode="eval")
+    except SyntaxError:
+        return None
+    referenced = set()
+
+    def resolve(node):
+        # Resolve a Name or np.<name> / numpy.<name> to the object it refers to.
+        if isinstance(node, ast.Name) and node.id not in columns:
+            return namespace.get(node.id, _UNRESOLVED)
+        if (
+            isinstance(node, ast.Attribute)
+            and isinstance(node.value, ast.Name)
+            and node.value.id in ("np", "numpy")
+            and namespace.get(node.value.id) is numpy
+        ):
+            return getattr(numpy, node.attr, _UNRESOLVED)
+        return _UNRESOLVED
+
+    def check(node):
+        if isinstance(node, ast.BinOp):
+            # Matrix multiplication of columns reduces them.
+            return not isinstance(node.op, ast.MatMult) and check(node.left) and check(node.right)
+        if isinstance(node, ast.UnaryOp):
+            return check(node.operand)
+        if isinstance(node, ast.Compare):
+            return len(node.ops) == 1 and check(node.left) and check(node.comparators[0])
+        if isinstance(node, ast.Constant):
+            return isinstance(node.value, (int, float, complex))
+        if isinstance(node, ast.Name) and node.id in columns:
+            referenced.add(node.id)
+            return True
+        if isinstance(node, (ast.Name, ast.Attribute)):
+            return isinstance(resolve(node), (int, float, complex, numpy.number))
+        if isinstance(node, ast.Call):
+            return (
+                isinstance(resolve(node.func), numpy.ufunc)
+                and not node.keywords
+                and all(check(arg) for arg in node.args)
+            )
+        return False
+
+    if check(tree.body) and referenced:
+        return referenced
+    return None
+
+
+_UNRESOLVED = object()
+
+
+class _AppendBuffer:
+    """
+    A growable array, amortizing the cost of appending by doubling capacity.
+
+    The arrays returned by :meth:`view` are never written to again, so they
+    remain valid after further appends.
+    """
+
+    def __init__(self, initial):
+        initial = numpy.asarray(initial)
+        self._length = len(initial)
+        self._array = numpy.empty((max(self._length, 16),) + initial.shape[1:], dtype=initial.dtype)
+        self._array[: self._length] = initial
+
+    def __len__(self):
+        return self._length
+
+    def extend(self, values):
+        values = numpy.asarray(values)
+        new_length = self._length + len(values)
+        dtype = numpy.result_type(self._array, values)
+        if new_length > len(self._array) or dtype != self._array.dtype:
+            array = numpy.empty((max(new_length, 2 * len(self._array)),) + self._array.shape[1:], dtype=dtype)
+            array[: self._length] = self._array[: self._length]
+            self._array = array
+        self._array[self._length : new_length] = values
+        self._length = new_length
+
+    def view(self):
+        return self._array[: self._length]
+
+
+class IncrementalEvaluator:
+    """
+    Evaluate elementwise expressions on only the newly-arrived rows of a stream.
+
+    Results are accumulated in growable buffers, so the cost of each update is
+    proportional to the number of new rows, not the total number of rows.
+
+    Use :meth:`from_mapping` to construct this. It returns None if any of the
+    items cannot be evaluated incrementally, in which case the caller should
+    fall back to :func:`call_or_eval`.
+
+    Attributes
+    ----------
+    active : Boolean
+        False if this has encountered data it cannot handle incrementally. The
+        caller should fall back to :func:`call_or_eval` from then on.
+    """
+
+    def __init__(self, mapping, run, stream_name, columns, namespace):
+        # columns are the (only) columns referenced by the items in mapping.
+        self._mapping = dict(mapping)
+        self._stream_name = stream_name
+        self._columns = frozenset(columns)
+        self._namespace = namespace
+        self._run_start_time = run.metadata["start"]["time"]
+        self._codes = {
+            key: item if item in self._columns else compile_expression(item)[0]
+            for key, item in self._mapping.items()
+        }
+        self._pending = None
+        self.active = True
+        # Seed the buffers with all the rows that we have so far.
+        results = call_or_eval(self._mapping, run, [stream_name], namespace)
+        self._buffers = {key: _AppendBuffer(value) for key, value in results.items()}
+
+    @classmethod
+    def from_mapping(cls, mapping, run, stream_names, namespace=None):
+        """
+        Construct an IncrementalEvaluator, or return None if that is not possible.
+
+        Parameters
+        ----------
+        mapping : Dict[String, String | Callable]
+            Same as in :func:`call_or_eval`
+        run : BlueskyRun
+        stream_names : List[String]
+        namespace : Dict, optional
+
+        Returns
+        -------
+        evaluator : IncrementalEvaluator or None
+        """
+        namespace = dict(namespace or {})
+        # Names that construct_namespace resolves to something other than a
+        # column, and take precedence over columns, spoil the expression.
+        shadowing = set(namespace) | set(stream_names) | {"run"}
+        with lock_if_live(run):
+            # Map each column to the stream that it would be resolved from,
+            # giving streams earlier in the list precedence.
+            column_to_stream = {}
+            for stream_name in reversed(stream_names):
+                ds = run[stream_name].to_dask()
+                column_to_stream.update({column: stream_name for column in ds})
+                column_to_stream.update({column: stream_name for column in ds.coords})
+            columns = set(column_to_stream) - shadowing
+            namespace_ = {**_base_namespace, **namespace}
+            referenced = set()
+            for item in mapping.values():
+                item_columns = _elementwise_columns(item, columns, namespace_)
+                if item_columns is None:
+                    return None
+                referenced.update(item_columns)
+            streams = {column_to_stream[column] for column in referenced}
+            if len(streams) != 1:
+                return None
+            (stream_name,) = streams
+            return cls(mapping, run, stream_name, referenced, namespace)
+
+    def on_new_doc(self, event):
+        "Stash an EventPage until the new_data Event tells us which stream it is from."
+        if self.active and event.name == "event_page":
+            self._pending = event.doc
+
+    def on_new_data(self, event):
+        """
+        Process the stashed EventPage, if it belongs to our stream.
+
+        Returns
+        -------
+        appended : Dict[String, Array] or None
+            The newly-appended results, or None if there was nothing to append.
+        """
+        doc, self._pending = self._pending, None
+        if not self.active or doc is None or self._stream_name not in event.updated:
+            return None
+        try:
+            appended = self._evaluate(doc)
+        except Exception:
+            # For example, external data (which needs filling) or expressions
+            # that turn out to be shape-dependent. Give up on incremental
+            # updates for this run.
+            self.active = False
+            return None
+        for key, value in appended.items():
+            self._buffers[key].extend(value)
+        return appended
+
+    def _evaluate(self, doc):
+        num_rows = len(doc["seq_num"])
+        namespace = dict(_base_namespace)
+        for column in self._columns:
+            if column in doc.get("filled", {}):
+                raise ValueError("External data cannot be processed incrementally.")
+            if column == "time":
+                namespace[column] = numpy.asarray(doc["time"]) - self._run_start_time
+            else:
+                namespace[column] = numpy.asarray(doc["data"][column])
+        namespace.update(self._namespace)
+        appended = {}
+        for key, code in self._codes.items():
+            if isinstance(code, str):
+                value = namespace[code]
+            else:
+                value = numpy.asarray(eval(code, namespace))
+            if value.ndim == 0 or len(value) != num_rows:
+                raise ValueError(f"Expected {num_rows} results from {self._mapping[key]!r}")
+            appended[key] = value
+        return appended
+
+    def result(self):
+        "Return the results accumulated so far."
+        return {key: buffer.view() for key, buffer in self._buffers.items()}
+
+
 def auto_label(callable_or_expr):
     """
     Given a callable or a string, extract a name for labeling axes.
@@ -304,8 +821,11 @@ class RunManager:
         ----------
         run : BlueskyRun
         """
-        if run in self.runs:
-            self.runs.remove(run)
+        try:
+            index = self.runs.index(run)
+        except ValueError:
+            return
+        self.runs.pop(index)
 
     def track_artist(self, artist, runs):
         """
@@ -331,11 +851,19 @@ class RunManager:
 
     def _cull_runs(self):
         "Remove Runs from the beginning of self.runs to keep the length <= max_runs."
-        i = 0
-        while len(self.runs) > self.max_runs + len(self._pinned):
-            while self.runs[i].metadata["start"]["uid"] in self._pinned:
-                i += 1
-            self.runs.pop(i)
+        excess = len(self.runs) - self.max_runs - len(self._pinned)
+        if excess <= 0:
+            return
+        # Find the oldest unpinned Runs in one pass, then remove them oldest
+        # first, accounting for the ones already removed ahead of each.
+        indexes = []
+        for i, run in enumerate(self.runs):
+            if _uid(run) not in self._pinned:
+                indexes.append(i)
+                if len(indexes) == excess:
+                    break
+        for removed, i in enumerate(indexes):
+            self.runs.pop(i - removed)
 
     def _on_run_added(self, event):
         """
@@ -360,7 +888,7 @@ class RunManager:
         "Remove any extant artists if its corresponding Run is removed."
         run_uid = event.item.metadata["start"]["uid"]
         self._pinned.discard(run_uid)
-        for artist in self._runs_to_artists.pop(run_uid):
+        for artist in self._runs_to_artists.pop(run_uid, ()):
             artist.axes.discard(artist)
 
     def _on_new_stream(self, event):
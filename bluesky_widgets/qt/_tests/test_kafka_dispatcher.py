@@ -1,6 +1,7 @@
 import logging
 import time
 
+import pytest
 from bluesky import RunEngine
 from bluesky.plans import count
 
@@ -117,3 +118,53 @@ def test_publisher_and_qt_remote_dispatcher(
         assert len(published_bluesky_documents) == len(dispatched_bluesky_documents)
 
         assert len(lines_model.runs) == 1
+
+
+@pytest.mark.parametrize(
+    "overflow_policy,expected_names,expected_statistics",
+    [
+        ("drop_oldest_event", ["start", "descriptor", "event", "event"], {"dropped": 4, "merged": 0}),
+        ("merge", ["start", "descriptor", "event_page", "event"], {"dropped": 0, "merged": 4}),
+    ],
+)
+def test_overflow_policy(overflow_policy, expected_names, expected_statistics, qapp):
+    "When the queue is full, Events are dropped or merged to make room."
+    qt_remote_dispatcher = QtRemoteDispatcher(
+        topics=["test.qt.remote.dispatcher.overflow"],
+        bootstrap_servers="localhost:9092",
+        group_id="test.qt.remote.dispatcher.overflow.consumer.group",
+        max_queue_size=4,
+        overflow_policy=overflow_policy,
+    )
+    dispatched_bluesky_documents = []
+    qt_remote_dispatcher.subscribe(lambda name, doc: dispatched_bluesky_documents.append((name, doc)))
+
+    documents = [("start", {"uid": "abc"}), ("descriptor", {"uid": "def", "run_start": "abc"})]
+    for i in range(6):
+        documents.append(
+            (
+                "event",
+                {
+                    "uid": f"event-{i}",
+                    "descriptor": "def",
+                    "seq_num": i + 1,
+                    "time": 0,
+                    "data": {"det": i},
+                    "timestamps": {"det": 0},
+                },
+            )
+        )
+    for name, doc in documents:
+        qt_remote_dispatcher._put(("test.qt.remote.dispatcher.overflow", name, doc))
+    assert qt_remote_dispatcher.statistics["pending"] == 4
+    qapp.processEvents()
+    assert [name for name, _ in dispatched_bluesky_documents] == expected_names
+    statistics = qt_remote_dispatcher.statistics
+    assert statistics["dispatched"] == 4
+    assert statistics["pending"] == 0
+    for key, value in expected_statistics.items():
+        assert statistics[key] == value
+    if overflow_policy == "merge":
+        (event_page,) = [doc for name, doc in dispatched_bluesky_documents if name == "event_page"]
+        assert event_page["data"]["det"] == [0, 1, 2, 3, 4]
+    qt_remote_dispatcher.stop()
@@ -0,0 +1,53 @@
+from bluesky_live.run_builder import RunBuilder
+
+from ...models.plot_builders import Lines
+from ..figures import QtFigure
+
+
+def test_redraws_are_coalesced(qtbot):
+    "Many updates in quick succession should lead to one redraw."
+    with RunBuilder() as builder:
+        builder.add_stream("primary", data={"motor": [1, 2], "det": [10.0, 20.0]})
+        run = builder.get_run()
+        model = Lines("motor", ["det", "det * 2"])
+        view = QtFigure(model.figure, max_fps=10)
+        (axes,) = view.axes.values()
+        refreshes = []
+        refresh = axes._refresh
+        axes._refresh = lambda **kwargs: refreshes.append(kwargs) or refresh(**kwargs)
+        model.add_run(run)
+        for i in range(3, 13):
+            builder.add_data("primary", data={"motor": [i], "det": [10.0 * i]})
+        assert not refreshes
+        qtbot.waitUntil(lambda: len(refreshes) > 0)
+        assert refreshes == [{"legend": True, "relim": True, "autoscale": True}]
+        assert view.figure.axes[0].get_xlim()[1] >= 12
+    view.close_figure()
+
+
+def test_blitting(qtbot):
+    "In blitting mode, data updates within the limits should not redraw the figure."
+    with RunBuilder() as builder:
+        builder.add_stream("primary", data={"motor": [1, 2], "det": [10.0, 20.0]})
+        run = builder.get_run()
+        model = Lines("motor", ["det"])
+        view = QtFigure(model.figure, max_fps=None, blit=True)
+        qtbot.addWidget(view)
+        model.add_run(run)
+        view.figure.canvas.draw()
+        draws = []
+        view.figure.canvas.mpl_connect("draw_event", draws.append)
+        blits = []
+        (axes,) = view.axes.values()
+        blit = axes._blit
+        axes._blit = lambda: blits.append(None) or blit()
+
+        # The new point is within the hysteresis of the current limits.
+        builder.add_data("primary", data={"motor": [2.01], "det": [20.0]})
+        assert blits
+        assert view.figure.axes[0].get_xlim()[1] >= 2.01
+        # The new point is far out of the current limits.
+        builder.add_data("primary", data={"motor": [100], "det": [20.0]})
+        qtbot.waitUntil(lambda: len(draws) > 0)
+        assert view.figure.axes[0].get_xlim()[1] >= 100
+    view.close_figure()
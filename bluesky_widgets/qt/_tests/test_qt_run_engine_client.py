@@ -0,0 +1,170 @@
+import threading
+import time
+
+import pytest
+
+from ...models.run_engine_client import RunEngineClient, _diff_queue_items
+from ..run_engine_client import QtReManagerConnection, QtRePlanQueue, QueueItemsTableModel
+
+
+class _FakeRequestError(Exception):
+    pass
+
+
+class FakeREManagerAPI:
+    "Replaces the REManagerAPI of a client. Status requests block until 'respond' is set."
+
+    RequestTimeoutError = _FakeRequestError
+    RequestError = _FakeRequestError
+    ClientError = _FakeRequestError
+
+    def __init__(self):
+        self.n_status_requests = 0
+        self.respond = threading.Event()
+        self.respond.set()
+
+    def status(self, *, reload=False):
+        self.n_status_requests += 1
+        self.respond.wait()
+        return {"manager_state": "idle"}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def model():
+    model = RunEngineClient(zmq_control_addr="tcp://localhost:61999")
+    model._client.close()
+    model._client = FakeREManagerAPI()
+    yield model
+    model.stop_status_monitoring()
+    model._client.respond.set()
+
+
+def test_re_manager_connection_disconnect(qtbot, model):
+    "Disconnecting should not wait for the pending status request."
+    widget = QtReManagerConnection(model)
+    qtbot.addWidget(widget)
+    # Skip loading the data from RE Manager
+    widget._first_connection = True
+
+    widget._pb_re_manager_connect.click()
+    qtbot.waitUntil(lambda: widget._lb_connected.text() == "ONLINE")
+    assert not widget._pb_re_manager_connect.isEnabled()
+    assert widget._pb_re_manager_disconnect.isEnabled()
+
+    model._client.respond.clear()
+    n_requests = model._client.n_status_requests
+    # Wait for the next (blocked) status request
+    qtbot.waitUntil(lambda: model._client.n_status_requests > n_requests, timeout=10000)
+
+    t0 = time.monotonic()
+    widget._pb_re_manager_disconnect.click()
+    assert time.monotonic() - t0 < 0.1
+    assert widget._pb_re_manager_connect.isEnabled()
+    assert not widget._pb_re_manager_disconnect.isEnabled()
+    qtbot.waitUntil(lambda: widget._lb_connected.text() == "-----")
+
+
+def test_re_manager_connection_update_period_deprecated(qtbot, model):
+    widget = QtReManagerConnection(model)
+    qtbot.addWidget(widget)
+    with pytest.warns(DeprecationWarning):
+        widget.update_period = 2
+    with pytest.warns(DeprecationWarning):
+        assert widget.update_period == 2
+
+
+class FakeFormattingClient:
+    "Formats the items for the table model and counts formatted cells."
+
+    def __init__(self):
+        self.allowed_plans_uid = "plans-1"
+        self.n_formatted = 0
+
+    def get_item_value_for_label(self, *, item, label):
+        self.n_formatted += 1
+        return f"{item[label]}-{self.allowed_plans_uid}"
+
+
+def _queue_items(uids):
+    return [{"item_uid": uid, "name": f"plan-{uid}"} for uid in uids]
+
+
+def _table_contents(table_model):
+    return [
+        table_model.data(table_model.index(nr, nc))
+        for nr in range(table_model.rowCount())
+        for nc in range(table_model.columnCount())
+    ]
+
+
+def test_queue_items_table_model_apply_changes(qtbot):
+    client = FakeFormattingClient()
+    table_model = QueueItemsTableModel(client, ("item_uid", "name"))
+    table_model.set_items(_queue_items("abcd"))
+    assert table_model.rowCount() == 4
+    assert table_model.data(table_model.index(1, 1)) == "plan-b-plans-1"
+    _table_contents(table_model)
+    assert client.n_formatted == 8
+
+    new_items = _queue_items("xacd")
+    new_items[2]["name"] = "plan-c-edited"
+    changes = _diff_queue_items(table_model.items, new_items)
+    with qtbot.waitSignals([table_model.rowsRemoved, table_model.rowsInserted, table_model.dataChanged]):
+        table_model.apply_changes(changes)
+    assert table_model.items == new_items
+    assert table_model.rowCount() == 4
+    # Only the inserted and updated rows are formatted
+    contents = _table_contents(table_model)
+    assert client.n_formatted == 8 + 4
+    assert contents == [
+        "x-plans-1",
+        "plan-x-plans-1",
+        "a-plans-1",
+        "plan-a-plans-1",
+        "c-plans-1",
+        "plan-c-edited-plans-1",
+        "d-plans-1",
+        "plan-d-plans-1",
+    ]
+
+    # The rows of unchanged items are kept if the table is reloaded
+    table_model.set_items(_queue_items("ad"))
+    assert _table_contents(table_model) == ["a-plans-1", "plan-a-plans-1", "d-plans-1", "plan-d-plans-1"]
+    assert client.n_formatted == 8 + 4
+
+    # All the rows are formatted again for the new list of allowed plans
+    client.allowed_plans_uid = "plans-2"
+    assert _table_contents(table_model) == ["a-plans-2", "plan-a-plans-2", "d-plans-2", "plan-d-plans-2"]
+    assert client.n_formatted == 8 + 4 + 4
+
+
+def test_plan_queue_selection_preserved(qtbot, model):
+    "Test that the selected item stays selected as items are inserted above it."
+    widget = QtRePlanQueue(model)
+    qtbot.addWidget(widget)
+
+    def load_queue(uids, plan_queue_uid):
+        response = {"success": True, "items": _queue_items(uids), "running_item": {}}
+        model._process_plan_queue(dict(response, plan_queue_uid=plan_queue_uid))
+
+    load_queue("abc", "queue-1")
+    qtbot.waitUntil(lambda: widget._table_model.rowCount() == 3)
+    model.selected_queue_item_uids = ["b"]
+    qtbot.waitUntil(lambda: [_.row() for _ in widget._table.selectionModel().selectedRows()] == [1])
+
+    set_items = widget._table_model.set_items
+    widget._table_model.set_items = lambda items: pytest.fail("The table must be updated incrementally")
+    load_queue("xyabc", "queue-2")
+    qtbot.waitUntil(lambda: widget._table_model.rowCount() == 5)
+    assert [_.row() for _ in widget._table.selectionModel().selectedRows()] == [3]
+    assert model.selected_queue_item_uids == ["b"]
+
+    # The selected item is removed
+    widget._table_model.set_items = set_items
+    load_queue("xyac", "queue-3")
+    qtbot.waitUntil(lambda: widget._table_model.rowCount() == 4)
+    assert widget._table.selectionModel().selectedRows() == []
+    assert model.selected_queue_item_uids == []
@@ -0,0 +1,55 @@
+import pickle
+
+import zmq
+
+from bluesky_widgets.qt.zmq_dispatcher import RemoteDispatcher
+
+
+def test_qt_remote_dispatcher(qtbot):
+    "Documents are received in batches by one persistent thread and the partial batch is flushed on stop."
+    context = zmq.Context()
+    publisher = context.socket(zmq.PUB)
+    port = publisher.bind_to_random_port("tcp://127.0.0.1")
+    dispatcher = RemoteDispatcher(("127.0.0.1", port), batch_latency=0.01)
+    dispatched = []
+    dispatcher.subscribe(lambda name, doc: dispatched.append((name, doc)))
+
+    def publish(name, doc):
+        publisher.send(b" ".join([b"prefix", name.encode(), pickle.dumps(doc)]))
+
+    def n_events():
+        return len([_ for _ in dispatched if _[0] == "event"])
+
+    try:
+        dispatcher.start()
+        worker = dispatcher._worker
+
+        # The subscription takes effect some time after the subscriber connects
+        def subscribed():
+            publish("start", {"uid": "run-1"})
+            return bool(dispatched)
+
+        qtbot.waitUntil(subscribed, timeout=10000)
+        publish("event", {"seq_num": 1})
+        qtbot.waitUntil(lambda: n_events() == 1)
+        assert dispatcher._worker is worker
+
+        # The documents wait for the batch to fill
+        dispatcher.batch_latency = 60
+        for n in range(3):
+            publish("event", {"seq_num": n + 2})
+        qtbot.waitUntil(lambda: dispatcher.statistics["pending"] == 3)
+        assert n_events() == 1
+
+        # The partial batch is dispatched once the dispatcher is stopped
+        with qtbot.waitSignal(worker.finished, timeout=5000):
+            dispatcher.stop()
+        qtbot.waitUntil(lambda: n_events() == 4)
+        assert [doc["seq_num"] for name, doc in dispatched if name == "event"] == [1, 2, 3, 4]
+        statistics = dispatcher.statistics
+        assert statistics["pending"] == 0
+        assert statistics["received"] == statistics["dispatched"] == len(dispatched)
+    finally:
+        dispatcher.stop()
+        publisher.close(linger=0)
+        context.term()
@@ -6,11 +6,14 @@ from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as Navigatio
 from qtpy.QtCore import QObject, Signal
 from qtpy.QtWidgets import QSizePolicy, QTabWidget, QVBoxLayout, QWidget
 
-from .._matplotlib_axes import MatplotlibAxes
+from .._matplotlib_axes import MatplotlibAxes, RedrawScheduler
 from ..models.plot_specs import Figure, FigureList
 from ..utils.dict_view import DictView
 from ..utils.event import Event
 
+# Redrawing faster than this is not perceptible.
+DEFAULT_MAX_FPS = 30
+
 
 def _initialize_matplotlib():
     "Set backend to Qt5Agg and import pyplot."
@@ -44,17 +47,31 @@ class ThreadsafeMatplotlibAxes(QObject, MatplotlibAxes):
 class QtFigures(QTabWidget):
     """
     A Jupyter (ipywidgets) view for a FigureList model.
+
+    Parameters
+    ----------
+    model : FigureList
+    parent : QWidget, optional
+    max_fps : Number, optional
+        Maximum rate at which each figure is redrawn. Updates that arrive
+        faster than this are coalesced. If None, redraw on every update.
+    blit : Boolean, optional
+        If True, redraw only the lines when just their data changes and the
+        limits stay (nearly) the same, instead of redrawing whole figures.
+        Default is False.
     """
 
     __callback_event = Signal(object, Event)
 
-    def __init__(self, model: FigureList, parent=None):
+    def __init__(self, model: FigureList, parent=None, *, max_fps=DEFAULT_MAX_FPS, blit=False):
         _initialize_matplotlib()
         super().__init__(parent)
         self.setTabsClosable(True)
         self.tabCloseRequested.connect(self._on_close_tab_requested)
         self.resize(self.sizeHint())
 
+        self.max_fps = max_fps
+        self.blit = blit
         self.model = model
         # Map Figure UUID to widget with QtFigureTab
         self._figures = {}
@@ -111,7 +128,7 @@ class QtFigures(QTabWidget):
 
     def _add_figure(self, figure_spec):
         "Add a new tab with a matplotlib Figure."
-        tab = QtFigure(figure_spec, parent=self)
+        tab = QtFigure(figure_spec, parent=self, max_fps=self.max_fps, blit=self.blit)
         self.addTab(tab, figure_spec.short_title or figure_spec.title)
         self._figures[figure_spec.uuid] = tab
         # Update the tab title when short_title changes (or, if short_title is
@@ -161,9 +178,21 @@ class QtFigures(QTabWidget):
 class QtFigure(QWidget):
     """
     A Qt view for a Figure model. This always contains one Figure.
+
+    Parameters
+    ----------
+    model : Figure
+    parent : QWidget, optional
+    max_fps : Number, optional
+        Maximum rate at which the figure is redrawn. Updates that arrive
+        faster than this are coalesced. If None, redraw on every update.
+    blit : Boolean, optional
+        If True, redraw only the lines when just their data changes and the
+        limits stay (nearly) the same, instead of redrawing the whole figure.
+        Default is False.
     """
 
-    def __init__(self, model: Figure, parent=None):
+    def __init__(self, model: Figure, parent=None, *, max_fps=DEFAULT_MAX_FPS, blit=False):
         _initialize_matplotlib()
         super().__init__(parent)
         self.model = model
@@ -175,10 +204,12 @@ class QtFigure(QWidget):
         self.axes_list = list(self.figure.subplots(len(model.axes), squeeze=False).ravel())
 
         self.figure.suptitle(model.title)
+        # Create the canvas first so that redraws are scheduled on its timers.
+        canvas = FigureCanvas(self.figure)
+        self._redraw_scheduler = RedrawScheduler.for_figure(self.figure, max_fps=max_fps, blit=blit)
         self._axes = {}
         for axes_spec, axes in zip(model.axes, self.axes_list):
             self._axes[axes_spec.uuid] = ThreadsafeMatplotlibAxes(model=axes_spec, axes=axes)
-        canvas = FigureCanvas(self.figure)
         canvas.setMinimumWidth(640)
         canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         canvas.updateGeometry()
@@ -217,4 +248,5 @@ class QtFigure(QWidget):
         self.figure.canvas.draw_idle()
 
     def close_figure(self):
+        self._redraw_scheduler.close()
         self.figure.canvas.close()
@@ -1,15 +1,20 @@
-import functools
+import collections
 import logging
+import threading
 
 import bluesky_kafka
+import event_model
 import msgpack
-from qtpy.QtCore import QObject, QTimer
+from qtpy.QtCore import QObject, Qt, Signal
 
 from ..qt.threading import create_worker
 
 logger = logging.getLogger(name="bluesky_widgets.qt.kafka_dispatcher")
 
-LOADING_LATENCY = 0.01
+BATCH_SIZE = 500  # max messages per call to Consumer.consume
+MAX_QUEUE_SIZE = 10000  # max documents waiting to be dispatched
+BLOCKED_WAIT = 0.1  # sec, how often a blocked receiver checks whether it should stop
+OVERFLOW_POLICIES = ("block", "drop_oldest_event", "merge")
 
 
 class QtRemoteDispatcher(QObject):
@@ -18,6 +23,21 @@ class QtRemoteDispatcher(QObject):
 
     This is designed to be run in a Qt application.
 
+    Messages are consumed in batches on a long-running background thread and
+    placed in a bounded queue, which the Qt main thread drains. If documents
+    arrive faster than the application can process them and the queue fills,
+    the ``overflow_policy`` decides what happens:
+
+    * ``"block"`` --- Stop consuming until there is room. Unconsumed messages
+      wait in Kafka, so nothing is lost, but the application falls behind.
+    * ``"drop_oldest_event"`` --- Discard the oldest queued Event or EventPage
+      to make room. Other documents (start, descriptor, stop, ...) are never
+      dropped.
+    * ``"merge"`` --- Merge consecutive queued Events and EventPages from the
+      same stream into EventPages, which are much cheaper to process.
+
+    In any case, if no room can be made, the receiver blocks.
+
     Parameters
     ----------
     topics: list
@@ -37,6 +57,18 @@ class QtRemoteDispatcher(QObject):
         optional function to deserialize data. Default is msgpack.loads.
     parent_qobject: QObject
         optional parent in the QT sense
+    max_queue_size: int, optional
+        Maximum number of documents waiting to be dispatched. Default is 10000.
+    overflow_policy: {"block", "drop_oldest_event", "merge"}, optional
+        What to do when the queue is full. Default is "block".
+    batch_size: int, optional
+        Maximum number of messages to consume at once. Default is 500.
+
+    Attributes
+    ----------
+    statistics : dict
+        Counts of messages consumed, documents dispatched, Events dropped, and
+        Events merged into EventPages, plus the number of documents pending.
 
     Example
     -------
@@ -50,10 +82,13 @@ class QtRemoteDispatcher(QObject):
     >>>         }
     >>>    )
     >>> d.subscribe(stream_documents_into_runs(model.add_run))
-    >>> d.start()  # launches periodic workers on background threads
-    >>> d.stop()  # stop launching workers
+    >>> d.start()  # launches a worker on a background thread
+    >>> d.stop()  # stop the worker
     """
 
+    # Emitted from the receiving thread, delivered in the Qt main thread.
+    __data_available = Signal()
+
     def __init__(
         self,
         topics,
@@ -63,10 +98,15 @@ class QtRemoteDispatcher(QObject):
         polling_duration=0.05,
         deserializer=msgpack.loads,
         parent_qobject=None,
+        *,
+        max_queue_size=MAX_QUEUE_SIZE,
+        overflow_policy="block",
+        batch_size=BATCH_SIZE,
     ):
         super().__init__(parent_qobject)
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {OVERFLOW_POLICIES}, not {overflow_policy!r}")
         self.closed = False
-        self._timer = QTimer(self)
         self._dispatcher = bluesky_kafka.RemoteDispatcher(
             topics=topics,
             bootstrap_servers=bootstrap_servers,
@@ -78,9 +118,31 @@ class QtRemoteDispatcher(QObject):
         self.subscribe = self._dispatcher.subscribe
         self._waiting_for_start = True
         self.worker = None
+        self.max_queue_size = int(max_queue_size)
+        self.overflow_policy = overflow_policy
+        self.batch_size = int(batch_size)
+        # Queue of (topic, name, document), guarded by self._condition.
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._notify_pending = False
+        self._consumed = 0
+        self._dispatched = 0
+        self._dropped = 0
+        self._merged = 0
+        self.__data_available.connect(self._process_queue, Qt.QueuedConnection)
+
+    @property
+    def statistics(self):
+        with self._condition:
+            return {
+                "consumed": self._consumed,
+                "dispatched": self._dispatched,
+                "dropped": self._dropped,
+                "merged": self._merged,
+                "pending": len(self._queue),
+            }
 
     def _receive_data(self, continue_polling=None):
-        # TODO Think about back pressure.
         if continue_polling is None:
 
             def continue_polling_forever():
@@ -88,41 +150,103 @@ class QtRemoteDispatcher(QObject):
 
             continue_polling = continue_polling_forever
 
-        while continue_polling():
+        bluesky_consumer = self._dispatcher._bluesky_consumer
+        while (not self.closed) and continue_polling():
             try:
-                # there should maybe be a poll method on the dispatcher
-                msg = self._dispatcher._bluesky_consumer._consumer.poll(
-                    self._dispatcher._bluesky_consumer.polling_duration
+                messages = bluesky_consumer._consumer.consume(
+                    num_messages=self.batch_size, timeout=bluesky_consumer.polling_duration
                 )
-                if msg is None:
-                    logger.debug("no message")
-                    break
-                elif msg.error():
-                    logger.error("Kafka Consumer error: %s", msg.error())
-                else:
-                    try:
-                        # there should be a more direct way to deserialize the message
-                        (
-                            name,
-                            document,
-                        ) = self._dispatcher._bluesky_consumer._deserializer(msg.value())
-                        if self._waiting_for_start:
-                            if name == "start":
-                                self._waiting_for_start = False
-                            else:
-                                # We subscribed midstream and are seeing documents for
-                                # which we do not have the full run. Wait for a 'start'
-                                # doc.
-                                logger.debug("keep waiting for a start document")
-                                return
-                        yield self._dispatcher._bluesky_consumer._consumer, msg.topic(), name, document
-                    except Exception as exc:
-                        logger.exception(exc)
             except Exception as exc:
                 logger.exception(exc)
+                continue
+            if not messages:
+                logger.debug("no message")
+            for msg in messages:
+                if msg.error():
+                    logger.error("Kafka Consumer error: %s", msg.error())
+                    continue
+                try:
+                    # there should be a more direct way to deserialize the message
+                    name, document = bluesky_consumer._deserializer(msg.value())
+                except Exception as exc:
+                    logger.exception(exc)
+                    continue
+                self._consumed += 1
+                if self._waiting_for_start:
+                    if name == "start":
+                        self._waiting_for_start = False
+                    else:
+                        # We subscribed midstream and are seeing documents for
+                        # which we do not have the full run. Wait for a 'start'
+                        # doc.
+                        logger.debug("keep waiting for a start document")
+                        continue
+                self._put((msg.topic(), name, document))
 
         logger.debug("polling loop has ended cleanly")
 
+    def _put(self, item):
+        "Add an item to the queue, applying the overflow policy if it is full."
+        with self._condition:
+            while len(self._queue) >= self.max_queue_size:
+                if self.overflow_policy == "drop_oldest_event" and self._drop_oldest_event():
+                    continue
+                if self.overflow_policy == "merge" and self._merge_events():
+                    continue
+                # Wait for the Qt main thread to make room.
+                self._notify()
+                self._condition.wait(BLOCKED_WAIT)
+                if self.closed:
+                    return
+            self._queue.append(item)
+            self._notify()
+
+    def _notify(self):
+        "Ask the Qt main thread to drain the queue, if it has not been asked already."
+        if not self._notify_pending:
+            self._notify_pending = True
+            self.__data_available.emit()
+
+    def _drop_oldest_event(self):
+        "Drop the oldest Event or EventPage. Return False if there is none."
+        for i, (_, name, _) in enumerate(self._queue):
+            if name in ("event", "event_page"):
+                del self._queue[i]
+                self._dropped += 1
+                return True
+        return False
+
+    def _merge_events(self):
+        "Merge consecutive Events and EventPages. Return False if none could be merged."
+        merged = []
+        run = []  # consecutive event-like items from the same stream
+
+        def flush_run():
+            if len(run) == 1:
+                merged.append(run[0])
+            elif run:
+                topic = run[0][0]
+                pages = [doc if name == "event_page" else event_model.pack_event_page(doc) for _, name, doc in run]
+                merged.append((topic, "event_page", event_model.merge_event_pages(pages)))
+            run.clear()
+
+        for item in self._queue:
+            topic, name, doc = item
+            if name in ("event", "event_page"):
+                if run and (run[0][0] != topic or run[0][2]["descriptor"] != doc["descriptor"]):
+                    flush_run()
+                run.append(item)
+            else:
+                flush_run()
+                merged.append(item)
+        flush_run()
+        num_merged = len(self._queue) - len(merged)
+        if not num_merged:
+            return False
+        self._queue = collections.deque(merged)
+        self._merged += num_merged
+        return True
+
     def start(self, continue_polling=None):
         logger.debug("QtRemoteDispatcher.start")
         if self.closed:
@@ -132,30 +256,27 @@ class QtRemoteDispatcher(QObject):
                 "instance with {}".format(repr(self))
             )
 
-        self._work_loop(continue_polling=continue_polling)
-
-    def _work_loop(self, continue_polling=None):
         self.worker = create_worker(
             self._receive_data,
             continue_polling=continue_polling,
         )
-        # Schedule this method to be run again after a brief wait.
-        self.worker.finished.connect(
-            lambda: self._timer.singleShot(
-                int(LOADING_LATENCY),
-                functools.partial(self._work_loop, continue_polling),
-            )
-        )
-        self.worker.yielded.connect(self._process_result)
-
         self.worker.start()
 
-    def _process_result(self, result):
-        if result is None:
-            return
-        consumer, topic, name, document = result
-        self._dispatcher.process_document(consumer=consumer, topic=topic, name=name, document=document)
+    def _process_queue(self):
+        "Dispatch all queued documents. This runs in the Qt main thread."
+        with self._condition:
+            self._notify_pending = False
+            items = list(self._queue)
+            self._queue.clear()
+            # Wake the receiving thread if it is waiting for room.
+            self._condition.notify_all()
+        consumer = self._dispatcher._bluesky_consumer._consumer
+        for topic, name, document in items:
+            self._dispatcher.process_document(consumer=consumer, topic=topic, name=name, document=document)
+            self._dispatched += 1
 
     def stop(self):
         logger.debug("QtRemoteDispatcher.stop")
-        self.closed = True
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
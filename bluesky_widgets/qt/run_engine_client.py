@@ -3,11 +3,20 @@ import copy
 import inspect
 import os
 import pprint
-import time
+import warnings
 
 from bluesky_queueserver import construct_parameters, format_text_descriptions
-from qtpy.QtCore import Qt, QTimer, Signal, Slot
-from qtpy.QtGui import QBrush, QColor, QFontMetrics, QIntValidator, QPalette
+from qtpy.QtCore import (
+    QAbstractTableModel,
+    QItemSelection,
+    QItemSelectionModel,
+    QModelIndex,
+    Qt,
+    QTimer,
+    Signal,
+    Slot,
+)
+from qtpy.QtGui import QBrush, QColor, QFont, QFontMetrics, QIntValidator, QPalette, QTextCursor
 from qtpy.QtWidgets import (
     QAbstractItemView,
     QButtonGroup,
@@ -22,6 +31,7 @@ from qtpy.QtWidgets import (
     QHeaderView,
     QLabel,
     QLineEdit,
+    QPlainTextEdit,
     QPushButton,
     QRadioButton,
     QTableView,
@@ -33,7 +43,7 @@ from qtpy.QtWidgets import (
     QWidget,
 )
 
-from bluesky_widgets.qt.threading import FunctionWorker
+from bluesky_widgets.models.run_engine_client import ConsoleOutputBuffer
 
 
 class LineEditExtended(QLineEdit):
@@ -166,11 +176,9 @@ class QtReManagerConnection(QWidget):
         vbox.addWidget(self._group_box)
         self.setLayout(vbox)
 
-        # Thread used to initiate periodic status updates
-        self._thread = None
+        # Status updates are run by the model in a background thread shared by all widgets
         self.updates_activated = False
-        self._deactivate_updates = False
-        self.update_period = 1  # Status update period in seconds
+        self._update_period = 1  # Deprecated, see 'update_period'
 
         self._update_widget_states()
         self.model.events.status_changed.connect(self.on_update_widgets)
@@ -178,11 +186,33 @@ class QtReManagerConnection(QWidget):
 
         self._first_connection = False
 
+    @property
+    def update_period(self):
+        """
+        Deprecated. The status is updated by the model (see ``RunEngineClient.start_status_monitoring``)
+        as often as needed and the value is ignored.
+        """
+        warnings.warn(
+            "'QtReManagerConnection.update_period' is deprecated and ignored: the status update period "
+            "is adjusted by the model",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self._update_period
+
+    @update_period.setter
+    def update_period(self, value):
+        warnings.warn(
+            "'QtReManagerConnection.update_period' is deprecated and ignored: the status update period "
+            "is adjusted by the model",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        self._update_period = value
+
     def _update_widget_states(self):
-        connect_active = not self.updates_activated and not self._deactivate_updates
-        disconnect_active = self.updates_activated and not self._deactivate_updates
-        self._pb_re_manager_connect.setEnabled(connect_active)
-        self._pb_re_manager_disconnect.setEnabled(disconnect_active)
+        self._pb_re_manager_connect.setEnabled(not self.updates_activated)
+        self._pb_re_manager_disconnect.setEnabled(self.updates_activated)
 
         # We don't know if the server is online or offline:
         self._lb_connected.setText("-----")
@@ -203,7 +233,6 @@ class QtReManagerConnection(QWidget):
 
     def _pb_re_manager_connect_clicked(self):
         self.updates_activated = True
-        self._deactivate_updates = False
         self.model.clear_connection_status()
         self._update_widget_states()
 
@@ -218,30 +247,14 @@ class QtReManagerConnection(QWidget):
             self.model.manager_connecting_ops()
             self._first_connection = True
 
-        self._start_thread()
+        self.model.start_status_monitoring()
 
     def _pb_re_manager_disconnect_clicked(self):
-        self._deactivate_updates = True
+        self.model.stop_status_monitoring()
+        self.model.clear_connection_status()
+        self.updates_activated = False
         self._update_widget_states()
 
-    def _start_thread(self):
-        self._thread = FunctionWorker(self._reload_status)
-        self._thread.finished.connect(self._reload_complete)
-        self._thread.start()
-
-    def _reload_complete(self):
-        if not self._deactivate_updates:
-            self._start_thread()
-        else:
-            self.model.clear_connection_status()
-            self.updates_activated = False
-            self._deactivate_updates = False
-            self._update_widget_states()
-
-    def _reload_status(self):
-        self.model.load_re_manager_status()
-        time.sleep(self.update_period)
-
 
 class QtReEnvironmentControls(QWidget):
     signal_update_widget = Signal(bool, object)
@@ -655,7 +668,7 @@ class QtReStatusMonitor(QWidget):
         )
 
 
-class QueueTableWidget(QTableWidget):
+class QueueTableView(QTableView):
     signal_drop_event = Signal(int, int)
     signal_scroll = Signal(str)
     signal_resized = Signal()
@@ -704,6 +717,27 @@ class QueueTableWidget(QTableWidget):
     def dragLeaveEvent(self, event):
         self.deactivate_scroll()
 
+    def select_rows(self, rows, *, table_name="Table"):
+        """
+        Add the rows to the selection.
+
+        Parameters
+        ----------
+        rows: list(int)
+            Indices of the rows to select.
+        table_name: str
+            Name of the table used in the printed message if a row does not exist.
+        """
+        model = self.model()
+        n_rows, n_cols = model.rowCount(), model.columnCount()
+        selection = QItemSelection()
+        for row in rows:
+            if 0 <= row < n_rows:
+                selection.select(model.index(row, 0), model.index(row, n_cols - 1))
+            else:
+                print(f"{table_name}: attempting to select non-existing row: row={row}")
+        self.selectionModel().select(selection, QItemSelectionModel.Select)
+
     def activate_scroll(self, str):
         if str not in ("up", "down"):
             return
@@ -733,6 +767,138 @@ class QueueTableWidget(QTableWidget):
         self._scroll_timer.start(timeout)
 
 
+class QueueItemsTableModel(QAbstractTableModel):
+    """
+    Table model that represents a list of queue or history items. Cells are formatted
+    lazily, when the view requests them (typically only for the visible rows), and the
+    formatted rows are cached. The cached rows are discarded as the items are changed
+    (``apply_changes``) and once the list of allowed plans changes, since the displayed
+    parameters depend on plan signatures.
+
+    Parameters
+    ----------
+    client: RunEngineClient
+        The model used to format the items (``get_item_value_for_label``).
+    column_labels: tuple(str)
+        Labels of the table columns.
+    """
+
+    def __init__(self, client, column_labels, parent=None):
+        super().__init__(parent)
+        self._client = client
+        self._column_labels = tuple(column_labels)
+        self._items = []
+        # Formatted rows (or None if the row is not formatted yet), one for each item
+        self._rows = []
+        # UID of the list of allowed plans used to format the rows
+        self._rows_allowed_plans_uid = None
+
+    @property
+    def items(self):
+        """
+        The list of displayed items. The list must be modified only by calling ``set_items``
+        and ``apply_changes``.
+        """
+        return self._items
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._column_labels)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if (orientation == Qt.Horizontal) and (role == Qt.DisplayRole):
+            return self._column_labels[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+        if index.isValid():
+            return flags
+        return flags | Qt.ItemIsDropEnabled
+
+    def data(self, index, role=Qt.DisplayRole):
+        if (role != Qt.DisplayRole) or not index.isValid():
+            return None
+        return self._formatted_row(index.row())[index.column()]
+
+    def _formatted_row(self, nr):
+        "Returns the list of strings displayed in the row 'nr', formatting the row if necessary."
+        allowed_plans_uid = self._client.allowed_plans_uid
+        if allowed_plans_uid != self._rows_allowed_plans_uid:
+            self._rows = [None] * len(self._items)
+            self._rows_allowed_plans_uid = allowed_plans_uid
+        row = self._rows[nr]
+        if row is None:
+            item = self._items[nr]
+            row = []
+            for label in self._column_labels:
+                try:
+                    value = self._client.get_item_value_for_label(item=item, label=label)
+                except KeyError:
+                    value = ""
+                row.append(value)
+            self._rows[nr] = row
+        return row
+
+    def set_items(self, items):
+        """
+        Replace all displayed items.
+
+        Parameters
+        ----------
+        items: list(dict)
+            The list of items. The model takes ownership of the list.
+        """
+        self.beginResetModel()
+        # Keep the formatted rows of the items that did not change
+        formatted = {
+            item["item_uid"]: (item, row)
+            for item, row in zip(self._items, self._rows)
+            if (row is not None) and ("item_uid" in item)
+        }
+        self._rows = []
+        for item in items:
+            item_old, row = formatted.get(item.get("item_uid", None), (None, None))
+            self._rows.append(row if item_old == item else None)
+        self._items = items
+        self.endResetModel()
+
+    def apply_changes(self, changes):
+        """
+        Apply the changes to the list of displayed items (see ``RunEngineClient.load_plan_queue``).
+
+        Parameters
+        ----------
+        changes: list(tuple)
+            Operations ``("remove", row, None)``, ``("insert", row, item)``, ``("update", row, item)``.
+        """
+        for op, nr, item in changes:
+            if op == "remove":
+                self.beginRemoveRows(QModelIndex(), nr, nr)
+                del self._items[nr]
+                del self._rows[nr]
+                self.endRemoveRows()
+            elif op == "insert":
+                self.beginInsertRows(QModelIndex(), nr, nr)
+                self._items.insert(nr, copy.deepcopy(item))
+                self._rows.insert(nr, None)
+                self.endInsertRows()
+            else:
+                self._items[nr] = copy.deepcopy(item)
+                self._rows[nr] = None
+                self.dataChanged.emit(self.index(nr, 0), self.index(nr, len(self._column_labels) - 1))
+
+    def invalidate(self):
+        """
+        Discard formatted rows and refresh the view, e.g. after the list of allowed plans was changed.
+        """
+        self._rows = [None] * len(self._items)
+        if self._items:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._items) - 1, len(self._column_labels) - 1))
+
+
 class PushButtonMinimumWidth(QPushButton):
     """
     Push button minimum width necessary to fit the text
@@ -751,7 +917,8 @@ class PushButtonMinimumWidth(QPushButton):
 class QtRePlanQueue(QWidget):
     signal_update_widgets = Signal(bool)
     signal_update_selection = Signal(object)
-    signal_plan_queue_changed = Signal(object, object)
+    signal_plan_queue_changed = Signal(object, object, object)
+    signal_allowed_plans_changed = Signal()
 
     def __init__(self, model, parent=None):
         super().__init__(parent)
@@ -763,11 +930,8 @@ class QtRePlanQueue(QWidget):
 
         self._registered_item_editors = []
 
-        # Local copy of the plan queue items for operations performed locally
-        #   in the Qt Widget code without calling the model. Using local copy that
-        #   precisely matches the contents displayed in the table is more reliable
-        #   for local operations (e.g. calling editor when double-clicking the row).
-        self._plan_queue_items = []
+        # UID of the queue displayed in the table (changes are applied only to the matching queue)
+        self._plan_queue_uid = None
 
         self._table_column_labels = (
             "",
@@ -776,16 +940,20 @@ class QtRePlanQueue(QWidget):
             "USER",
             "GROUP",
         )
-        self._table = QueueTableWidget()
-        self._table.setColumnCount(len(self._table_column_labels))
-        self._table.setHorizontalHeaderLabels(self._table_column_labels)
+        # The table model keeps local copy of the plan queue items for operations performed locally
+        #   in the Qt Widget code without calling the model. Using local copy that
+        #   precisely matches the contents displayed in the table is more reliable
+        #   for local operations (e.g. calling editor when double-clicking the row).
+        self._table_model = QueueItemsTableModel(self.model, self._table_column_labels)
+        self._table = QueueTableView()
+        self._table.setModel(self._table_model)
         self._table.horizontalHeader().setSectionsMovable(True)
 
         self._table.setVerticalScrollMode(QAbstractItemView.ScrollPerItem)
         self._table.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
 
         self._table.setSelectionBehavior(QTableView.SelectRows)
-        self._table.setSelectionMode(QTableWidget.ContiguousSelection)
+        self._table.setSelectionMode(QAbstractItemView.ContiguousSelection)
 
         self._table.setDragEnabled(False)
         self._table.setAcceptDrops(False)
@@ -802,6 +970,9 @@ class QtRePlanQueue(QWidget):
         self._table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self._table.horizontalHeader().setStretchLastSection(True)
         self._table.horizontalHeader().setMinimumSectionSize(5)
+        # Size the columns to fit only the visible rows, so that the rows that are never
+        #   displayed are never formatted
+        self._table.horizontalHeader().setResizeContentsPrecision(0)
 
         self._table_scrolled_to_bottom = False
 
@@ -858,16 +1029,19 @@ class QtRePlanQueue(QWidget):
         self.model.events.plan_queue_changed.connect(self.on_plan_queue_changed)
         self.signal_plan_queue_changed.connect(self.slot_plan_queue_changed)
 
+        self.model.events.allowed_plans_changed.connect(self.on_allowed_plans_changed)
+        self.signal_allowed_plans_changed.connect(self._table_model.invalidate)
+
         self.model.events.queue_item_selection_changed.connect(self.on_queue_item_selection_changed)
         self.signal_update_selection.connect(self.slot_change_selection)
 
         self._table.signal_drop_event.connect(self.on_table_drop_event)
         self._table.signal_scroll.connect(self.on_table_scroll_event)
 
-        self._table.itemSelectionChanged.connect(self.on_item_selection_changed)
+        self._table.selectionModel().selectionChanged.connect(self.on_item_selection_changed)
         self._table.verticalScrollBar().valueChanged.connect(self.on_vertical_scrollbar_value_changed)
         self._table.verticalScrollBar().rangeChanged.connect(self.on_vertical_scrollbar_range_changed)
-        self._table.cellDoubleClicked.connect(self._on_table_cell_double_clicked)
+        self._table.doubleClicked.connect(self._on_table_double_clicked)
 
         self._update_button_states()
 
@@ -881,9 +1055,9 @@ class QtRePlanQueue(QWidget):
         self._update_widgets()
 
         if monitor:
-            self._table.cellDoubleClicked.disconnect(self._on_table_cell_double_clicked)
+            self._table.doubleClicked.disconnect(self._on_table_double_clicked)
         else:
-            self._table.cellDoubleClicked.connect(self._on_table_cell_double_clicked)
+            self._table.doubleClicked.connect(self._on_table_double_clicked)
 
     @property
     def registered_item_editors(self):
@@ -989,25 +1163,40 @@ class QtRePlanQueue(QWidget):
     def on_plan_queue_changed(self, event):
         plan_queue_items = event.plan_queue_items
         selected_item_uids = event.selected_item_uids
-        self.signal_plan_queue_changed.emit(plan_queue_items, selected_item_uids)
-
-    @Slot(object, object)
-    def slot_plan_queue_changed(self, plan_queue_items, selected_item_uids):
+        changes = {
+            "plan_queue_uid": getattr(event, "plan_queue_uid", None),
+            "changes": getattr(event, "changes", None),
+            "changes_from_uid": getattr(event, "changes_from_uid", None),
+        }
+        # The event is emitted in a background thread, so pass a snapshot of the queue.
+        self.signal_plan_queue_changed.emit(list(plan_queue_items), selected_item_uids, changes)
+
+    @Slot(object, object, object)
+    def slot_plan_queue_changed(self, plan_queue_items, selected_item_uids, changes=None):
         # Check if the vertical scroll bar is scrolled to the bottom. Ignore the case
         #   when 'scroll_value==0': if the top plan is visible, it should remain visible
         #   even if additional plans are added to the queue.
         self._block_table_selection_processing = True
 
-        # Create local copy of the plan queue items for operations performed locally
-        #   within the widget without involving the model.
-        self._plan_queue_items = copy.deepcopy(plan_queue_items)
-
         scroll_value = self._table.verticalScrollBar().value()
         scroll_maximum = self._table.verticalScrollBar().maximum()
         self._table_scrolled_to_bottom = scroll_value and (scroll_value == scroll_maximum)
 
-        self._table.clearContents()
-        self._table.setRowCount(len(plan_queue_items))
+        changes = changes or {}
+        row_changes = changes.get("changes")
+        if (
+            (row_changes is not None)
+            and (self._plan_queue_uid is not None)
+            and (changes.get("changes_from_uid") == self._plan_queue_uid)
+        ):
+            # Apply only the changes. The local copy of the plan queue items (used for
+            #   operations performed locally within the widget without involving the model)
+            #   is kept in sync with the table.
+            self._table_model.apply_changes(row_changes)
+        else:
+            # Reload the whole table.
+            self._table_model.set_items(copy.deepcopy(plan_queue_items))
+        self._plan_queue_uid = changes.get("plan_queue_uid")
 
         if len(plan_queue_items):
             resize_mode = QHeaderView.ResizeToContents
@@ -1016,16 +1205,6 @@ class QtRePlanQueue(QWidget):
             resize_mode = QHeaderView.Stretch
         self._table.horizontalHeader().setSectionResizeMode(resize_mode)
 
-        for nr, item in enumerate(plan_queue_items):
-            for nc, col_name in enumerate(self._table_column_labels):
-                try:
-                    value = self.model.get_item_value_for_label(item=item, label=col_name)
-                except KeyError:
-                    value = ""
-                table_item = QTableWidgetItem(value)
-                table_item.setFlags(table_item.flags() & ~Qt.ItemIsEditable)
-                self._table.setItem(nr, nc, table_item)
-
         # Update the number of table items
         self._n_table_items = len(plan_queue_items)
 
@@ -1039,9 +1218,13 @@ class QtRePlanQueue(QWidget):
         self.slot_change_selection(selected_item_uids)
         self._update_button_states()
 
-    def on_item_selection_changed(self):
+    def on_allowed_plans_changed(self, event):
+        # Displayed parameters depend on the plan signatures, so the rows must be reformatted
+        self.signal_allowed_plans_changed.emit()
+
+    def on_item_selection_changed(self, selected=None, deselected=None):
         """
-        The handler for ``item_selection_changed`` signal emitted by QTableWidget
+        The handler for ``selectionChanged`` signal emitted by the selection model of the table
         """
         if self._block_table_selection_processing:
             return
@@ -1079,19 +1262,14 @@ class QtRePlanQueue(QWidget):
         else:
             self._block_table_selection_processing = True
             self._table.clearSelection()
-            for row in rows:
-                if self._table.currentRow() not in rows:
-                    self._table.setCurrentCell(rows[-1], 0)
-                for col in range(self._table.columnCount()):
-                    item = self._table.item(row, col)
-                    if item:
-                        item.setSelected(True)
-                    else:
-                        print(f"Plan Queue Table: attempting to select non-existing item: row={row} col={col}")
+            if self._table.currentIndex().row() not in rows:
+                self._table.selectionModel().setCurrentIndex(
+                    self._table_model.index(rows[-1], 0), QItemSelectionModel.NoUpdate
+                )
+            self._table.select_rows(rows, table_name="Plan Queue Table")
 
             row_visible = rows[-1]
-            item_visible = self._table.item(row_visible, 0)
-            self._table.scrollToItem(item_visible, QAbstractItemView.EnsureVisible)
+            self._table.scrollTo(self._table_model.index(row_visible, 0), QAbstractItemView.EnsureVisible)
             self._block_table_selection_processing = False
 
             self._selected_items_pos = rows
@@ -1101,13 +1279,16 @@ class QtRePlanQueue(QWidget):
         self.model.selected_queue_item_uids = selected_item_uids
         self._update_button_states()
 
+    def _on_table_double_clicked(self, index):
+        self._on_table_cell_double_clicked(index.row(), index.column())
+
     def _on_table_cell_double_clicked(self, n_row, n_col):
         """
         Double-clicking of an item of the table widget opens the item in Plan Editor.
         """
         # We use local copy of the queue here
         try:
-            queue_item = self._plan_queue_items[n_row]
+            queue_item = self._table_model.items[n_row]
         except IndexError:
             queue_item = None
         registered_editors = self.registered_item_editors
@@ -1185,7 +1366,8 @@ class QtRePlanQueue(QWidget):
 class QtRePlanHistory(QWidget):
     signal_update_widgets = Signal()
     signal_update_selection = Signal(object)
-    signal_plan_history_changed = Signal(object, object)
+    signal_plan_history_changed = Signal(object, object, object)
+    signal_allowed_plans_changed = Signal()
 
     def __init__(self, model, parent=None):
         super().__init__(parent)
@@ -1195,6 +1377,9 @@ class QtRePlanHistory(QWidget):
         # Set True to block processing of table selection change events
         self._block_table_selection_processing = False
 
+        # UID of the history displayed in the table (changes are applied only to the matching history)
+        self._plan_history_uid = None
+
         self._table_column_labels = (
             "",
             "Name",
@@ -1203,17 +1388,18 @@ class QtRePlanHistory(QWidget):
             "USER",
             "GROUP",
         )
-        self._table = QueueTableWidget()
-        self._table.setColumnCount(len(self._table_column_labels))
+        # The table model keeps local copy of the plan history items displayed in the table
+        self._table_model = QueueItemsTableModel(self.model, self._table_column_labels)
+        self._table = QueueTableView()
+        self._table.setModel(self._table_model)
         # self._table.verticalHeader().hide()
-        self._table.setHorizontalHeaderLabels(self._table_column_labels)
         self._table.horizontalHeader().setSectionsMovable(True)
 
         self._table.setVerticalScrollMode(QAbstractItemView.ScrollPerItem)
         self._table.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
 
         self._table.setSelectionBehavior(QTableView.SelectRows)
-        self._table.setSelectionMode(QTableWidget.ContiguousSelection)
+        self._table.setSelectionMode(QAbstractItemView.ContiguousSelection)
         self._table.setShowGrid(True)
         self._table.setAlternatingRowColors(True)
 
@@ -1225,6 +1411,9 @@ class QtRePlanHistory(QWidget):
         self._table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self._table.horizontalHeader().setStretchLastSection(True)
         self._table.horizontalHeader().setMinimumSectionSize(5)
+        # Size the columns to fit only the visible rows, so that the rows that are never
+        #   displayed are never formatted
+        self._table.horizontalHeader().setResizeContentsPrecision(0)
 
         self._table_scrolled_to_bottom = False
         # self._table_slider_is_pressed = False
@@ -1260,13 +1449,16 @@ class QtRePlanHistory(QWidget):
         self.model.events.plan_history_changed.connect(self.on_plan_history_changed)
         self.signal_plan_history_changed.connect(self.slot_plan_history_changed)
 
+        self.model.events.allowed_plans_changed.connect(self.on_allowed_plans_changed)
+        self.signal_allowed_plans_changed.connect(self._table_model.invalidate)
+
         self.model.events.history_item_selection_changed.connect(self.on_history_item_selection_changed)
         self.signal_update_selection.connect(self.slot_change_selection)
 
-        self._table.itemSelectionChanged.connect(self.on_item_selection_changed)
+        self._table.selectionModel().selectionChanged.connect(self.on_item_selection_changed)
         self._table.verticalScrollBar().valueChanged.connect(self.on_vertical_scrollbar_value_changed)
         self._table.verticalScrollBar().rangeChanged.connect(self.on_vertical_scrollbar_range_changed)
-        self._table.cellDoubleClicked.connect(self._on_table_cell_double_clicked)
+        self._table.doubleClicked.connect(self._on_table_double_clicked)
 
         self._update_button_states()
 
@@ -1309,17 +1501,32 @@ class QtRePlanHistory(QWidget):
     def on_plan_history_changed(self, event):
         plan_history_items = event.plan_history_items
         selected_item_pos = event.selected_item_pos
-        self.signal_plan_history_changed.emit(plan_history_items, selected_item_pos)
-
-    @Slot(object, object)
-    def slot_plan_history_changed(self, plan_history_items, selected_item_pos):
+        changes = {
+            "plan_history_uid": getattr(event, "plan_history_uid", None),
+            "changes": getattr(event, "changes", None),
+            "changes_from_uid": getattr(event, "changes_from_uid", None),
+        }
+        self.signal_plan_history_changed.emit(plan_history_items, selected_item_pos, changes)
+
+    @Slot(object, object, object)
+    def slot_plan_history_changed(self, plan_history_items, selected_item_pos, changes=None):
         # Check if the vertical scroll bar is scrolled to the bottom.
         scroll_value = self._table.verticalScrollBar().value()
         scroll_maximum = self._table.verticalScrollBar().maximum()
         self._table_scrolled_to_bottom = scroll_value == scroll_maximum
 
-        self._table.clearContents()
-        self._table.setRowCount(len(plan_history_items))
+        changes = changes or {}
+        row_changes = changes.get("changes")
+        if (
+            (row_changes is not None)
+            and (self._plan_history_uid is not None)
+            and (changes.get("changes_from_uid") == self._plan_history_uid)
+        ):
+            # Typically, this appends the new items at the bottom of the table.
+            self._table_model.apply_changes(row_changes)
+        else:
+            self._table_model.set_items(list(plan_history_items))
+        self._plan_history_uid = changes.get("plan_history_uid")
 
         if len(plan_history_items):
             resize_mode = QHeaderView.ResizeToContents
@@ -1328,16 +1535,6 @@ class QtRePlanHistory(QWidget):
             resize_mode = QHeaderView.Stretch
         self._table.horizontalHeader().setSectionResizeMode(resize_mode)
 
-        for nr, item in enumerate(plan_history_items):
-            for nc, col_name in enumerate(self._table_column_labels):
-                try:
-                    value = self.model.get_item_value_for_label(item=item, label=col_name)
-                except KeyError:
-                    value = ""
-                table_item = QTableWidgetItem(value)
-                table_item.setFlags(table_item.flags() & ~Qt.ItemIsEditable)
-                self._table.setItem(nr, nc, table_item)
-
         # Update the number of table items
         self._n_table_items = len(plan_history_items)
 
@@ -1351,9 +1548,13 @@ class QtRePlanHistory(QWidget):
 
         self._update_button_states()
 
-    def on_item_selection_changed(self):
+    def on_allowed_plans_changed(self, event):
+        # Displayed parameters depend on the plan signatures, so the rows must be reformatted
+        self.signal_allowed_plans_changed.emit()
+
+    def on_item_selection_changed(self, selected=None, deselected=None):
         """
-        The handler for ``item_selection_changed`` signal emitted by QTableWidget
+        The handler for ``selectionChanged`` signal emitted by the selection model of the table
         """
         if self._block_table_selection_processing:
             return
@@ -1377,6 +1578,9 @@ class QtRePlanHistory(QWidget):
         row = event.selected_item_pos
         self.signal_update_selection.emit(row)
 
+    def _on_table_double_clicked(self, index):
+        self._on_table_cell_double_clicked(index.row(), index.column())
+
     def _on_table_cell_double_clicked(self, n_row, n_col):
         """
         Double-clicking of an item of the table widget: send the item (plan) for processing.
@@ -1396,20 +1600,15 @@ class QtRePlanHistory(QWidget):
         else:
             self._block_table_selection_processing = True
             self._table.clearSelection()
-            for row in rows:
-                for col in range(self._table.columnCount()):
-                    item = self._table.item(row, col)
-                    if item:
-                        item.setSelected(True)
-                    else:
-                        print(f"Plan Queue Table: attempting to select non-existing item: row={row} col={col}")
+            self._table.select_rows(rows, table_name="Plan History Table")
 
-            if self._table.currentRow() not in rows:
-                self._table.setCurrentCell(rows[-1], 0)
+            if self._table.currentIndex().row() not in rows:
+                self._table.selectionModel().setCurrentIndex(
+                    self._table_model.index(rows[-1], 0), QItemSelectionModel.NoUpdate
+                )
 
             row_visible = rows[-1]
-            item_visible = self._table.item(row_visible, 0)
-            self._table.scrollToItem(item_visible, QAbstractItemView.EnsureVisible)
+            self._table.scrollTo(self._table_model.index(row_visible, 0), QAbstractItemView.EnsureVisible)
             self._block_table_selection_processing = False
             self._selected_items_pos = rows
 
@@ -2719,15 +2918,14 @@ class QtReConsoleMonitor(QWidget):
 
         self._max_lines = 1000
 
-        self._text = ""
-        self._text_list = []  # List of lines
+        # Lines of console output. Only the lines changed since the last update are sent to the widget.
+        self._console_buffer = ConsoleOutputBuffer(max_lines=self._max_lines)
         self._text_updated = False  # Indicates that the new text data was received
-        self._text_line = 0  # Number of current line
-        self._text_ind = 0  # Index in the current line
-        self._text_scroll_max = 0  # Total number of displayed lines
+        self._n_displayed_lines = 0  # The number of lines displayed in the widget
 
-        self._text_edit = QTextEdit()
+        self._text_edit = QPlainTextEdit()
         self._text_edit.setReadOnly(True)
+        self._text_edit.setUndoRedoEnabled(False)
 
         # Set background color the same as for disabled window.
         p = self._text_edit.palette()
@@ -2735,7 +2933,9 @@ class QtReConsoleMonitor(QWidget):
         self._text_edit.setPalette(p)
 
         # Monospace fonts are needed to display elements such as progress bars
-        self._text_edit.setFontFamily("monospace")
+        font = QFont("monospace")
+        font.setStyleHint(QFont.TypeWriter)
+        self._text_edit.setFont(font)
 
         self._text_edit.verticalScrollBar().sliderPressed.connect(self._slider_pressed)
         self._text_edit.verticalScrollBar().sliderReleased.connect(self._slider_released)
@@ -2773,8 +2973,9 @@ class QtReConsoleMonitor(QWidget):
         self.setLayout(vbox)
 
         self.model = model
+        # Console output is received by the model in a background thread and collected
+        #   in batches when the widget is updated.
         self.model.start_console_output_monitoring()
-        self._start_thread()
         self._start_timer()
 
         self._updating_text = False
@@ -2783,66 +2984,22 @@ class QtReConsoleMonitor(QWidget):
         # Timer is used to initiate periodic updates of the QTextEdit widget
         QTimer.singleShot(195, self._update_console_output)
 
-    def _finished_receiving_console_output(self):
-        self._start_thread()
-
-    def _process_new_console_output(self, result):
+    def _process_new_console_output(self, messages, n_dropped=0):
         """
-        The function is processing incoming messages and updates ``self._text_list``.
+        The function is processing a batch of incoming messages and updates the buffer of console output.
         It does not update the widget after each message, because the rate of the messages
         may be very high.
         """
-        time, msg = result
-
-        pattern_new_line = "\n"
-        pattern_cr = "\r"
-        pattern_up_one_line = "\x1b\x5b\x41"  # ESC [#A
-
-        patterns = {"new_line": pattern_new_line, "cr": pattern_cr, "one_line_up": pattern_up_one_line}
-
-        while msg:
-            indices = {k: msg.find(v) for k, v in patterns.items()}
-            indices_nonzero = [_ for _ in indices.values() if (_ >= 0)]
-            next_ind = min(indices_nonzero) if indices_nonzero else len(msg)
-
-            # The following algorithm requires that there is at least one line in the list.
-            if not self._text_list:
-                self._text_list = [""]
-
-            if next_ind != 0:
-                # Add a line to the current line and position
-                substr = msg[:next_ind]
-                msg = msg[next_ind:]
-
-                # Extend the current line with spaces if needed
-                line_len = len(self._text_list[self._text_line])
-                if line_len < self._text_ind:
-                    self._text_list[self._text_line] += " " * self._text_ind - line_len
-
-                line = self._text_list[self._text_line]
-                self._text_list[self._text_line] = (
-                    line[: self._text_ind] + substr + line[self._text_ind + len(substr) :]
-                )
-
-            elif indices["new_line"] == 0:
-                self._text_line += 1
-                if self._text_line >= len(self._text_list):
-                    self._text_list.insert(self._text_line, "")
-                self._text_ind = 0
-                msg = msg[len(patterns["new_line"]) :]
-
-            elif indices["cr"] == 0:
-                self._text_ind = 0
-                msg = msg[len(patterns["cr"]) :]
-
-            elif indices["one_line_up"] == 0:
-                if self._text_line:
-                    self._text_line -= 1
-                msg = msg[len(patterns["one_line_up"]) :]
-
-        self._text_updated = True
+        if n_dropped:
+            self._console_buffer.write(f"\n... {n_dropped} messages of console output were dropped ...\n")
+            self._text_updated = True
+        for time, msg in messages:
+            self._console_buffer.write(msg)
+            self._text_updated = True
 
     def _update_console_output(self):
+        messages, n_dropped = self.model.console_output_pop()
+        self._process_new_console_output(messages, n_dropped)
         if self._text_updated:
             if not self._updating_text:
                 try:
@@ -2860,12 +3017,8 @@ class QtReConsoleMonitor(QWidget):
 
         sval = self._text_edit.verticalScrollBar().value()
 
-        if self._text_list and self._text_list[-1] == "":
-            self._text = "\n".join(self._text_list[:-1])
-        else:
-            self._text = "\n".join(self._text_list)
         self._text_edit.setUpdatesEnabled(False)
-        self._text_edit.setText(self._text)
+        self._apply_text_changes()
         self._text_edit.verticalScrollBar().setValue(sval)
 
         def set_scroller():
@@ -2876,13 +3029,51 @@ class QtReConsoleMonitor(QWidget):
 
         QTimer.singleShot(50, set_scroller)
 
+    def _apply_text_changes(self):
+        """
+        Update the document with the lines that were removed, modified or added since the last update.
+        Typically only a few lines at the end of the document are replaced.
+        """
+        buffer = self._console_buffer
+        n_removed, dirty_from = buffer.pop_changes()
+        n_displayed = self._n_displayed_lines - n_removed
+        n_displayed_new = buffer.count_displayed_lines()
+
+        if n_displayed <= 0:
+            # All displayed lines were removed
+            self._text_edit.setPlainText(buffer.get_text())
+        else:
+            document = self._text_edit.document()
+            cursor = QTextCursor(document)
+            cursor.beginEditBlock()
+            if n_removed:
+                cursor.movePosition(QTextCursor.NextBlock, QTextCursor.KeepAnchor, n_removed)
+                cursor.removeSelectedText()
+
+            # Replace the lines starting from 'start' (including a line that was not displayed
+            #   because it was the trailing empty line)
+            start = min(dirty_from, n_displayed)
+            if (start < n_displayed) or (start < n_displayed_new):
+                text = buffer.get_text(start) if (start < n_displayed_new) else None
+                if start:
+                    # Position at the end of the last unchanged line
+                    block = document.findBlockByNumber(start - 1)
+                    cursor.setPosition(block.position() + block.length() - 1)
+                    text = "" if text is None else "\n" + text
+                else:
+                    cursor.setPosition(0)
+                    text = text or ""
+                cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+                cursor.insertText(text)
+            cursor.endEditBlock()
+
+        self._n_displayed_lines = n_displayed_new
+
     def _pb_clear_clicked(self):
-        self._text = ""
-        self._text_list = []  # List of lines
-        self._text_line = 0  # Number of current line
-        self._text_ind = 0  # Index in the current line
-        self._text_scroll_max = 0  # Total number of displayed lines
-        self._text_edit.setText(self._text)
+        self._console_buffer.clear()
+        self._console_buffer.pop_changes()
+        self._n_displayed_lines = 0
+        self._text_edit.clear()
 
         # Assume that we want to keep displaying text at the bottom if autoscroll is enabled
         self._te_scrolled_to_bottom = self._autoscroll_enabled
@@ -2895,6 +3086,7 @@ class QtReConsoleMonitor(QWidget):
 
         if v != self._max_lines:
             self._max_lines = v
+            self._console_buffer.max_lines = v
             self._adjust_text_list_size()
             self._display_text()
 
@@ -2920,23 +3112,10 @@ class QtReConsoleMonitor(QWidget):
     def _adjust_text_list_size(self):
         # There still should be some limit to the number of lines even if scrolling is paused
         max_lines = self._max_lines if self._autoscroll_enabled else self._le_max_lines_max + 100
-
-        if len(self._text_list) > max_lines:
-            # Remove extra lines from the beginning of the list
-            n_remove = len(self._text_list) - max_lines
-            # In majority of cases only 1 (or a few) elements are removed
-            for _ in range(n_remove):
-                self._text_list.pop(0)
-            self._text_line = max(self._text_line - n_remove, 0)
+        self._console_buffer.trim(max_lines)
 
     def resizeEvent(self, event):
         self._display_text()
 
-    def _start_thread(self):
-        self._thread = FunctionWorker(self.model.console_monitoring_thread)
-        self._thread.returned.connect(self._process_new_console_output)
-        self._thread.finished.connect(self._finished_receiving_console_output)
-        self._thread.start()
-
     def __del__(self):
         self.model.stop_console_output_monitoring()
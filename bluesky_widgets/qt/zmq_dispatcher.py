@@ -3,11 +3,13 @@ import time
 
 import zmq
 from bluesky.run_engine import Dispatcher, DocumentNames
-from qtpy.QtCore import QObject, QTimer
+from qtpy.QtCore import QObject
 
 from ..qt.threading import create_worker
 
-LOADING_LATENCY = 0.01  # sec
+POLL_TIMEOUT = 0.1  # sec, how often the receiver checks whether it should stop
+BATCH_SIZE = 1000  # max documents per batch
+BATCH_LATENCY = 0.05  # sec, max time a document waits in a partial batch
 
 
 class RemoteDispatcher(QObject):
@@ -16,6 +18,12 @@ class RemoteDispatcher(QObject):
 
     This is designed to be run in a Qt application.
 
+    Documents are received on a long-running background thread, which drains
+    everything available from the socket and groups documents into batches.
+    A batch is handed to the Qt main thread once it holds ``batch_size``
+    documents or its oldest document has waited ``batch_latency`` seconds,
+    whichever comes first.
+
     Parameters
     ----------
     address : tuple | str
@@ -27,6 +35,20 @@ class RemoteDispatcher(QObject):
         If unset, no mesages will be ignored.
     deserializer: function, optional
         optional function to deserialize data. Default is pickle.loads
+    batch_size : int, optional
+        Maximum number of documents per batch. Default is 1000.
+    batch_latency : float, optional
+        Maximum time in seconds that a document waits for its batch to fill.
+        Default is 0.05.
+
+    Attributes
+    ----------
+    statistics : dict
+        Counts of documents received and dispatched, the number pending
+        (received from the socket but not yet dispatched; messages still
+        queued in the socket are not counted), and the lag in seconds between
+        receiving and dispatching the most recent batch. A growing number
+        pending or lag indicates that the application is falling behind.
 
     Examples
     --------
@@ -35,11 +57,20 @@ class RemoteDispatcher(QObject):
 
     >>> d = RemoteDispatcher(('localhost', 5568))
     >>> d.subscribe(stream_documents_into_runs(model.add_run))
-    >>> d.start()  # launches periodic workers on background threads
-    >>> d.stop()  # stop launching workers
+    >>> d.start()  # launches a worker on a background thread
+    >>> d.stop()  # stop the worker
     """
 
-    def __init__(self, address, *, prefix=b"", deserializer=pickle.loads, parent=None):
+    def __init__(
+        self,
+        address,
+        *,
+        prefix=b"",
+        deserializer=pickle.loads,
+        batch_size=BATCH_SIZE,
+        batch_latency=BATCH_LATENCY,
+        parent=None,
+    ):
         super().__init__(parent)
         if isinstance(prefix, str):
             raise ValueError("prefix must be bytes, not string")
@@ -50,47 +81,83 @@ class RemoteDispatcher(QObject):
             address = address.split(":", maxsplit=1)
         self._deserializer = deserializer
         self.address = (address[0], int(address[1]))
+        self.batch_size = int(batch_size)
+        self.batch_latency = float(batch_latency)
 
         self._context = zmq.Context()
         self._socket = self._context.socket(zmq.SUB)
         url = "tcp://%s:%d" % self.address
         self._socket.connect(url)
         self._socket.setsockopt_string(zmq.SUBSCRIBE, "")
-        self._task = None
+        self._worker = None
         self.closed = False
         self._dispatcher = Dispatcher()
         self.subscribe = self._dispatcher.subscribe
         self._waiting_for_start = True
+        # These are updated from the receiving thread and the Qt main
+        # thread, respectively.
+        self._received = 0
+        self._dispatched = 0
+        self._lag = 0.0
+
+    @property
+    def statistics(self):
+        received, dispatched = self._received, self._dispatched
+        return {
+            "received": received,
+            "dispatched": dispatched,
+            "pending": received - dispatched,
+            "lag": self._lag,
+        }
+
+    def _parse(self, message):
+        "Return (name, doc) or None if the message should be skipped."
+        prefix, name, doc = message.split(b" ", 2)
+        if self._prefix and prefix != self._prefix:
+            return None
+        name = name.decode()
+        if self._waiting_for_start:
+            if name == "start":
+                self._waiting_for_start = False
+            else:
+                # We subscribed midstream and are seeing documents for
+                # which we do not have the full run. Wait for a 'start'
+                # doc.
+                return None
+        return name, self._deserializer(doc)
 
     def _receive_data(self):
-        our_prefix = self._prefix  # local var to save an attribute lookup
-        # TODO Think about back pressure.
-        while True:
-            try:
-                message = self._socket.recv(zmq.NOBLOCK)
-            except zmq.ZMQError:
-                time.sleep(LOADING_LATENCY)
-                yield
-                continue
-            if not message:
-                time.sleep(LOADING_LATENCY)
-                yield
-                continue
-            prefix, name, doc = message.split(b" ", 2)
-            name = name.decode()
-            if (not our_prefix) or prefix == our_prefix:
-                if self._waiting_for_start:
-                    if name == "start":
-                        self._waiting_for_start = False
-                    else:
-                        # We subscribed midstream and are seeing documents for
-                        # which we do not have the full run. Wait for a 'start'
-                        # doc.
-                        time.sleep(LOADING_LATENCY)
-                        yield
+        poller = zmq.Poller()
+        poller.register(self._socket, zmq.POLLIN)
+        batch = []
+        batch_started = None
+        while not self.closed:
+            timeout = POLL_TIMEOUT
+            if batch:
+                # Wake up in time to hand off this partial batch.
+                timeout = min(timeout, max(0, self.batch_latency - (time.monotonic() - batch_started)))
+            if poller.poll(int(1000 * timeout)):
+                # Drain everything available, up to a full batch.
+                while len(batch) < self.batch_size:
+                    try:
+                        message = self._socket.recv(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    if not message:
                         continue
-                doc = self._deserializer(doc)
-            yield name, doc
+                    item = self._parse(message)
+                    if item is None:
+                        continue
+                    if not batch:
+                        batch_started = time.monotonic()
+                    batch.append(item)
+                    self._received += 1
+            if batch and (len(batch) >= self.batch_size or time.monotonic() - batch_started >= self.batch_latency):
+                yield batch_started, batch
+                batch = []
+        if batch:
+            # Do not discard the documents that were already received
+            yield batch_started, batch
 
     def start(self):
         if self.closed:
@@ -99,25 +166,18 @@ class RemoteDispatcher(QObject):
                 "started and interrupted. Create a fresh "
                 "instance with {}".format(repr(self))
             )
-        self._work_loop()
+        self._worker = create_worker(self._receive_data)
+        self._worker.yielded.connect(self._process_batch)
+        self._worker.start()
 
-    def _work_loop(self):
-        if self.closed:
-            # Prevent the loop from continuing after stop is called
-            return
-        worker = create_worker(
-            self._receive_data,
-        )
-        # Schedule this method to be run again after a brief wait.
-        worker.finished.connect(lambda: QTimer.singleShot(int(LOADING_LATENCY * 1000), self._work_loop))
-        worker.yielded.connect(self._process_result)
-        worker.start()
-
-    def _process_result(self, result):
-        if result is None:
-            return
-        name, doc = result
-        self._dispatcher.process(DocumentNames[name], doc)
+    def _process_batch(self, result):
+        batch_started, batch = result
+        for name, doc in batch:
+            self._dispatcher.process(DocumentNames[name], doc)
+        self._dispatched += len(batch)
+        self._lag = time.monotonic() - batch_started
 
     def stop(self):
+        # The receiving thread checks this at least every POLL_TIMEOUT and
+        # hands off the partial batch before exiting.
         self.closed = True